@@ -2,19 +2,19 @@ from django.contrib import admin
 
 # Register your models here.
 from django.contrib import admin
-from .models import DatasetFile, DatasetSplit
+from .models import ContentBlob, CrossValidation, DatasetFile, DatasetSplit, RenderedPlot, SplitArtifact, SplitJob, UploadSession
 
 @admin.register(DatasetFile)
 class DatasetFileAdmin(admin.ModelAdmin):
     list_display = ['name', 'file', 'file_size', 'rows', 'columns', 'uploaded_at']
     list_filter = ['uploaded_at']
     search_fields = ['name']
-    readonly_fields = ['file_size', 'rows', 'columns', 'uploaded_at']
+    readonly_fields = ['content_hash', 'file_size', 'rows', 'columns', 'uploaded_at', 'profile']
 
 @admin.register(DatasetSplit)
 class DatasetSplitAdmin(admin.ModelAdmin):
     list_display = ['name', 'dataset_file', 'stratify_column', 'train_size', 'validation_size', 'test_size', 'created_at']
-    list_filter = ['created_at', 'stratify_column']
+    list_filter = ['created_at', 'stratify_column', 'method']
     search_fields = ['name', 'dataset_file__name']
     readonly_fields = ['created_at']
     
@@ -23,10 +23,10 @@ class DatasetSplitAdmin(admin.ModelAdmin):
             'fields': ('name', 'dataset_file', 'created_at')
         }),
         ('Configuración de División', {
-            'fields': ('stratify_column', 'random_state', 'shuffle')
+            'fields': ('stratify_column', 'random_state', 'shuffle', 'storage_mode', 'method', 'hash_columns')
         }),
         ('Archivos de Splits', {
-            'fields': ('train_file', 'validation_file', 'test_file')
+            'fields': ('train_file', 'validation_file', 'test_file', 'indices_file')
         }),
         ('Gráficas', {
             'fields': ('distribution_plot', 'comparison_plot')
@@ -34,4 +34,42 @@ class DatasetSplitAdmin(admin.ModelAdmin):
         ('Tamaños de Conjuntos', {
             'fields': ('train_size', 'validation_size', 'test_size')
         }),
-    )
\ No newline at end of file
+    )
+
+@admin.register(SplitJob)
+class SplitJobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'dataset_file', 'status', 'progress', 'attempts', 'created_at', 'finished_at']
+    list_filter = ['status', 'created_at']
+    readonly_fields = ['attempts', 'heartbeat_at', 'created_at', 'started_at', 'finished_at']
+
+@admin.register(CrossValidation)
+class CrossValidationAdmin(admin.ModelAdmin):
+    list_display = ['name', 'dataset_file', 'method', 'n_splits', 'n_repeats', 'stratify_column', 'created_at']
+    list_filter = ['method', 'created_at']
+    search_fields = ['name', 'dataset_file__name']
+    readonly_fields = ['created_at', 'fold_sizes']
+
+@admin.register(RenderedPlot)
+class RenderedPlotAdmin(admin.ModelAdmin):
+    list_display = ['dataset_file', 'column_name', 'kind', 'dpi', 'width', 'height', 'created_at']
+    list_filter = ['kind', 'created_at']
+    readonly_fields = ['etag', 'created_at']
+
+@admin.register(SplitArtifact)
+class SplitArtifactAdmin(admin.ModelAdmin):
+    list_display = ['split', 'part', 'format', 'encoding', 'size', 'created_at']
+    list_filter = ['format', 'encoding']
+    readonly_fields = ['created_at']
+
+@admin.register(UploadSession)
+class UploadSessionAdmin(admin.ModelAdmin):
+    list_display = ['filename', 'status', 'total_size', 'validated_chunks', 'total_chunks', 'created_at']
+    list_filter = ['status', 'created_at']
+    readonly_fields = ['relation', 'attributes', 'validated_chunks', 'validated_rows', 'dataset_file', 'created_at', 'updated_at']
+    exclude = ['carry']
+
+@admin.register(ContentBlob)
+class ContentBlobAdmin(admin.ModelAdmin):
+    list_display = ['key', 'path', 'size', 'ref_count', 'created_at']
+    search_fields = ['key', 'path']
+    readonly_fields = ['key', 'path', 'size', 'ref_count', 'created_at']
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ArffAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'arff_app'
+
+    def ready(self):
+        from . import signals  # noqa: F401
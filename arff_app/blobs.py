@@ -0,0 +1,110 @@
+import hashlib
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import ContentBlob
+
+
+def content_key(digest):
+    """Clave de un archivo identificado por el SHA-256 de su contenido"""
+    return f"sha256:{digest}"
+
+
+def provenance_key(kind, *parts):
+    """
+    Clave de un artefacto derivado: el mismo tipo de artefacto generado a partir
+    del mismo contenido y con los mismos parámetros tiene siempre la misma clave.
+    """
+    digest = hashlib.sha256(repr(parts).encode('utf-8')).hexdigest()
+    return f"{kind}:{digest}"
+
+
+def hash_file(file):
+    """SHA-256 de un archivo subido, leído por bloques y dejado al inicio"""
+    digest = hashlib.sha256()
+    for chunk in file.chunks():
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def hash_storage_file(path):
+    """SHA-256 de un archivo del storage, leído por bloques"""
+    digest = hashlib.sha256()
+    with default_storage.open(path, 'rb') as fh:
+        for chunk in fh.chunks():
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def acquire_blob(key, write):
+    """
+    Obtener la ruta del blob con esa clave sumándole una referencia.
+    Si no existe se crea con write(), que guarda el archivo y devuelve su ruta.
+    """
+    while True:
+        if ContentBlob.objects.filter(key=key).update(ref_count=F('ref_count') + 1):
+            path = ContentBlob.objects.filter(key=key).values_list('path', flat=True).first()
+            if path is not None:
+                return path
+            continue
+
+        path = write()
+        try:
+            with transaction.atomic():
+                ContentBlob.objects.create(
+                    key=key,
+                    path=path,
+                    size=default_storage.size(path),
+                    sha256=key[len('sha256:'):] if key.startswith('sha256:') else None
+                )
+            return path
+        except IntegrityError:
+            # Otra petición creó el mismo blob a la vez: usar el suyo
+            default_storage.delete(path)
+
+
+def file_digest(path):
+    """
+    SHA-256 del contenido de un archivo del storage, calculado una sola vez.
+    Los archivos anteriores al almacenamiento por contenido se registran como blob.
+    """
+    blob = ContentBlob.objects.filter(path=path).only('id', 'sha256').first()
+    if blob is not None and blob.sha256:
+        return blob.sha256
+
+    digest = hash_storage_file(path)
+    if blob is not None:
+        ContentBlob.objects.filter(pk=blob.pk).update(sha256=digest)
+        return digest
+
+    try:
+        with transaction.atomic():
+            ContentBlob.objects.create(
+                key=content_key(digest), path=path, size=default_storage.size(path), sha256=digest)
+    except IntegrityError:
+        # Ya hay otro archivo con el mismo contenido: este se queda fuera del registro
+        pass
+    return digest
+
+
+def release_file(path):
+    """
+    Quitar una referencia a un archivo del storage.
+    El archivo se borra cuando ya nadie lo usa; los archivos que no son blobs se
+    borran directamente. Devuelve True si el archivo se borró.
+    """
+    if not path:
+        return False
+
+    with transaction.atomic():
+        blob = ContentBlob.objects.select_for_update().filter(path=path).first()
+        if blob is not None:
+            if blob.ref_count > 1:
+                ContentBlob.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') - 1)
+                return False
+            blob.delete()
+
+    default_storage.delete(path)
+    return True
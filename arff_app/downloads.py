@@ -0,0 +1,353 @@
+import logging
+import re
+import tempfile
+from django.core.files.base import File
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date, quote_etag
+
+from .blobs import acquire_blob, provenance_key, release_file
+from .models import ContentBlob, DatasetSplit, SplitArtifact, split_upload_path
+from .services import split_provenance
+from .utils.dataframe_cache import get_dataset_frame
+from .utils.dataset_utils import (
+    deserialize_split_indices,
+    iter_arff_chunks,
+    load_kdd_dataset_from_file,
+    split_relation
+)
+from .utils.export_formats import (
+    dataframe_to_npz,
+    dataframe_to_parquet,
+    iter_csv_chunks,
+    iter_gzip,
+    iter_zstd,
+    parquet_available,
+    zstd_available
+)
+from .utils.storage_utils import save_stream_to_storage
+
+logger = logging.getLogger(__name__)
+
+SPLIT_PARTS = ('train', 'validation', 'test')
+
+# Formatos de descarga: (Content-Type, extensión)
+DOWNLOAD_FORMATS = {
+    'arff': ('text/plain; charset=utf-8', 'arff'),
+    'arff.gz': ('application/gzip', 'arff.gz'),
+    'csv.gz': ('application/gzip', 'csv.gz'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+    'npz': ('application/octet-stream', 'npz'),
+}
+
+# Content-Encoding ofrecidos para el ARFF plano, por orden de preferencia
+CONTENT_ENCODINGS = ('zstd', 'gzip')
+ENCODING_EXTENSIONS = {'zstd': 'zst', 'gzip': 'gz'}
+
+# Los artefactos no cambian una vez escritos: navegadores y CDN pueden guardarlos
+# indefinidamente. Lo que puede regenerarse se revalida siempre con el ETag.
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE_CONTROL = 'public, no-cache'
+
+_RANGE_RE = re.compile(r'bytes=(\d*)-(\d*)')
+
+# Lo que se genera mientras se sirve se acumula en memoria hasta este tamaño
+SPOOL_MAX_SIZE = 16 * 1024 * 1024
+
+
+class DownloadError(ValueError):
+    """Descarga no disponible que se devuelve al cliente"""
+
+
+def negotiate_encoding(accept_encoding):
+    """Elegir zstd o gzip según la cabecera Accept-Encoding (None: sin comprimir)"""
+    accepted = {}
+    for item in (accept_encoding or '').split(','):
+        token, _, params = item.partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if token.strip():
+            accepted[token.strip().lower()] = quality
+
+    for encoding in CONTENT_ENCODINGS:
+        if encoding == 'zstd' and not zstd_available():
+            continue
+        if accepted.get(encoding, accepted.get('*', 0)) > 0:
+            return encoding
+    return None
+
+
+def check_download(dataset_split, part, fmt):
+    """Comprobar que la parte existe y que el formato puede generarse"""
+    if fmt == 'parquet' and not parquet_available():
+        raise DownloadError('El formato parquet no está disponible en este servidor (requiere pyarrow)')
+
+    if dataset_split.storage_mode == DatasetSplit.STORAGE_INDICES:
+        available = bool(dataset_split.indices_file)
+    else:
+        available = bool(getattr(dataset_split, f'{part}_file'))
+    if not available:
+        raise DownloadError(f'Archivo {part} no disponible')
+
+
+def load_split_positions(dataset_split, part):
+    """Posiciones de filas de una parte de un split guardado como índices"""
+    with dataset_split.indices_file.open('rb') as fh:
+        train_idx, val_idx, test_idx = deserialize_split_indices(
+            fh, dataset_split.train_size, dataset_split.validation_size)
+
+    return {'train': train_idx, 'validation': val_idx, 'test': test_idx}[part]
+
+
+def iter_split_arff(dataset_split, part):
+    """Bloques del ARFF de una parte: el archivo guardado o generado desde los índices"""
+    if dataset_split.storage_mode == DatasetSplit.STORAGE_INDICES:
+        df = get_dataset_frame(dataset_split.dataset_file)
+        positions = load_split_positions(dataset_split, part)
+        yield from iter_arff_chunks(df, split_relation(df.attrs.get('relation'), part), positions)
+        return
+
+    with getattr(dataset_split, f'{part}_file').open('rb') as fh:
+        yield from fh.chunks()
+
+
+def _split_rows(dataset_split, part):
+    """DataFrame y posiciones con las filas de una parte"""
+    if dataset_split.storage_mode == DatasetSplit.STORAGE_INDICES:
+        return get_dataset_frame(dataset_split.dataset_file), load_split_positions(dataset_split, part)
+
+    with getattr(dataset_split, f'{part}_file').open('rb') as fh:
+        return load_kdd_dataset_from_file(fh), None
+
+
+def iter_split_download(dataset_split, part, fmt, encoding=None):
+    """Contenido de una parte en el formato pedido, en bloques de bytes"""
+    if fmt == 'arff':
+        chunks = iter_split_arff(dataset_split, part)
+        if encoding == 'zstd':
+            return iter_zstd(chunks)
+        if encoding == 'gzip':
+            return iter_gzip(chunks)
+        return chunks
+    if fmt == 'arff.gz':
+        return iter_gzip(iter_split_arff(dataset_split, part))
+
+    # Los formatos tabulares parten de las filas ya parseadas
+    df, positions = _split_rows(dataset_split, part)
+    if fmt == 'csv.gz':
+        return iter_gzip(iter_csv_chunks(df, positions))
+    if fmt == 'parquet':
+        return iter([dataframe_to_parquet(df, positions)])
+    return iter([dataframe_to_npz(df, positions)])
+
+
+def _artifact_key(dataset_split, part, fmt, encoding):
+    """Splits idénticos comparten cada formato generado"""
+    # arff.gz tiene los mismos bytes que el ARFF servido con Content-Encoding gzip
+    if fmt == 'arff.gz':
+        fmt, encoding = 'arff', 'gzip'
+    provenance = split_provenance(
+        dataset_split.dataset_file, dataset_split.stratify_column, dataset_split.random_state, dataset_split.shuffle,
+        dataset_split.storage_mode, dataset_split.method, dataset_split.hash_columns)
+    return provenance_key('split-download', *provenance, part, fmt, encoding or '')
+
+
+def _artifact_filename(dataset_split, part, fmt, encoding):
+    """Ruta en el storage de un formato generado"""
+    filename = f"{dataset_split.name}_{part}.{DOWNLOAD_FORMATS[fmt][1]}"
+    if encoding:
+        filename = f"{filename}.{ENCODING_EXTENSIONS[encoding]}"
+    return split_upload_path(None, filename)
+
+
+def _register_artifact(dataset_split, part, fmt, encoding, path):
+    """Asociar al split un blob ya adquirido"""
+    artifact = SplitArtifact(
+        split=dataset_split,
+        part=part,
+        format=fmt,
+        encoding=encoding or '',
+        file=path,
+        size=default_storage.size(path)
+    )
+    try:
+        with transaction.atomic():
+            artifact.save()
+    except IntegrityError:
+        # Otra petición guardó el mismo formato a la vez: usar el suyo
+        release_file(path)
+        artifact = SplitArtifact.objects.get(
+            split=dataset_split, part=part, format=fmt, encoding=encoding or '')
+    return artifact
+
+
+def get_split_artifact(dataset_split, part, fmt, encoding=None):
+    """
+    Formato ya guardado para esta parte, o None si hay que generarlo.
+    Si un split idéntico ya lo generó se comparte su archivo.
+    """
+    artifact = SplitArtifact.objects.filter(
+        split=dataset_split, part=part, format=fmt, encoding=encoding or '').first()
+    if artifact is not None:
+        return artifact
+
+    key = _artifact_key(dataset_split, part, fmt, encoding)
+    if not ContentBlob.objects.filter(key=key).exists():
+        return None
+
+    def write():
+        # Otra petición lo borró entre tanto: se vuelve a generar
+        chunks = iter_split_download(dataset_split, part, fmt, encoding)
+        return save_stream_to_storage(chunks, _artifact_filename(dataset_split, part, fmt, encoding))
+
+    return _register_artifact(dataset_split, part, fmt, encoding, acquire_blob(key, write))
+
+
+def generated_etag(dataset_split, part, fmt, encoding=None):
+    """
+    ETag débil de un formato que se genera al servirlo: depende solo de los datos y
+    parámetros que lo producen. Es débil porque algunos formatos (npz) no generan
+    siempre los mismos bytes: vale para 304, no para reanudar con If-Range.
+    """
+    return 'W/"%s"' % _artifact_key(dataset_split, part, fmt, encoding).partition(':')[2]
+
+
+def build_split_download(dataset_split, part, fmt, encoding=None):
+    """Generar el formato completo en un archivo temporal, sin guardarlo en el storage"""
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    try:
+        for chunk in iter_split_download(dataset_split, part, fmt, encoding):
+            spool.write(chunk)
+    except BaseException:
+        spool.close()
+        raise
+    size = spool.tell()
+    spool.seek(0)
+    file = File(spool)
+    file.size = size
+    return file
+
+
+def stream_split_artifact(dataset_split, part, fmt, encoding=None):
+    """
+    Generar el formato mientras se sirve y guardarlo en el storage al terminar,
+    para que las siguientes descargas lo sirvan directamente.
+    Si el cliente corta la descarga no se guarda nada.
+    """
+    chunks = iter_split_download(dataset_split, part, fmt, encoding)
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    try:
+        for chunk in chunks:
+            spool.write(chunk)
+            yield chunk
+
+        spool.seek(0)
+        filename = _artifact_filename(dataset_split, part, fmt, encoding)
+        try:
+            path = acquire_blob(
+                _artifact_key(dataset_split, part, fmt, encoding),
+                lambda: default_storage.save(filename, File(spool, name=filename))
+            )
+            _register_artifact(dataset_split, part, fmt, encoding, path)
+        except Exception:
+            # La descarga ya se completó: solo se pierde la caché
+            logger.exception('No se pudo guardar el formato %s del split %s', fmt, dataset_split.id)
+    finally:
+        spool.close()
+
+
+def parse_range(header, size):
+    """
+    Intervalo (inicio, fin inclusivo) pedido en la cabecera Range.
+    Devuelve None si no hay Range válido o si pide varios intervalos (se sirve el
+    archivo completo) y lanza ValueError si el intervalo no es satisfacible.
+    """
+    match = _RANGE_RE.fullmatch(header.strip()) if header else None
+    if match is None:
+        return None
+
+    first, last = match.groups()
+    if not first:
+        # bytes=-N: los últimos N bytes
+        if not last:
+            return None
+        if int(last) == 0:
+            raise ValueError('Intervalo vacío')
+        return max(size - int(last), 0), size - 1
+
+    start = int(first)
+    if start >= size:
+        raise ValueError('Intervalo fuera del archivo')
+    end = min(int(last), size - 1) if last else size - 1
+    if end < start:
+        return None
+    return start, end
+
+
+def _iter_file_range(fh, start, length):
+    """Leer length bytes desde start, por bloques, y cerrar el archivo"""
+    try:
+        fh.seek(start)
+        while length > 0:
+            chunk = fh.read(min(File.DEFAULT_CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        fh.close()
+
+
+def serve_file(request, file, filename, content_type, etag, last_modified=None,
+               immutable=True, content_encoding=None, as_attachment=True):
+    """
+    Servir un archivo del storage con ETag fuerte (hash del contenido), 304 Not
+    Modified, peticiones Range (206) y cabeceras de caché. Con un ETag débil
+    If-Range nunca coincide y se responde el archivo completo.
+    En producción se sirve igual que en desarrollo, sin redirigir al bucket.
+    """
+    etag = quote_etag(etag)
+    last_modified = int(last_modified.timestamp()) if last_modified else None
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        size = file.size
+
+        # If-Range: el intervalo solo vale si el cliente tiene esta misma versión, lo
+        # que exige un ETag fuerte
+        byte_range = None
+        if_range = request.META.get('HTTP_IF_RANGE')
+        if if_range is None or (if_range == etag and not etag.startswith('W/')):
+            try:
+                byte_range = parse_range(request.META.get('HTTP_RANGE'), size)
+            except ValueError:
+                response = HttpResponse(status=416)
+                response['Content-Range'] = f'bytes */{size}'
+                return response
+
+        if byte_range is None:
+            response = FileResponse(file.open('rb'), content_type=content_type)
+        else:
+            start, end = byte_range
+            response = StreamingHttpResponse(
+                _iter_file_range(file.open('rb'), start, end - start + 1), status=206, content_type=content_type)
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+            response['Content-Length'] = end - start + 1
+
+        response['Content-Disposition'] = content_disposition_header(as_attachment, filename)
+        if content_encoding:
+            response['Content-Encoding'] = content_encoding
+
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    response['Accept-Ranges'] = 'bytes'
+    response['Cache-Control'] = IMMUTABLE_CACHE_CONTROL if immutable else REVALIDATE_CACHE_CONTROL
+    return response
@@ -0,0 +1,26 @@
+import django_filters
+
+from .models import DatasetFile, DatasetSplit
+
+
+class DatasetFileFilter(django_filters.FilterSet):
+    name = django_filters.CharFilter(lookup_expr='icontains')
+    uploaded_after = django_filters.DateFilter(field_name='uploaded_at', lookup_expr='date__gte')
+    uploaded_before = django_filters.DateFilter(field_name='uploaded_at', lookup_expr='date__lte')
+    
+    class Meta:
+        model = DatasetFile
+        fields = ['name']
+
+
+class DatasetSplitFilter(django_filters.FilterSet):
+    dataset = django_filters.NumberFilter(field_name='dataset_file_id')
+    stratify_column = django_filters.CharFilter()
+    storage_mode = django_filters.ChoiceFilter(choices=DatasetSplit.STORAGE_MODE_CHOICES)
+    method = django_filters.ChoiceFilter(choices=DatasetSplit.METHOD_CHOICES)
+    created_after = django_filters.DateFilter(field_name='created_at', lookup_expr='date__gte')
+    created_before = django_filters.DateFilter(field_name='created_at', lookup_expr='date__lte')
+    
+    class Meta:
+        model = DatasetSplit
+        fields = ['dataset', 'stratify_column', 'storage_mode', 'method']
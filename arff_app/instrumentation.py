@@ -0,0 +1,349 @@
+import bisect
+import contextlib
+import contextvars
+import functools
+import inspect
+import logging
+import os
+import resource
+import sys
+import threading
+import time
+from django.conf import settings
+from django.db import connection
+from django.http import HttpResponse
+
+logger = logging.getLogger(__name__)
+
+# Instrumentación de las rutas calientes: fases con span()/@timed, consultas a la
+# base de datos, bytes leídos y escritos en el storage y memoria residente.
+# Cada petición (o trabajo en segundo plano) acumula su desglose en un RequestProfile
+# y todo se agrega en histogramas Prometheus por proceso que expone /metrics.
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250, 500)
+BYTES_BUCKETS = tuple(1024 ** 2 * size for size in (1, 4, 16, 64, 256, 1024))
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def _escape(value):
+    """Escapar el valor de una etiqueta Prometheus"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    """{a="x",b="y"} (vacío si no hay etiquetas)"""
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+
+class Histogram:
+    """Histograma acumulado con etiquetas, en memoria del proceso"""
+
+    def __init__(self, name, help_text, labelnames, buckets=DURATION_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            if index < len(self.buckets):
+                series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = sorted((key, [list(counts), total, count]) for key, (counts, total, count) in self._series.items())
+
+        for key, (counts, total, count) in series:
+            labels = list(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{_format_labels(labels + [("le", bound)])} {cumulative}')
+            lines.append(f'{self.name}_bucket{_format_labels(labels + [("le", "+Inf")])} {count}')
+            lines.append(f'{self.name}_sum{_format_labels(labels)} {total}')
+            lines.append(f'{self.name}_count{_format_labels(labels)} {count}')
+        return '\n'.join(lines)
+
+
+class Counter:
+    """Contador monótono con etiquetas, en memoria del proceso"""
+
+    def __init__(self, name, help_text, labelnames):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            lines.append(f'{self.name}{_format_labels(zip(self.labelnames, key))} {value}')
+        return '\n'.join(lines)
+
+
+REQUEST_SECONDS = Histogram(
+    'arff_request_duration_seconds', 'Duración de las peticiones HTTP', ['method', 'view', 'status'])
+SPAN_SECONDS = Histogram(
+    'arff_span_duration_seconds', 'Duración de cada fase instrumentada', ['span'])
+REQUEST_QUERIES = Histogram(
+    'arff_request_db_queries', 'Consultas a la base de datos por petición', ['view'], QUERY_BUCKETS)
+REQUEST_PEAK_RSS = Histogram(
+    'arff_request_peak_rss_bytes', 'Memoria residente máxima observada durante la petición', ['view'],
+    BYTES_BUCKETS)
+STORAGE_BYTES = Counter(
+    'arff_storage_bytes_total', 'Bytes leídos y escritos en el storage', ['direction'])
+
+METRICS = [REQUEST_SECONDS, SPAN_SECONDS, REQUEST_QUERIES, REQUEST_PEAK_RSS, STORAGE_BYTES]
+
+
+def peak_rss():
+    """Memoria residente máxima del proceso en bytes (ru_maxrss va en KB salvo en macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def current_rss():
+    """Memoria residente actual del proceso en bytes"""
+    try:
+        with open('/proc/self/statm') as fh:
+            return int(fh.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        # Sin /proc solo se conoce el máximo del proceso
+        return peak_rss()
+
+
+class RequestProfile:
+    """Desglose de una petición o de un trabajo: fases, consultas, storage y memoria"""
+
+    def __init__(self):
+        self.spans = {}
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.peak_rss = current_rss()
+        self._lock = threading.Lock()
+
+    def add_span(self, name, seconds):
+        rss = current_rss()
+        with self._lock:
+            total, calls = self.spans.get(name, (0.0, 0))
+            self.spans[name] = (total + seconds, calls + 1)
+            self.peak_rss = max(self.peak_rss, rss)
+
+    def add_storage_bytes(self, direction, amount):
+        with self._lock:
+            if direction == 'read':
+                self.bytes_read += amount
+            else:
+                self.bytes_written += amount
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        """Contar las consultas de la conexión de este hilo (connection.execute_wrapper)"""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            with self._lock:
+                self.queries += 1
+                self.query_seconds += time.perf_counter() - start
+
+    def summary(self):
+        """Resumen de una línea para el log (las fases anidadas se solapan)"""
+        phases = ', '.join(
+            f'{name}={total:.3f}s' + (f'x{calls}' if calls > 1 else '')
+            for name, (total, calls) in sorted(self.spans.items(), key=lambda item: -item[1][0])
+        )
+        return (
+            f'db={self.queries} ({self.query_seconds:.3f}s) '
+            f'storage r={self.bytes_read} w={self.bytes_written} '
+            f'rss_max={self.peak_rss // (1024 * 1024)}MB'
+            + (f' | {phases}' if phases else '')
+        )
+
+
+_current_profile = contextvars.ContextVar('arff_request_profile', default=None)
+
+
+@contextlib.contextmanager
+def collect():
+    """
+    Recoger el desglose de todo lo que se ejecute dentro.
+    Los hilos lanzados con copy_context() (p. ej. save_concurrently) cuentan también.
+    """
+    profile = RequestProfile()
+    token = _current_profile.set(profile)
+    try:
+        with connection.execute_wrapper(profile.execute_wrapper):
+            yield profile
+    finally:
+        _current_profile.reset(token)
+        profile.peak_rss = max(profile.peak_rss, current_rss())
+
+
+def _record_span(name, seconds):
+    SPAN_SECONDS.observe(seconds, span=name)
+    profile = _current_profile.get()
+    if profile is not None:
+        profile.add_span(name, seconds)
+
+
+@contextlib.contextmanager
+def span(name):
+    """Medir una fase con nombre"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record_span(name, time.perf_counter() - start)
+
+
+def timed(name):
+    """
+    Decorador que mide cada llamada como una fase.
+    En los generadores solo se cuenta el tiempo dentro del generador, no el del
+    consumidor (p. ej. el servidor enviando bloques al cliente).
+    """
+    def decorator(func):
+        if inspect.isgeneratorfunction(func):
+            @functools.wraps(func)
+            def generator_wrapper(*args, **kwargs):
+                generator = func(*args, **kwargs)
+                elapsed = 0.0
+                try:
+                    while True:
+                        start = time.perf_counter()
+                        try:
+                            item = next(generator)
+                        except StopIteration:
+                            return
+                        finally:
+                            elapsed += time.perf_counter() - start
+                        yield item
+                finally:
+                    generator.close()
+                    _record_span(name, elapsed)
+            return generator_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_storage_bytes(direction, amount):
+    """Anotar bytes leídos ('read') o escritos ('write') en el storage"""
+    if not amount:
+        return
+    STORAGE_BYTES.inc(amount, direction=direction)
+    profile = _current_profile.get()
+    if profile is not None:
+        profile.add_storage_bytes(direction, amount)
+
+
+def render_metrics():
+    """Métricas del proceso en formato de texto de Prometheus"""
+    process = [
+        '# HELP arff_process_resident_memory_bytes Memoria residente del proceso',
+        '# TYPE arff_process_resident_memory_bytes gauge',
+        f'arff_process_resident_memory_bytes {current_rss()}',
+        '# HELP arff_process_peak_resident_memory_bytes Memoria residente máxima del proceso',
+        '# TYPE arff_process_peak_resident_memory_bytes gauge',
+        f'arff_process_peak_resident_memory_bytes {peak_rss()}',
+    ]
+    return '\n'.join([metric.render() for metric in METRICS] + process) + '\n'
+
+
+def metrics_view(request):
+    """
+    Endpoint /metrics para Prometheus, solo accesible desde METRICS_ALLOWED_IPS.
+    Con varios workers cada uno expone sus propias métricas (etiqueta instance/pid en el scrape).
+    """
+    allowed = getattr(settings, 'METRICS_ALLOWED_IPS', ['127.0.0.1', '::1'])
+    if request.META.get('REMOTE_ADDR') not in allowed:
+        return HttpResponse('Forbidden', status=403, content_type='text/plain')
+    return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+class InstrumentationMiddleware:
+    """
+    Medir cada petición: duración, consultas, bytes de storage y memoria por vista,
+    con una línea de log con el desglose por fases.
+    Con SLOW_REQUEST_PROFILE_MS > 0 y pyinstrument instalado, las peticiones que
+    superan ese tiempo guardan un perfil HTML en SLOW_REQUEST_PROFILE_DIR.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.slow_threshold = getattr(settings, 'SLOW_REQUEST_PROFILE_MS', 0) / 1000
+
+    def __call__(self, request):
+        profiler = self._start_profiler()
+        start = time.perf_counter()
+
+        with collect() as profile:
+            response = self.get_response(request)
+
+        duration = time.perf_counter() - start
+        match = request.resolver_match
+        view = (match.url_name or match.view_name) if match else 'unmatched'
+        if profiler is not None:
+            self._finish_profiler(profiler, view, duration)
+        if view == 'metrics':
+            return response
+
+        REQUEST_SECONDS.observe(duration, method=request.method, view=view, status=response.status_code)
+        REQUEST_QUERIES.observe(profile.queries, view=view)
+        REQUEST_PEAK_RSS.observe(profile.peak_rss, view=view)
+        logger.info('%s %s %s %.3fs %s', request.method, request.path, response.status_code, duration, profile.summary())
+        return response
+
+    def _start_profiler(self):
+        if not self.slow_threshold:
+            return None
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            logger.warning('SLOW_REQUEST_PROFILE_MS requiere pyinstrument: perfilado desactivado')
+            self.slow_threshold = 0
+            return None
+
+        profiler = Profiler(async_mode='disabled')
+        profiler.start()
+        return profiler
+
+    def _finish_profiler(self, profiler, view, duration):
+        profiler.stop()
+        if duration < self.slow_threshold:
+            return
+
+        directory = getattr(settings, 'SLOW_REQUEST_PROFILE_DIR', 'profiles')
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{view}-{int(duration * 1000)}ms.html")
+        with open(path, 'w', encoding='utf-8') as fh:
+            fh.write(profiler.output_html())
+        logger.warning('Petición lenta (%s, %.3fs): perfil guardado en %s', view, duration, path)
@@ -0,0 +1,166 @@
+import logging
+import threading
+from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .instrumentation import collect
+from .models import SplitJob
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+# Tareas de vaciado de la cola enviadas al pool que aún no han empezado
+_pending_drains = 0
+
+
+def _get_executor():
+    """Pool de hilos del proceso para ejecutar trabajos (None si está desactivado)"""
+    global _executor
+    threads = getattr(settings, 'SPLIT_JOB_THREADS', 0)
+    if threads <= 0:
+        return None
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='split-job')
+    return _executor
+
+
+def enqueue_split_job(dataset_file, parameters):
+    """
+    Crear un trabajo de división en estado 'queued'.
+    Si el pool local está activo se ejecuta en segundo plano al confirmar la transacción;
+    si no, lo recoge el comando run_split_worker.
+    """
+    job = SplitJob.objects.create(dataset_file=dataset_file, parameters=parameters)
+
+    transaction.on_commit(schedule_pending_jobs)
+    return job
+
+
+def schedule_pending_jobs():
+    """
+    Hacer que el pool local recoja los trabajos en cola o interrumpidos, p. ej. los
+    que quedaron pendientes al reiniciarse el proceso que iba a ejecutarlos.
+    No se envían más tareas que hilos tiene el pool.
+    """
+    global _pending_drains
+    executor = _get_executor()
+    if executor is None:
+        return
+
+    with _executor_lock:
+        if _pending_drains >= getattr(settings, 'SPLIT_JOB_THREADS', 0):
+            return
+        _pending_drains += 1
+    executor.submit(_drain_queue)
+
+
+def requeue_expired_jobs():
+    """
+    Devolver a la cola los trabajos 'running' sin avances durante SPLIT_JOB_LEASE_SECONDS
+    (el proceso que los ejecutaba terminó). Los que ya agotaron SPLIT_JOB_MAX_ATTEMPTS
+    se marcan como fallidos.
+    """
+    lease = timedelta(seconds=getattr(settings, 'SPLIT_JOB_LEASE_SECONDS', 600))
+    max_attempts = getattr(settings, 'SPLIT_JOB_MAX_ATTEMPTS', 3)
+    now = timezone.now()
+    expired = SplitJob.objects.filter(
+        Q(heartbeat_at__lt=now - lease) | Q(heartbeat_at__isnull=True, started_at__lt=now - lease),
+        status=SplitJob.STATUS_RUNNING
+    )
+
+    failed = expired.filter(attempts__gte=max_attempts).update(
+        status=SplitJob.STATUS_FAILED,
+        message=f'El trabajo se interrumpió {max_attempts} veces sin terminar',
+        finished_at=now
+    )
+    requeued = expired.filter(attempts__lt=max_attempts).update(
+        status=SplitJob.STATUS_QUEUED,
+        progress=0,
+        message='Reanudando tras una interrupción'
+    )
+    if failed or requeued:
+        logger.warning('Trabajos de división interrumpidos: %s reencolados, %s fallidos', requeued, failed)
+    return requeued
+
+
+def claim_job(job_id):
+    """Marcar un trabajo como 'running' solo si seguía en cola (evita ejecuciones dobles)"""
+    now = timezone.now()
+    claimed = SplitJob.objects.filter(id=job_id, status=SplitJob.STATUS_QUEUED).update(
+        status=SplitJob.STATUS_RUNNING,
+        started_at=now,
+        heartbeat_at=now,
+        attempts=F('attempts') + 1,
+        message='Iniciando'
+    )
+    return claimed == 1
+
+
+def claim_next_job():
+    """Reclamar el trabajo en cola más antiguo (incluidos los interrumpidos), o None si no hay ninguno"""
+    requeue_expired_jobs()
+    queued = SplitJob.objects.filter(status=SplitJob.STATUS_QUEUED).order_by('created_at')
+    for job_id in queued.values_list('id', flat=True)[:10]:
+        if claim_job(job_id):
+            return job_id
+    return None
+
+
+def run_split_job(job_id):
+    """Ejecutar un trabajo ya reclamado y registrar su resultado"""
+    from .services import create_dataset_split
+
+    job = SplitJob.objects.select_related('dataset_file').get(id=job_id)
+    # Si el trabajo se dio por interrumpido y otro proceso lo reclamó, este resultado se descarta
+    current = SplitJob.objects.filter(id=job_id, status=SplitJob.STATUS_RUNNING, attempts=job.attempts)
+
+    def progress(percent, message):
+        current.update(progress=percent, message=message, heartbeat_at=timezone.now())
+
+    try:
+        with collect() as profile:
+            dataset_split = create_dataset_split(job.dataset_file, progress=progress, **job.parameters)
+        logger.info('Trabajo de división %s completado: %s', job_id, profile.summary())
+    except Exception as e:
+        logger.exception('Error en el trabajo de división %s', job_id)
+        current.update(
+            status=SplitJob.STATUS_FAILED,
+            message=f'Error al dividir el dataset: {str(e)}',
+            finished_at=timezone.now()
+        )
+        return
+
+    current.update(
+        status=SplitJob.STATUS_DONE,
+        progress=100,
+        message='Dataset dividido exitosamente',
+        split=dataset_split,
+        finished_at=timezone.now()
+    )
+
+
+def _drain_queue():
+    """
+    Punto de entrada del pool local: ejecutar trabajos hasta vaciar la cola.
+    Cada hilo usa y cierra su propia conexión.
+    """
+    global _pending_drains
+    with _executor_lock:
+        _pending_drains -= 1
+
+    close_old_connections()
+    try:
+        while True:
+            job_id = claim_next_job()
+            if job_id is None:
+                break
+            run_split_job(job_id)
+    finally:
+        close_old_connections()
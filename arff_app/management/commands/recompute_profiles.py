@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from arff_app.models import DatasetFile
+from arff_app.utils.dataframe_cache import get_dataset_frame
+from arff_app.utils.dataset_utils import compute_dataset_profile
+
+
+class Command(BaseCommand):
+    help = 'Recalcular el perfil precalculado de los datasets subidos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset_ids', nargs='*', type=int,
+                            help='IDs de los datasets (por defecto, todos)')
+        parser.add_argument('--missing-only', action='store_true',
+                            help='Solo datasets que todavía no tienen perfil')
+
+    def handle(self, *args, **options):
+        datasets = DatasetFile.objects.all()
+        if options['dataset_ids']:
+            datasets = datasets.filter(id__in=options['dataset_ids'])
+        if options['missing_only']:
+            datasets = datasets.filter(profile__isnull=True)
+
+        updated = 0
+        for dataset_file in datasets.iterator():
+            try:
+                df = get_dataset_frame(dataset_file)
+            except Exception as e:
+                raise CommandError(f'Error al cargar el dataset {dataset_file.id}: {e}')
+
+            dataset_file.profile = compute_dataset_profile(df)
+            dataset_file.save(update_fields=['profile'])
+            updated += 1
+            self.stdout.write(f'Perfil recalculado: {dataset_file.id} ({dataset_file.name})')
+
+        self.stdout.write(self.style.SUCCESS(f'{updated} perfiles recalculados'))
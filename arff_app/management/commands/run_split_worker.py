@@ -0,0 +1,47 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from arff_app.jobs import claim_next_job, run_split_job
+
+
+class Command(BaseCommand):
+    help = 'Procesar los trabajos de división en cola usando la base de datos como cola'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=2,
+                            help='Trabajos ejecutados en paralelo')
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help='Segundos de espera cuando no hay trabajos')
+        parser.add_argument('--once', action='store_true',
+                            help='Procesar los trabajos pendientes y terminar')
+
+    def handle(self, *args, **options):
+        threads = max(1, options['threads'])
+        self.stdout.write(f'Worker de divisiones iniciado ({threads} hilos)')
+
+        with ThreadPoolExecutor(max_workers=threads, thread_name_prefix='split-worker') as executor:
+            running = set()
+            while True:
+                running = {future for future in running if not future.done()}
+
+                job_id = claim_next_job() if len(running) < threads else None
+                if job_id is not None:
+                    self.stdout.write(f'Ejecutando trabajo {job_id}')
+                    running.add(executor.submit(self._run, job_id))
+                    continue
+
+                if options['once'] and not running:
+                    break
+                time.sleep(options['poll_interval'])
+
+        self.stdout.write(self.style.SUCCESS('Worker de divisiones detenido'))
+
+    @staticmethod
+    def _run(job_id):
+        close_old_connections()
+        try:
+            run_split_job(job_id)
+        finally:
+            close_old_connections()
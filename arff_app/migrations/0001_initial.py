@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:39
+
+import arff_app.models
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DatasetFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('file', models.FileField(upload_to=arff_app.models.dataset_upload_path)),
+                ('uploaded_at', models.DateTimeField(auto_now_add=True)),
+                ('file_size', models.BigIntegerField(blank=True, null=True)),
+                ('rows', models.IntegerField(blank=True, null=True)),
+                ('columns', models.IntegerField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-uploaded_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='DatasetSplit',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('stratify_column', models.CharField(blank=True, max_length=100, null=True)),
+                ('random_state', models.IntegerField(default=42)),
+                ('shuffle', models.BooleanField(default=True)),
+                ('train_file', models.FileField(blank=True, null=True, upload_to=arff_app.models.split_upload_path)),
+                ('validation_file', models.FileField(blank=True, null=True, upload_to=arff_app.models.split_upload_path)),
+                ('test_file', models.FileField(blank=True, null=True, upload_to=arff_app.models.split_upload_path)),
+                ('train_size', models.IntegerField()),
+                ('validation_size', models.IntegerField()),
+                ('test_size', models.IntegerField()),
+                ('distribution_plot', models.ImageField(blank=True, null=True, upload_to=arff_app.models.plot_upload_path)),
+                ('comparison_plot', models.ImageField(blank=True, null=True, upload_to=arff_app.models.plot_upload_path)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('dataset_file', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='arff_app.datasetfile')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
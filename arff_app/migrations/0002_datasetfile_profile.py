@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('arff_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='datasetfile',
+            name='profile',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:41
+
+import arff_app.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('arff_app', '0002_datasetfile_profile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='datasetsplit',
+            name='indices_file',
+            field=models.FileField(blank=True, null=True, upload_to=arff_app.models.split_upload_path),
+        ),
+        migrations.AddField(
+            model_name='datasetsplit',
+            name='storage_mode',
+            field=models.CharField(choices=[('files', 'Archivos ARFF'), ('indices', 'Índices de filas')], default='files', max_length=10),
+        ),
+    ]
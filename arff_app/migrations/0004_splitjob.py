@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('arff_app', '0003_datasetsplit_indices'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SplitJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('parameters', models.JSONField(default=dict)),
+                ('status', models.CharField(choices=[('queued', 'En cola'), ('running', 'En ejecución'), ('done', 'Completado'), ('failed', 'Fallido')], db_index=True, default='queued', max_length=10)),
+                ('progress', models.PositiveSmallIntegerField(default=0)),
+                ('message', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('dataset_file', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='arff_app.datasetfile')),
+                ('split', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='arff_app.datasetsplit')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
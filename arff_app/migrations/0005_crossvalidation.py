@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:48
+
+import arff_app.models
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('arff_app', '0004_splitjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CrossValidation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('method', models.CharField(choices=[('kfold', 'K-fold'), ('stratified_kfold', 'K-fold estratificado'), ('repeated_stratified_kfold', 'K-fold estratificado repetido')], default='stratified_kfold', max_length=30)),
+                ('n_splits', models.PositiveSmallIntegerField(default=5)),
+                ('n_repeats', models.PositiveSmallIntegerField(default=1)),
+                ('stratify_column', models.CharField(blank=True, max_length=100, null=True)),
+                ('random_state', models.IntegerField(default=42)),
+                ('shuffle', models.BooleanField(default=True)),
+                ('folds_file', models.FileField(blank=True, null=True, upload_to=arff_app.models.folds_upload_path)),
+                ('fold_sizes', models.JSONField(default=list)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('dataset_file', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='arff_app.datasetfile')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
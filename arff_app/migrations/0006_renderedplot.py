@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:49
+
+import arff_app.models
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('arff_app', '0005_crossvalidation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RenderedPlot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('column_name', models.CharField(max_length=255)),
+                ('kind', models.CharField(choices=[('column_distribution', 'Distribución de columna')], default='column_distribution', max_length=30)),
+                ('dpi', models.PositiveSmallIntegerField(default=150)),
+                ('width', models.FloatField(default=12)),
+                ('height', models.FloatField(default=6)),
+                ('image', models.ImageField(upload_to=arff_app.models.plot_upload_path)),
+                ('etag', models.CharField(max_length=64)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('dataset_file', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rendered_plots', to='arff_app.datasetfile')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('dataset_file', 'column_name', 'kind', 'dpi', 'width', 'height'), name='unique_rendered_plot')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('arff_app', '0006_renderedplot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='datasetsplit',
+            name='chart_data',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:57
+
+import arff_app.models
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('arff_app', '0007_datasetsplit_chart_data'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadSession',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=255)),
+                ('filename', models.CharField(max_length=255)),
+                ('total_size', models.BigIntegerField()),
+                ('chunk_size', models.PositiveIntegerField()),
+                ('total_chunks', models.PositiveIntegerField()),
+                ('status', models.CharField(choices=[('open', 'Abierta'), ('complete', 'Completada'), ('failed', 'Fallida')], default='open', max_length=10)),
+                ('message', models.TextField(blank=True, default='')),
+                ('relation', models.CharField(blank=True, max_length=255, null=True)),
+                ('attributes', models.JSONField(blank=True, null=True)),
+                ('validated_chunks', models.PositiveIntegerField(default=0)),
+                ('validated_rows', models.BigIntegerField(default=0)),
+                ('carry', models.BinaryField(default=b'')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('dataset_file', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='arff_app.datasetfile')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='UploadChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index', models.PositiveIntegerField()),
+                ('size', models.PositiveIntegerField()),
+                ('sha256', models.CharField(max_length=64)),
+                ('file', models.FileField(upload_to=arff_app.models.upload_chunk_path)),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='arff_app.uploadsession')),
+            ],
+            options={
+                'ordering': ['index'],
+                'constraints': [models.UniqueConstraint(fields=('session', 'index'), name='unique_upload_chunk')],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:05
+
+import arff_app.models
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('arff_app', '0009_contentblob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SplitArtifact',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('part', models.CharField(max_length=10)),
+                ('format', models.CharField(max_length=10)),
+                ('encoding', models.CharField(blank=True, default='', max_length=10)),
+                ('file', models.FileField(upload_to=arff_app.models.split_upload_path)),
+                ('size', models.BigIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('split', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='artifacts', to='arff_app.datasetsplit')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('split', 'part', 'format', 'encoding'), name='unique_split_artifact')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('arff_app', '0010_splitartifact'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contentblob',
+            name='sha256',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+    ]
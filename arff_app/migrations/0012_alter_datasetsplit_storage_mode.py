@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('arff_app', '0011_contentblob_sha256'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='datasetsplit',
+            name='storage_mode',
+            field=models.CharField(choices=[('files', 'Archivos ARFF'), ('indices', 'Índices de filas'), ('streaming', 'Archivos ARFF por streaming (sin cargar el dataset)')], default='files', max_length=10),
+        ),
+    ]
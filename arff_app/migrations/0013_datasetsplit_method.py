@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('arff_app', '0012_alter_datasetsplit_storage_mode'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='datasetsplit',
+            name='hash_columns',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='datasetsplit',
+            name='method',
+            field=models.CharField(choices=[('random', 'Aleatorio (semilla)'), ('hash', 'Hash de columnas clave (estable entre versiones)')], default='random', max_length=10),
+        ),
+    ]
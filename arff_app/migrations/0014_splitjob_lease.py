@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('arff_app', '0013_datasetsplit_method'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='splitjob',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='splitjob',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -15,19 +15,42 @@ def split_upload_path(instance, filename):
     filename = f"{uuid.uuid4()}.{ext}"
     return os.path.join('splits', filename)
 
+def upload_chunk_path(instance, filename):
+    """Path de una parte de una subida por bloques"""
+    return os.path.join('uploads', str(instance.session_id), f"{instance.index:06d}.part")
+
 def plot_upload_path(instance, filename):
     """Generar path único para gráficas"""
     ext = filename.split('.')[-1]
     filename = f"{uuid.uuid4()}.{ext}"
     return os.path.join('plots', filename)
 
+class ContentBlob(models.Model):
+    """
+    Archivo del storage compartido por varias filas.
+    key identifica el contenido: 'sha256:<hash>' para archivos subidos o un hash de
+    la procedencia (dataset + parámetros) para artefactos derivados.
+    """
+    key = models.CharField(max_length=100, unique=True)
+    path = models.CharField(max_length=255, unique=True)
+    size = models.BigIntegerField()
+    # SHA-256 del contenido (se calcula la primera vez que se sirve con ETag)
+    sha256 = models.CharField(max_length=64, blank=True, null=True)
+    ref_count = models.PositiveIntegerField(default=1)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"{self.key} ({self.ref_count} referencias)"
+
 class DatasetFile(models.Model):
     name = models.CharField(max_length=255)
     file = models.FileField(upload_to=dataset_upload_path, storage=default_storage)
+    content_hash = models.CharField(max_length=64, blank=True, null=True, db_index=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
     file_size = models.BigIntegerField(blank=True, null=True)
     rows = models.IntegerField(blank=True, null=True)
     columns = models.IntegerField(blank=True, null=True)
+    profile = models.JSONField(blank=True, null=True)
     
     class Meta:
         ordering = ['-uploaded_at']
@@ -35,29 +58,60 @@ class DatasetFile(models.Model):
     def __str__(self):
         return self.name
     
+    @property
+    def cache_key(self):
+        """Clave de las cachés de datos: los datasets con el mismo contenido la comparten"""
+        return self.content_hash or self.id
+    
     def save(self, *args, **kwargs):
         if self.file:
             self.file_size = self.file.size
         super().save(*args, **kwargs)
     
     def delete(self, *args, **kwargs):
-        # Eliminar archivo físico al eliminar el objeto
-        if self.file:
-            self.file.delete(save=False)
+        # Importaciones diferidas: columnar_cache carga NumPy y pandas
+        from .blobs import release_file
+        from .utils.columnar_cache import delete_columnar_cache
+        
+        # El archivo y su caché columnar solo se borran con la última referencia
+        if not self.file or release_file(self.file.name):
+            delete_columnar_cache(self.cache_key)
         super().delete(*args, **kwargs)
 
 class DatasetSplit(models.Model):
+    STORAGE_FILES = 'files'
+    STORAGE_INDICES = 'indices'
+    STORAGE_STREAMING = 'streaming'
+    STORAGE_MODE_CHOICES = [
+        (STORAGE_FILES, 'Archivos ARFF'),
+        (STORAGE_INDICES, 'Índices de filas'),
+        (STORAGE_STREAMING, 'Archivos ARFF por streaming (sin cargar el dataset)'),
+    ]
+    METHOD_RANDOM = 'random'
+    METHOD_HASH = 'hash'
+    METHOD_CHOICES = [
+        (METHOD_RANDOM, 'Aleatorio (semilla)'),
+        (METHOD_HASH, 'Hash de columnas clave (estable entre versiones)'),
+    ]
+    
     name = models.CharField(max_length=255)
     dataset_file = models.ForeignKey(DatasetFile, on_delete=models.CASCADE)
     stratify_column = models.CharField(max_length=100, blank=True, null=True)
     random_state = models.IntegerField(default=42)
     shuffle = models.BooleanField(default=True)
+    storage_mode = models.CharField(max_length=10, choices=STORAGE_MODE_CHOICES, default=STORAGE_FILES)
+    method = models.CharField(max_length=10, choices=METHOD_CHOICES, default=METHOD_RANDOM)
+    # Columnas clave del método 'hash' separadas por comas (vacío: todas)
+    hash_columns = models.CharField(max_length=255, blank=True, default='')
     
     # Archivos de splits
     train_file = models.FileField(upload_to=split_upload_path, storage=default_storage, blank=True, null=True)
     validation_file = models.FileField(upload_to=split_upload_path, storage=default_storage, blank=True, null=True)
     test_file = models.FileField(upload_to=split_upload_path, storage=default_storage, blank=True, null=True)
     
+    # Índices int32 (train, validation, test concatenados) en modo 'indices'
+    indices_file = models.FileField(upload_to=split_upload_path, storage=default_storage, blank=True, null=True)
+    
     # Tamaños
     train_size = models.IntegerField()
     validation_size = models.IntegerField()
@@ -67,6 +121,76 @@ class DatasetSplit(models.Model):
     distribution_plot = models.ImageField(upload_to=plot_upload_path, storage=default_storage, blank=True, null=True)
     comparison_plot = models.ImageField(upload_to=plot_upload_path, storage=default_storage, blank=True, null=True)
     
+    # Conteos por estrato para dibujar las gráficas en el navegador
+    chart_data = models.JSONField(blank=True, null=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.name} - {self.created_at}"
+    
+    # Los archivos se liberan en la señal post_delete (también en borrados en cascada)
+    ARTIFACT_FIELDS = [
+        'train_file',
+        'validation_file',
+        'test_file',
+        'indices_file',
+        'distribution_plot',
+        'comparison_plot'
+    ]
+
+class SplitArtifact(models.Model):
+    """Formato de descarga de una parte de un split, generado en la primera petición"""
+    split = models.ForeignKey(DatasetSplit, on_delete=models.CASCADE, related_name='artifacts')
+    part = models.CharField(max_length=10)
+    format = models.CharField(max_length=10)
+    # Content-Encoding negociado con Accept-Encoding ('' si el archivo se sirve tal cual)
+    encoding = models.CharField(max_length=10, blank=True, default='')
+    file = models.FileField(upload_to=split_upload_path, storage=default_storage)
+    size = models.BigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['split', 'part', 'format', 'encoding'], name='unique_split_artifact'),
+        ]
+    
+    def __str__(self):
+        return f"{self.split_id} - {self.part}.{self.format} {self.encoding}".strip()
+
+def folds_upload_path(instance, filename):
+    """Generar path único para asignaciones de folds"""
+    ext = filename.split('.')[-1]
+    filename = f"{uuid.uuid4()}.{ext}"
+    return os.path.join('folds', filename)
+
+class CrossValidation(models.Model):
+    METHOD_KFOLD = 'kfold'
+    METHOD_STRATIFIED_KFOLD = 'stratified_kfold'
+    METHOD_REPEATED_STRATIFIED_KFOLD = 'repeated_stratified_kfold'
+    METHOD_CHOICES = [
+        (METHOD_KFOLD, 'K-fold'),
+        (METHOD_STRATIFIED_KFOLD, 'K-fold estratificado'),
+        (METHOD_REPEATED_STRATIFIED_KFOLD, 'K-fold estratificado repetido'),
+    ]
+    
+    name = models.CharField(max_length=255)
+    dataset_file = models.ForeignKey(DatasetFile, on_delete=models.CASCADE)
+    method = models.CharField(max_length=30, choices=METHOD_CHOICES, default=METHOD_STRATIFIED_KFOLD)
+    n_splits = models.PositiveSmallIntegerField(default=5)
+    n_repeats = models.PositiveSmallIntegerField(default=1)
+    stratify_column = models.CharField(max_length=100, blank=True, null=True)
+    random_state = models.IntegerField(default=42)
+    shuffle = models.BooleanField(default=True)
+    
+    # Array int8 (n_repeats, filas) con el fold de cada fila; se borra en la señal
+    # post_delete (también en el borrado en cascada de su dataset)
+    folds_file = models.FileField(upload_to=folds_upload_path, storage=default_storage, blank=True, null=True)
+    fold_sizes = models.JSONField(default=list)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
@@ -74,19 +198,135 @@ class DatasetSplit(models.Model):
     
     def __str__(self):
         return f"{self.name} - {self.created_at}"
+
+class RenderedPlot(models.Model):
+    KIND_COLUMN_DISTRIBUTION = 'column_distribution'
+    KIND_CHOICES = [
+        (KIND_COLUMN_DISTRIBUTION, 'Distribución de columna'),
+    ]
+    
+    dataset_file = models.ForeignKey(DatasetFile, on_delete=models.CASCADE, related_name='rendered_plots')
+    column_name = models.CharField(max_length=255)
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES, default=KIND_COLUMN_DISTRIBUTION)
+    dpi = models.PositiveSmallIntegerField(default=150)
+    width = models.FloatField(default=12)
+    height = models.FloatField(default=6)
+    
+    image = models.ImageField(upload_to=plot_upload_path, storage=default_storage)
+    etag = models.CharField(max_length=64)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['dataset_file', 'column_name', 'kind', 'dpi', 'width', 'height'],
+                name='unique_rendered_plot'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.dataset_file_id} - {self.column_name} ({self.kind})"
+
+class SplitJob(models.Model):
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'En cola'),
+        (STATUS_RUNNING, 'En ejecución'),
+        (STATUS_DONE, 'Completado'),
+        (STATUS_FAILED, 'Fallido'),
+    ]
+    
+    dataset_file = models.ForeignKey(DatasetFile, on_delete=models.CASCADE)
+    parameters = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_QUEUED, db_index=True)
+    progress = models.PositiveSmallIntegerField(default=0)
+    message = models.TextField(blank=True, default='')
+    split = models.ForeignKey(DatasetSplit, on_delete=models.SET_NULL, blank=True, null=True)
+    
+    # Veces que se ha reclamado; heartbeat_at se renueva con cada avance y un trabajo
+    # 'running' sin avances durante SPLIT_JOB_LEASE_SECONDS se da por interrumpido
+    attempts = models.PositiveSmallIntegerField(default=0)
+    heartbeat_at = models.DateTimeField(blank=True, null=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"Job {self.id} - {self.status}"
+
+class UploadSession(models.Model):
+    STATUS_OPEN = 'open'
+    STATUS_COMPLETE = 'complete'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_OPEN, 'Abierta'),
+        (STATUS_COMPLETE, 'Completada'),
+        (STATUS_FAILED, 'Fallida'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    name = models.CharField(max_length=255)
+    filename = models.CharField(max_length=255)
+    total_size = models.BigIntegerField()
+    chunk_size = models.PositiveIntegerField()
+    total_chunks = models.PositiveIntegerField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_OPEN)
+    message = models.TextField(blank=True, default='')
+    
+    # Estado de la validación incremental (prefijo contiguo de partes ya validado)
+    relation = models.CharField(max_length=255, blank=True, null=True)
+    attributes = models.JSONField(blank=True, null=True)
+    validated_chunks = models.PositiveIntegerField(default=0)
+    validated_rows = models.BigIntegerField(default=0)
+    carry = models.BinaryField(default=b'')
+    
+    dataset_file = models.ForeignKey(DatasetFile, on_delete=models.SET_NULL, blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"Upload {self.id} - {self.filename} ({self.status})"
+    
+    def expected_chunk_size(self, index):
+        """Tamaño que debe tener la parte index (la última puede ser menor)"""
+        if index == self.total_chunks - 1:
+            return self.total_size - self.chunk_size * (self.total_chunks - 1)
+        return self.chunk_size
     
     def delete(self, *args, **kwargs):
-        # Eliminar archivos físicos al eliminar el objeto
-        files_to_delete = [
-            self.train_file,
-            self.validation_file,
-            self.test_file,
-            self.distribution_plot,
-            self.comparison_plot
+        # Eliminar las partes guardadas en el storage
+        for chunk in self.chunks.all():
+            chunk.delete()
+        super().delete(*args, **kwargs)
+
+class UploadChunk(models.Model):
+    session = models.ForeignKey(UploadSession, on_delete=models.CASCADE, related_name='chunks')
+    index = models.PositiveIntegerField()
+    size = models.PositiveIntegerField()
+    sha256 = models.CharField(max_length=64)
+    file = models.FileField(upload_to=upload_chunk_path, storage=default_storage)
+    received_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['index']
+        constraints = [
+            models.UniqueConstraint(fields=['session', 'index'], name='unique_upload_chunk'),
         ]
-        
-        for file_field in files_to_delete:
-            if file_field:
-                file_field.delete(save=False)
-        
-        super().delete(*args, **kwargs)
\ No newline at end of file
+    
+    def __str__(self):
+        return f"{self.session_id} - parte {self.index}"
+    
+    def delete(self, *args, **kwargs):
+        if self.file:
+            self.file.delete(save=False)
+        super().delete(*args, **kwargs)
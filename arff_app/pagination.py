@@ -0,0 +1,13 @@
+from rest_framework.pagination import CursorPagination
+
+
+class SplitCursorPagination(CursorPagination):
+    """Paginación por cursor: el coste de cada página no crece con el número de filas"""
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    ordering = ('-created_at', '-id')
+
+
+class DatasetCursorPagination(SplitCursorPagination):
+    ordering = ('-uploaded_at', '-id')
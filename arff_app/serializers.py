@@ -1,15 +1,26 @@
 from rest_framework import serializers
-from .models import DatasetFile, DatasetSplit
+from .models import CrossValidation, DatasetFile, DatasetSplit, SplitJob, UploadSession
 import os
 
-class DatasetFileSerializer(serializers.ModelSerializer):
+class DynamicFieldsMixin:
+    """Permite limitar los campos serializados: Serializer(obj, fields=['id', 'name'])"""
+    
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        
+        if fields:
+            for field_name in set(self.fields) - set(fields):
+                self.fields.pop(field_name)
+
+class DatasetFileSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     file_name = serializers.SerializerMethodField()
     file_type = serializers.SerializerMethodField()
     
     class Meta:
         model = DatasetFile
-        fields = '__all__'
-        read_only_fields = ['uploaded_at', 'file_size', 'rows', 'columns']
+        exclude = ['profile']
+        read_only_fields = ['uploaded_at', 'content_hash', 'file_size', 'rows', 'columns']
     
     def get_file_name(self, obj):
         return os.path.basename(obj.file.name)
@@ -23,7 +34,7 @@ class DatasetFileSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Solo se permiten archivos ARFF")
         return value
 
-class DatasetSplitSerializer(serializers.ModelSerializer):
+class DatasetSplitSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     dataset_file_name = serializers.SerializerMethodField()
     train_file_url = serializers.SerializerMethodField()
     validation_file_url = serializers.SerializerMethodField()
@@ -64,18 +75,114 @@ class DatasetSplitSerializer(serializers.ModelSerializer):
             return obj.comparison_plot.url
         return None
 
+class SplitJobSerializer(serializers.ModelSerializer):
+    split = DatasetSplitSerializer(read_only=True)
+    
+    class Meta:
+        model = SplitJob
+        fields = '__all__'
+
 class SplitDatasetSerializer(serializers.Serializer):
     dataset_file_id = serializers.IntegerField()
-    stratify_column = serializers.CharField(max_length=100, required=False)
+    stratify_column = serializers.CharField(
+        max_length=100, required=False, allow_null=True, allow_blank=True,
+        help_text="Una o varias columnas separadas por comas, p. ej. 'protocol_type,class'"
+    )
+    random_state = serializers.IntegerField(required=False, default=42)
+    shuffle = serializers.BooleanField(required=False, default=True)
+    generate_plots = serializers.BooleanField(required=False, default=False)
+    storage_mode = serializers.ChoiceField(
+        choices=[DatasetSplit.STORAGE_FILES, DatasetSplit.STORAGE_INDICES, DatasetSplit.STORAGE_STREAMING],
+        default=DatasetSplit.STORAGE_FILES,
+        help_text="'streaming' reparte las líneas del ARFF en dos pasadas sin cargar el dataset en memoria"
+    )
+    method = serializers.ChoiceField(
+        choices=[choice for choice, _ in DatasetSplit.METHOD_CHOICES],
+        default=DatasetSplit.METHOD_RANDOM,
+        help_text=(
+            "'hash' asigna cada fila por el hash de sus columnas clave: estable entre versiones "
+            "del dataset. Con stratify_column los tamaños por estrato son exactos, pero las filas "
+            "junto a los cortes pueden cambiar de conjunto entre versiones"
+        )
+    )
+    hash_columns = serializers.CharField(
+        max_length=255, required=False, allow_blank=True, default='',
+        help_text="Columnas clave del método 'hash' separadas por comas (vacío: todas)"
+    )
+
+class SplitConfigurationSerializer(serializers.Serializer):
+    stratify_column = serializers.CharField(max_length=100, required=False, allow_null=True, allow_blank=True)
+    random_state = serializers.IntegerField(required=False, default=42)
+    shuffle = serializers.BooleanField(required=False, default=True)
+    method = serializers.ChoiceField(
+        choices=[choice for choice, _ in DatasetSplit.METHOD_CHOICES],
+        default=DatasetSplit.METHOD_RANDOM
+    )
+    hash_columns = serializers.CharField(max_length=255, required=False, allow_blank=True, default='')
+
+class BatchSplitDatasetSerializer(serializers.Serializer):
+    dataset_file_id = serializers.IntegerField()
+    configurations = SplitConfigurationSerializer(many=True, allow_empty=False, max_length=100)
+    storage_mode = serializers.ChoiceField(
+        choices=[DatasetSplit.STORAGE_FILES, DatasetSplit.STORAGE_INDICES],
+        default=DatasetSplit.STORAGE_INDICES
+    )
+
+class CrossValidationSerializer(serializers.ModelSerializer):
+    dataset_file_name = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = CrossValidation
+        fields = '__all__'
+        read_only_fields = ['created_at', 'fold_sizes']
+    
+    def get_dataset_file_name(self, obj):
+        return obj.dataset_file.name
+
+class CreateCrossValidationSerializer(serializers.Serializer):
+    dataset_file_id = serializers.IntegerField()
+    method = serializers.ChoiceField(
+        choices=[choice for choice, _ in CrossValidation.METHOD_CHOICES],
+        default=CrossValidation.METHOD_STRATIFIED_KFOLD
+    )
+    n_splits = serializers.IntegerField(min_value=2, max_value=100, default=5)
+    n_repeats = serializers.IntegerField(min_value=1, max_value=100, default=1)
+    stratify_column = serializers.CharField(max_length=100, required=False, allow_null=True, allow_blank=True)
     random_state = serializers.IntegerField(required=False, default=42)
     shuffle = serializers.BooleanField(required=False, default=True)
-    generate_plots = serializers.BooleanField(required=False, default=True)
 
 class VisualizationSerializer(serializers.Serializer):
     dataset_file_id = serializers.IntegerField(required=False)
     split_id = serializers.IntegerField(required=False)
     column_name = serializers.CharField(max_length=100, required=False)
+    dpi = serializers.IntegerField(min_value=50, max_value=300, default=150)
+    width = serializers.FloatField(min_value=2, max_value=30, default=12)
+    height = serializers.FloatField(min_value=2, max_value=30, default=6)
     plot_type = serializers.ChoiceField(
         choices=['distribution', 'comparison', 'all'],
         default='all'
     )
+    output = serializers.ChoiceField(
+        choices=['data', 'png'],
+        default='data',
+        help_text="'data' devuelve los conteos en JSON; 'png' exporta la imagen renderizada"
+    )
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    received_chunks = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = UploadSession
+        exclude = ['carry', 'attributes']
+    
+    def get_received_chunks(self, obj):
+        return list(obj.chunks.values_list('index', flat=True))
+
+class CreateUploadSessionSerializer(serializers.Serializer):
+    filename = serializers.CharField(max_length=255)
+    name = serializers.CharField(max_length=255, required=False, allow_blank=True)
+    total_size = serializers.IntegerField(min_value=1)
+    chunk_size = serializers.IntegerField(min_value=1, required=False)
+
+class FinalizeUploadSerializer(serializers.Serializer):
+    sha256 = serializers.RegexField(r'^[0-9a-fA-F]{64}$', required=False)
@@ -0,0 +1,543 @@
+import functools
+import hashlib
+import numpy as np
+from django.core.files.base import ContentFile, File
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+
+from .blobs import acquire_blob, content_key, provenance_key, release_file
+from .instrumentation import timed
+from .models import (
+    ContentBlob,
+    CrossValidation,
+    DatasetFile,
+    DatasetSplit,
+    RenderedPlot,
+    plot_upload_path,
+    split_upload_path
+)
+from .utils.chart_data import column_chart_data, split_chart_data
+from .utils.columnar_cache import mmap_access_enabled, write_columnar_cache
+from .utils.dataframe_cache import dataframe_cache, get_dataset_frame
+from .utils.dataset_utils import (
+    compute_dataset_profile,
+    load_arff_dataframe,
+    route_arff_rows,
+    hash_split_indices,
+    train_val_test_split_indices,
+    split_indices_from_codes,
+    stratum_codes,
+    cross_validation_folds,
+    serialize_folds,
+    parse_stratify_columns,
+    save_dataframe_to_arff,
+    split_relation,
+    serialize_split_indices
+)
+from .utils.storage_utils import save_concurrently
+
+
+def _report(progress, percent, message):
+    """Notificar el avance si se proporcionó un callback"""
+    if progress is not None:
+        progress(percent, message)
+
+
+def create_dataset_file(name, file, df, content_hash=None):
+    """
+    Registrar un dataset ya parseado y validado.
+    Guarda su perfil, su caché columnar y lo deja en la caché en memoria.
+    """
+    dataset_file = DatasetFile.objects.create(
+        name=name,
+        file=file,
+        content_hash=content_hash,
+        rows=len(df),
+        columns=len(df.columns),
+        profile=compute_dataset_profile(df)
+    )
+
+    # Guardar columnas parseadas para no volver a leer el ARFF
+    write_columnar_cache(dataset_file.cache_key, df, dataset_file.file.name)
+    if not mmap_access_enabled():
+        # En modo mmap la primera lectura mapeará la caché columnar en lugar de
+        # retener esta copia privada
+        dataframe_cache.put((dataset_file.cache_key, dataset_file.file.name), df)
+    return dataset_file
+
+
+@timed('dataset.create')
+def create_dataset_from_content(name, digest, write, load):
+    """
+    Registrar un dataset identificado por el SHA-256 de su contenido.
+    Cada contenido se guarda una sola vez: si ya se había subido, el nuevo dataset
+    comparte el archivo, el perfil y la caché columnar sin volver a parsearlo.
+    write() guarda el archivo y devuelve su ruta; load(path) lo parsea.
+    """
+    path = acquire_blob(content_key(digest), write)
+
+    template = DatasetFile.objects.filter(content_hash=digest, profile__isnull=False).first()
+    if template is not None:
+        return DatasetFile.objects.create(
+            name=name,
+            file=path,
+            content_hash=digest,
+            rows=template.rows,
+            columns=template.columns,
+            profile=template.profile
+        )
+
+    try:
+        df = load(path)
+        return create_dataset_file(name, path, df, content_hash=digest)
+    except Exception:
+        release_file(path)
+        raise
+
+
+def _missing_columns(dataset_file, columns):
+    """
+    Columnas pedidas que no existen en el dataset.
+    Usa el perfil precalculado para no tener que cargar el archivo.
+    """
+    if dataset_file.profile:
+        available = dataset_file.profile['info']['basic_info']['columns']
+    else:
+        available = get_dataset_frame(dataset_file).columns
+    return [col for col in columns if col not in available]
+
+
+def validate_stratify_columns(dataset_file, stratify_column):
+    """Normalizar la columna de estratificación y comprobar que existe en el dataset"""
+    stratify_columns = parse_stratify_columns(stratify_column)
+    missing_columns = _missing_columns(dataset_file, stratify_columns)
+    if missing_columns:
+        raise ValueError(f'Columnas de estratificación inexistentes: {", ".join(missing_columns)}')
+
+    return ','.join(stratify_columns) or None
+
+
+def validate_hash_columns(dataset_file, hash_columns):
+    """Normalizar las columnas clave del split por hash ('' = todas) y comprobar que existen"""
+    key_columns = parse_stratify_columns(hash_columns)
+    missing_columns = _missing_columns(dataset_file, key_columns)
+    if missing_columns:
+        raise ValueError(f'Columnas clave inexistentes: {", ".join(missing_columns)}')
+
+    return ','.join(key_columns)
+
+
+# Versión del contenido de los archivos de un split. Se incrementa cuando cambia lo que
+# se escribe en ellos para no reutilizar blobs antiguos (2: @relation sin el nombre del split)
+SPLIT_ARTIFACT_VERSION = 2
+
+
+def split_provenance(dataset_file, stratify_column, random_state, shuffle, storage_mode=None,
+                     method=DatasetSplit.METHOD_RANDOM, hash_columns=''):
+    """
+    Datos que determinan por completo el resultado de un split.
+    El nombre del split no forma parte: sus archivos se comparten entre splits idénticos.
+    """
+    if method == DatasetSplit.METHOD_HASH:
+        # La semilla forma parte del hash aunque las filas no se mezclen
+        provenance = (dataset_file.cache_key, stratify_column or '', random_state, method, hash_columns or '')
+    else:
+        # Sin mezclar, la semilla no influye en el resultado
+        provenance = (dataset_file.cache_key, stratify_column or '', random_state if shuffle else None, shuffle)
+    provenance = (SPLIT_ARTIFACT_VERSION,) + provenance
+    # El split por streaming tiene las mismas filas en cada conjunto, pero copia las
+    # líneas originales en el orden del archivo: sus archivos no son intercambiables
+    if storage_mode == DatasetSplit.STORAGE_STREAMING:
+        provenance += ('streaming',)
+    return provenance
+
+
+def _artifact_key(provenance, field_name):
+    """Clave del blob de un archivo de un split"""
+    return provenance_key(f'split-{field_name}', *provenance)
+
+
+def _identical_splits(dataset_file, stratify_column, random_state, shuffle,
+                      method=DatasetSplit.METHOD_RANDOM, hash_columns=''):
+    """Splits ya creados con el mismo contenido y los mismos parámetros"""
+    splits = DatasetSplit.objects.filter(stratify_column=stratify_column, method=method)
+    if method == DatasetSplit.METHOD_HASH:
+        splits = splits.filter(hash_columns=hash_columns, random_state=random_state)
+    else:
+        splits = splits.filter(shuffle=shuffle)
+        if shuffle:
+            splits = splits.filter(random_state=random_state)
+    if dataset_file.content_hash:
+        return splits.filter(dataset_file__content_hash=dataset_file.content_hash)
+    return splits.filter(dataset_file=dataset_file)
+
+
+def find_existing_split(dataset_file, stratify_column=None, random_state=42, shuffle=True,
+                        generate_plots=False, storage_mode=DatasetSplit.STORAGE_FILES,
+                        method=DatasetSplit.METHOD_RANDOM, hash_columns=''):
+    """Split idéntico ya creado para este mismo dataset, o None"""
+    splits = _identical_splits(dataset_file, stratify_column, random_state, shuffle, method, hash_columns).filter(
+        dataset_file=dataset_file, storage_mode=storage_mode)
+    if generate_plots and stratify_column:
+        splits = splits.exclude(distribution_plot='').exclude(distribution_plot__isnull=True)
+    return splits.first()
+
+
+def _streaming_router(dataset_file, split_name, indices):
+    """
+    Segunda pasada del split por streaming: repartir las líneas del ARFF original en
+    tres archivos temporales. Se ejecuta una sola vez, antes de escribir en el storage.
+    """
+    @functools.cache
+    def routed():
+        train_idx, val_idx, test_idx = indices()
+        part_of_row = np.empty(len(train_idx) + len(val_idx) + len(test_idx), dtype=np.int8)
+        for position, idx in enumerate((train_idx, val_idx, test_idx)):
+            part_of_row[idx] = position
+        return route_arff_rows(dataset_file.file, part_of_row, ('train', 'validation', 'test'))
+    return routed
+
+
+def _split_part_writers(dataset_file, split_name, indices, storage_mode, routed=None):
+    """
+    Funciones que escriben cada archivo de un split y devuelven su ruta.
+    indices() y el DataFrame solo se calculan si hay que escribir algo.
+    En modo streaming se guardan los archivos que reparte routed().
+    """
+    if storage_mode == DatasetSplit.STORAGE_STREAMING:
+        def streamed_writer(position, suffix):
+            def write():
+                fh = routed()[position]
+                fh.seek(0)
+                filename = f"{split_name}_{suffix}.arff"
+                return default_storage.save(split_upload_path(None, filename), File(fh, name=filename))
+            return write
+
+        return {
+            'train_file': streamed_writer(0, 'train'),
+            'validation_file': streamed_writer(1, 'validation'),
+            'test_file': streamed_writer(2, 'test'),
+        }
+
+    if storage_mode == DatasetSplit.STORAGE_INDICES:
+        def write_indices():
+            content = ContentFile(serialize_split_indices(*indices()))
+            return default_storage.save(split_upload_path(None, f"{split_name}_indices.npy"), content)
+        return {'indices_file': write_indices}
+
+    def part_writer(position, suffix):
+        def write():
+            df = get_dataset_frame(dataset_file)
+            return save_dataframe_to_arff(
+                df, f"{split_name}_{suffix}", indices()[position], split_relation(df.attrs.get('relation'), suffix))
+        return write
+
+    return {
+        'train_file': part_writer(0, 'train'),
+        'validation_file': part_writer(1, 'validation'),
+        'test_file': part_writer(2, 'test'),
+    }
+
+
+@timed('storage.write_artifacts')
+def _acquire_artifacts(keys, writers, prepare=None):
+    """
+    Obtener los blobs de varios artefactos escribiendo a la vez solo los que faltan.
+    keys y writers van indexados igual: clave del blob y función que guarda el archivo.
+    Las escrituras van al pool del storage; la base de datos solo se usa en este hilo.
+    prepare() se llama antes de escribir si falta algún archivo.
+    """
+    existing = set(ContentBlob.objects.filter(key__in=set(keys.values())).values_list('key', flat=True))
+    missing = {}
+    for name, key in keys.items():
+        if key not in existing and key not in missing:
+            missing[key] = writers[name]
+
+    if missing and prepare is not None:
+        prepare()
+    written = save_concurrently(missing)
+
+    paths = {}
+    for name, key in keys.items():
+        paths[name] = acquire_blob(key, lambda key=key, name=name: written.pop(key, None) or writers[name]())
+
+    # Otra petición creó el mismo blob mientras se escribía: la copia propia sobra
+    for path in written.values():
+        default_storage.delete(path)
+    return paths
+
+
+@timed('split.create')
+def create_dataset_split(dataset_file, stratify_column=None, random_state=42, shuffle=True,
+                         generate_plots=False, storage_mode=DatasetSplit.STORAGE_FILES,
+                         method=DatasetSplit.METHOD_RANDOM, hash_columns='', progress=None):
+    """
+    Dividir un dataset y guardar sus archivos y gráficas.
+    Los archivos se guardan como blobs identificados por su procedencia: si el mismo
+    contenido ya se dividió con los mismos parámetros se reutilizan sin recalcular.
+    Los que faltan (splits y gráficas) se escriben a la vez.
+    progress(percent, message) se llama al terminar cada fase.
+    
+    Con storage_mode='streaming' el dataset nunca se carga entero: una primera pasada
+    lee solo las columnas de estratificación para asignar cada fila a su conjunto (el
+    mismo reparto exacto que en memoria, con la misma semilla) y una segunda copia cada
+    línea al archivo de su conjunto. La memoria depende del número de filas, no de su ancho.
+    
+    Con method='hash' el conjunto de cada fila depende del hash de sus columnas clave
+    (hash_columns, o todas) y la semilla: la misma fila cae en el mismo conjunto en
+    cualquier versión del dataset. Con estratificación cada estrato se ordena por hash y
+    se corta con el reparto exacto, a cambio de que las filas junto a los cortes puedan
+    cambiar de conjunto entre versiones (ver hash_split_indices). Las filas conservan
+    el orden del archivo.
+    """
+    streaming = storage_mode == DatasetSplit.STORAGE_STREAMING
+    hashed = method == DatasetSplit.METHOD_HASH
+    stratify_column = validate_stratify_columns(dataset_file, stratify_column)
+    if hashed:
+        hash_columns = validate_hash_columns(dataset_file, hash_columns)
+        shuffle = False
+    else:
+        hash_columns = ''
+    provenance = split_provenance(
+        dataset_file, stratify_column, random_state, shuffle, storage_mode, method, hash_columns)
+    template = _identical_splits(
+        dataset_file, stratify_column, random_state, shuffle, method, hash_columns).first()
+
+    @functools.cache
+    def strata():
+        if streaming:
+            _report(progress, 5, 'Contando filas por estrato')
+            columns = parse_stratify_columns(stratify_column)
+            if hashed:
+                # Sin columnas clave el hash usa todas: hay que leerlas todas
+                key_columns = parse_stratify_columns(hash_columns)
+                columns = list(dict.fromkeys(columns + key_columns)) if key_columns else None
+            return load_arff_dataframe(dataset_file.file, columns=columns)
+        _report(progress, 5, 'Cargando dataset')
+        return get_dataset_frame(dataset_file)
+
+    @functools.cache
+    def indices():
+        df = strata()
+        _report(progress, 20, 'Dividiendo dataset')
+        if hashed:
+            return hash_split_indices(df, key_columns=hash_columns, stratify=stratify_column, seed=random_state)
+        return train_val_test_split_indices(df, rstate=random_state, shuffle=shuffle, stratify=stratify_column)
+
+    if template is not None:
+        # Tamaños y conteos son idénticos: no hace falta cargar el dataset
+        _report(progress, 20, 'Reutilizando una división idéntica')
+        sizes = (template.train_size, template.validation_size, template.test_size)
+        chart_data = template.chart_data
+    else:
+        sizes = tuple(len(idx) for idx in indices())
+        chart_data = split_chart_data(strata(), stratify_column, indices()) if stratify_column else None
+
+    # Crear objeto DatasetSplit
+    split_name = f"{dataset_file.name}_split_{DatasetSplit.objects.count() + 1}"
+    dataset_split = DatasetSplit(
+        name=split_name,
+        dataset_file=dataset_file,
+        stratify_column=stratify_column,
+        random_state=random_state,
+        shuffle=shuffle,
+        storage_mode=storage_mode,
+        method=method,
+        hash_columns=hash_columns,
+        train_size=sizes[0],
+        validation_size=sizes[1],
+        test_size=sizes[2],
+        chart_data=chart_data
+    )
+
+    # Guardar splits como archivos ARFF o solo los índices (los ARFF se generan al descargar)
+    routed = _streaming_router(dataset_file, split_name, indices) if streaming else None
+    writers = _split_part_writers(dataset_file, split_name, indices, storage_mode, routed)
+
+    # Exportar gráficas PNG si se solicita (se dibujan a partir de los conteos por estrato)
+    if generate_plots and stratify_column:
+        # matplotlib solo se importa cuando se piden PNG
+        from .utils.visualization import create_comparison_plot, create_distribution_plot
+
+        def plot_writer(render, filename):
+            return lambda: default_storage.save(plot_upload_path(None, filename), render(chart_data))
+
+        writers['distribution_plot'] = plot_writer(create_distribution_plot, f"{split_name}_distribution.png")
+        writers['comparison_plot'] = plot_writer(create_comparison_plot, f"{split_name}_comparison.png")
+
+    keys = {field_name: _artifact_key(provenance, field_name) for field_name in writers}
+
+    # Los hilos de escritura comparten los índices (o las líneas ya repartidas): se
+    # calculan antes en este hilo
+    _report(progress, 40, 'Guardando archivos')
+    try:
+        for field_name, path in _acquire_artifacts(keys, writers, prepare=routed or indices).items():
+            setattr(dataset_split, field_name, path)
+    finally:
+        if routed is not None and routed.cache_info().currsize:
+            for fh in routed():
+                fh.close()
+
+    dataset_split.save()
+    _report(progress, 100, 'División completada')
+    return dataset_split
+
+
+def create_dataset_splits_batch(dataset_file, configurations, storage_mode=DatasetSplit.STORAGE_FILES):
+    """
+    Crear varios splits de un mismo dataset en una sola pasada.
+    El dataset se carga una vez, los códigos de estrato se calculan una vez por columna,
+    los archivos que aún no existen se escriben en paralelo y los DatasetSplit se
+    insertan con bulk_create.
+    """
+    configurations = [
+        dict(config, stratify_column=validate_stratify_columns(dataset_file, config.get('stratify_column')))
+        for config in configurations
+    ]
+    for config in configurations:
+        config.setdefault('method', DatasetSplit.METHOD_RANDOM)
+        if config['method'] == DatasetSplit.METHOD_HASH:
+            config['hash_columns'] = validate_hash_columns(dataset_file, config.get('hash_columns'))
+            config['shuffle'] = False
+        else:
+            config['hash_columns'] = ''
+
+    df = get_dataset_frame(dataset_file)
+
+    # Agrupación por estrato compartida entre todas las semillas
+    strata = {}
+    for config in configurations:
+        if config['method'] == DatasetSplit.METHOD_RANDOM and config['stratify_column'] not in strata:
+            strata[config['stratify_column']] = stratum_codes(df, config['stratify_column'])
+
+    base_number = DatasetSplit.objects.count()
+    planned = []
+    keys, writers = {}, {}
+    for position, config in enumerate(configurations):
+        if config['method'] == DatasetSplit.METHOD_HASH:
+            indices = hash_split_indices(
+                df, key_columns=config['hash_columns'], stratify=config['stratify_column'], seed=config['random_state'])
+        else:
+            codes, n_strata = strata[config['stratify_column']]
+            indices = split_indices_from_codes(
+                codes, n_strata, rstate=config['random_state'], shuffle=config['shuffle'])
+        split_name = f"{dataset_file.name}_split_{base_number + position + 1}"
+        provenance = split_provenance(
+            dataset_file, config['stratify_column'], config['random_state'], config['shuffle'],
+            storage_mode, config['method'], config['hash_columns'])
+        split_writers = _split_part_writers(dataset_file, split_name, lambda indices=indices: indices, storage_mode)
+        for field_name, write in split_writers.items():
+            keys[position, field_name] = _artifact_key(provenance, field_name)
+            writers[position, field_name] = write
+        planned.append((split_name, config, indices))
+
+    # Solo se escriben los archivos que no existen (una vez por clave), en paralelo
+    paths = _acquire_artifacts(keys, writers)
+
+    splits = []
+    for position, (split_name, config, indices) in enumerate(planned):
+        files = {field_name: path for (owner, field_name), path in paths.items() if owner == position}
+        splits.append(DatasetSplit(
+            name=split_name,
+            dataset_file=dataset_file,
+            stratify_column=config['stratify_column'],
+            random_state=config['random_state'],
+            shuffle=config['shuffle'],
+            storage_mode=storage_mode,
+            method=config['method'],
+            hash_columns=config['hash_columns'],
+            train_size=len(indices[0]),
+            validation_size=len(indices[1]),
+            test_size=len(indices[2]),
+            chart_data=split_chart_data(df, config['stratify_column'], indices) if config['stratify_column'] else None,
+            **files
+        ))
+
+    with transaction.atomic():
+        return DatasetSplit.objects.bulk_create(splits)
+
+
+def create_cross_validation(dataset_file, method=CrossValidation.METHOD_STRATIFIED_KFOLD, n_splits=5,
+                            n_repeats=1, stratify_column=None, random_state=42, shuffle=True):
+    """
+    Generar y guardar la asignación de folds de una validación cruzada.
+    Solo se guarda un int8 por fila y repetición; los folds se construyen al descargarlos.
+    """
+    stratify_column = validate_stratify_columns(dataset_file, stratify_column)
+
+    if method == CrossValidation.METHOD_KFOLD:
+        stratify_column = None
+        n_repeats = 1
+    elif not stratify_column:
+        raise ValueError('El K-fold estratificado requiere una columna de estratificación')
+    elif method == CrossValidation.METHOD_REPEATED_STRATIFIED_KFOLD:
+        # Sin mezclar todas las repeticiones serían idénticas
+        shuffle = True
+    else:
+        n_repeats = 1
+
+    df = get_dataset_frame(dataset_file)
+    folds = cross_validation_folds(
+        df, n_splits=n_splits, n_repeats=n_repeats, rstate=random_state, shuffle=shuffle, stratify=stratify_column)
+
+    name = f"{dataset_file.name}_cv_{CrossValidation.objects.count() + 1}"
+    cross_validation = CrossValidation(
+        name=name,
+        dataset_file=dataset_file,
+        method=method,
+        n_splits=n_splits,
+        n_repeats=n_repeats,
+        stratify_column=stratify_column,
+        random_state=random_state,
+        shuffle=shuffle,
+        fold_sizes=[np.bincount(repeat, minlength=n_splits).tolist() for repeat in folds]
+    )
+    cross_validation.folds_file.save(f"{name}_folds.npy", ContentFile(serialize_folds(folds)), save=False)
+    cross_validation.save()
+    return cross_validation
+
+
+def get_or_render_column_plot(dataset_file, column_name, dpi=150, width=12, height=6):
+    """
+    Obtener la gráfica de distribución de una columna desde la caché de gráficas.
+    Solo se renderiza con matplotlib la primera vez para cada contenido y combinación
+    de parámetros; los datasets con el mismo contenido comparten el PNG.
+    """
+    key = {
+        'dataset_file': dataset_file,
+        'column_name': column_name,
+        'kind': RenderedPlot.KIND_COLUMN_DISTRIBUTION,
+        'dpi': dpi,
+        'width': width,
+        'height': height,
+    }
+    plot = RenderedPlot.objects.filter(**key).first()
+    if plot is not None:
+        return plot
+
+    rendered = {}
+
+    def write():
+        from .utils.visualization import create_column_distribution_plot
+
+        chart = column_chart_data(get_dataset_frame(dataset_file), column_name)
+        content = create_column_distribution_plot(chart, dpi=dpi, figsize=(width, height)).getvalue()
+        rendered['etag'] = hashlib.sha256(content).hexdigest()
+        return default_storage.save(plot_upload_path(None, f"{column_name}_distribution.png"), ContentFile(content))
+
+    path = acquire_blob(
+        provenance_key('column-plot', dataset_file.cache_key, column_name, key['kind'], dpi, width, height), write)
+    etag = rendered.get('etag') or RenderedPlot.objects.filter(image=path).values_list('etag', flat=True).first()
+    if etag is None:
+        with default_storage.open(path, 'rb') as fh:
+            etag = hashlib.sha256(fh.read()).hexdigest()
+
+    plot = RenderedPlot(image=path, etag=etag, **key)
+    try:
+        with transaction.atomic():
+            plot.save()
+    except IntegrityError:
+        # Otra petición registró la misma gráfica a la vez: usar la suya
+        release_file(path)
+        plot = RenderedPlot.objects.get(**key)
+    return plot
@@ -0,0 +1,48 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .blobs import release_file
+from .models import CrossValidation, DatasetFile, DatasetSplit, RenderedPlot, SplitArtifact
+from .utils.dataframe_cache import dataframe_cache
+
+
+@receiver(post_save, sender=DatasetFile)
+@receiver(post_delete, sender=DatasetFile)
+def invalidate_dataframe_cache(sender, instance, update_fields=None, created=False, **kwargs):
+    """Descartar los DataFrames en memoria y las gráficas de un dataset modificado o eliminado"""
+    # Un dataset nuevo no tiene nada que invalidar (y puede compartir contenido con otro)
+    if created:
+        return
+    # Guardar solo metadatos (perfil, tamaños) no cambia los datos
+    if update_fields and 'file' not in update_fields:
+        return
+    dataframe_cache.invalidate(instance.cache_key)
+    
+    # En el borrado las gráficas se eliminan en cascada
+    if kwargs.get('signal') is post_save:
+        instance.rendered_plots.all().delete()
+
+
+@receiver(post_delete, sender=DatasetSplit)
+def release_split_files(sender, instance, **kwargs):
+    """Liberar los archivos de un split (también en el borrado en cascada de su dataset)"""
+    for field_name in DatasetSplit.ARTIFACT_FIELDS:
+        release_file(getattr(instance, field_name).name)
+
+
+@receiver(post_delete, sender=CrossValidation)
+def release_folds_file(sender, instance, **kwargs):
+    """Borrar la asignación de folds (también en el borrado en cascada de su dataset)"""
+    release_file(instance.folds_file.name)
+
+
+@receiver(post_delete, sender=RenderedPlot)
+def delete_rendered_plot_file(sender, instance, **kwargs):
+    """Liberar el PNG cacheado (el borrado en cascada no llama a Model.delete)"""
+    release_file(instance.image.name)
+
+
+@receiver(post_delete, sender=SplitArtifact)
+def release_split_artifact(sender, instance, **kwargs):
+    """Liberar el archivo de un formato de descarga (también en cascada)"""
+    release_file(instance.file.name)
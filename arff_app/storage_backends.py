@@ -0,0 +1,65 @@
+from django.core.files.base import File
+from django.core.files.storage import FileSystemStorage
+
+from .instrumentation import record_storage_bytes
+
+
+class CountingFile(File):
+    """
+    Envoltorio de un archivo del storage que anota los bytes que pasan por read().
+    chunks() e iteración usan read(), así que también cuentan; el resto de
+    atributos (content_type, temporary_file_path...) son los del archivo original.
+    """
+
+    def __init__(self, file, direction):
+        super().__init__(file, name=getattr(file, 'name', None))
+        self.direction = direction
+
+    def read(self, *args, **kwargs):
+        data = self.file.read(*args, **kwargs)
+        record_storage_bytes(self.direction, len(data))
+        return data
+
+    def __getattr__(self, name):
+        return getattr(self.file, name)
+
+
+class InstrumentedStorageMixin:
+    """Contar los bytes leídos y escritos a través del storage"""
+
+    def _open(self, name, mode='rb'):
+        return CountingFile(super()._open(name, mode), 'read')
+
+    def _save(self, name, content):
+        if hasattr(content, 'temporary_file_path'):
+            # FileSystemStorage mueve el temporal sin leerlo
+            record_storage_bytes('write', content.size)
+            return super()._save(name, content)
+        return super()._save(name, CountingFile(content, 'write'))
+
+
+class InstrumentedFileSystemStorage(InstrumentedStorageMixin, FileSystemStorage):
+    """Sistema de archivos local (desarrollo y pruebas)"""
+
+
+def _instrumented_s3_storage():
+    """
+    Clase del backend S3 o compatible (MinIO). django-storages carga boto3 (más de
+    100 ms), así que solo se importa cuando STORAGES selecciona este backend.
+    """
+    from storages.backends.s3 import S3Storage
+
+    class InstrumentedS3Storage(InstrumentedStorageMixin, S3Storage):
+        """S3 o compatible (MinIO)"""
+
+    InstrumentedS3Storage.__module__ = __name__
+    InstrumentedS3Storage.__qualname__ = 'InstrumentedS3Storage'
+    return InstrumentedS3Storage
+
+
+def __getattr__(name):
+    # import_string('arff_app.storage_backends.InstrumentedS3Storage') llega aquí
+    if name == 'InstrumentedS3Storage':
+        backend = globals()[name] = _instrumented_s3_storage()
+        return backend
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
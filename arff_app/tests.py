@@ -1,3 +1,837 @@
-from django.test import TestCase
+import gzip
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
+import numpy as np
+import pandas as pd
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
 
-# Create your tests here.
+from .instrumentation import Histogram
+from .jobs import claim_next_job, run_split_job
+from .models import ContentBlob, DatasetFile, DatasetSplit, SplitArtifact, SplitJob, UploadSession
+from .services import create_dataset_split
+from .utils.columnar_cache import delete_columnar_cache, read_columnar_cache, write_columnar_cache
+from .utils.dataframe_cache import dataframe_cache, dataframe_nbytes, get_dataset_frame
+from .utils.dataset_utils import (
+    SPLIT_FRACTIONS,
+    allocate_stratum_counts,
+    hash_split_indices,
+    iter_arff_chunks,
+    load_arff_dataframe,
+    stratum_codes,
+    train_val_test_split_indices
+)
+from .utils.export_formats import parquet_available
+
+PRECISION_ARFF = b"""@relation precision
+
+@attribute id INTEGER
+@attribute big INTEGER
+@attribute sparse INTEGER
+@attribute ratio REAL
+@attribute small REAL
+@attribute class {normal,attack}
+
+@data
+1,1379963888,16777217,0.123456789,0.5,normal
+2,-1379963888,?,16777217,1.25,attack
+3,0,7,1e-10,?,normal
+"""
+
+
+def make_arff(n_rows, seed=0, start_id=0):
+    """ARFF pequeño con una clase desbalanceada (70/20/10)"""
+    rng = np.random.default_rng(seed)
+    classes = rng.choice(['normal', 'dos', 'probe'], size=n_rows, p=[0.7, 0.2, 0.1])
+    lines = [
+        '@relation sample', '',
+        '@attribute id INTEGER',
+        '@attribute value REAL',
+        '@attribute class {normal,dos,probe}', '',
+        '@data'
+    ]
+    for i, label in enumerate(classes):
+        lines.append(f"{start_id + i},{rng.random():.6f},{label}")
+    return ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+def split_parts(df, indices):
+    """Conjunto (0, 1, 2) de cada id"""
+    return {
+        int(row_id): part
+        for part, positions in enumerate(indices)
+        for row_id in df['id'].to_numpy()[positions]
+    }
+
+
+class ArffPrecisionTests(TestCase):
+    """Parsear y volver a escribir un ARFF no cambia ningún valor"""
+
+    def round_trip(self, df):
+        return load_arff_dataframe(io.BytesIO(b''.join(iter_arff_chunks(df, 'precision'))))
+
+    def test_values_survive_round_trip(self):
+        df = load_arff_dataframe(io.BytesIO(PRECISION_ARFF))
+        again = self.round_trip(df)
+
+        self.assertEqual(df['big'].tolist(), [1379963888, -1379963888, 0])
+        self.assertEqual(df['ratio'].tolist(), [0.123456789, 16777217.0, 1e-10])
+        self.assertEqual(df['sparse'].tolist()[0], 16777217)
+        self.assertTrue(pd.isna(df['sparse'].iloc[1]))
+        for col in df.columns:
+            self.assertEqual(df[col].dtype, again[col].dtype, col)
+            pd.testing.assert_series_equal(df[col], again[col])
+
+    def test_narrow_dtypes_only_when_exact(self):
+        df = load_arff_dataframe(io.BytesIO(PRECISION_ARFF))
+
+        self.assertEqual(df['id'].dtype, np.int32)
+        self.assertEqual(df['sparse'].dtype, pd.Int32Dtype())
+        self.assertEqual(df['small'].dtype, np.float32)
+        self.assertEqual(df['ratio'].dtype, np.float64)
+
+    def test_integer_header_kept(self):
+        df = load_arff_dataframe(io.BytesIO(PRECISION_ARFF))
+        header = next(iter_arff_chunks(df, 'precision')).decode('utf-8')
+
+        self.assertIn('@attribute sparse INTEGER', header)
+        self.assertIn('@attribute big INTEGER', header)
+        self.assertIn('@attribute ratio REAL', header)
+
+    def test_string_and_date_types_kept(self):
+        arff = (
+            b"@relation eventos\n"
+            b"@attribute nota STRING\n"
+            b"@attribute dia DATE 'yyyy-MM-dd HH:mm:ss'\n"
+            b"@attribute iso DATE\n\n"
+            b"@data\n"
+            b"'uno',  '2024-01-02 10:00:00',2024-01-02T10:00:00\n"
+            b"'dos, tres','2024-03-04 11:30:00',?\n"
+        )
+        df = load_arff_dataframe(io.BytesIO(arff))
+        header = next(iter_arff_chunks(df.take([1, 0]), 'eventos')).decode('utf-8')
+        again = self.round_trip(df)
+
+        self.assertIn("@attribute nota STRING", header)
+        self.assertIn("@attribute dia DATE 'yyyy-MM-dd HH:mm:ss'", header)
+        self.assertIn("@attribute iso DATE\n", header)
+        self.assertEqual(again['dia'].tolist(), ['2024-01-02 10:00:00', '2024-03-04 11:30:00'])
+        for col in df.columns:
+            pd.testing.assert_series_equal(df[col], again[col])
+
+
+class ArffParserTests(TestCase):
+    """Filas de @data que el parser acepta y rechaza"""
+
+    HEADER = b"@relation r\n@attribute a REAL\n@attribute b REAL\n@attribute s STRING\n\n@data\n"
+
+    def load(self, data):
+        return load_arff_dataframe(io.BytesIO(self.HEADER + data))
+
+    def test_extra_values_are_rejected(self):
+        # Sin index_col=False pandas convertiría el primer valor en el índice
+        with self.assertRaisesRegex(ValueError, 'Línea 2 de @data: se esperaban 3 valores y hay 4'):
+            self.load(b"1,2,x\n1,2,3,x\n")
+
+    def test_missing_values_are_rejected(self):
+        with self.assertRaisesRegex(ValueError, 'Línea 3 de @data: se esperaban 3 valores y hay 2'):
+            self.load(b"1,2,x\n% comentario\n1,2\n")
+
+    def test_both_quote_styles(self):
+        df = self.load(b"1,2,\"it's, ok\"\n3,4,'say \"hi\"'\n5,6,'a, b'\n")
+
+        self.assertEqual(df['s'].tolist(), ["it's, ok", 'say "hi"', 'a, b'])
+        self.assertEqual(df['b'].tolist(), [2.0, 4.0, 6.0])
+
+    def test_sparse_rows_are_rejected(self):
+        with self.assertRaisesRegex(ValueError, 'disperso'):
+            self.load(b"{0 1,2 x}\n")
+
+
+class StratifiedSplitTests(TestCase):
+    """Tamaños y proporciones del split estratificado"""
+
+    def setUp(self):
+        self.df = load_arff_dataframe(io.BytesIO(make_arff(1003, seed=1)))
+
+    def test_sizes_and_proportions(self):
+        indices = train_val_test_split_indices(self.df, rstate=7, stratify='class')
+        codes, n_strata = stratum_codes(self.df, 'class')
+        expected = allocate_stratum_counts(np.bincount(codes, minlength=n_strata), SPLIT_FRACTIONS)
+
+        for part, positions in enumerate(indices):
+            counts = np.bincount(codes[positions], minlength=n_strata)
+            self.assertEqual(counts.tolist(), expected[:, part].tolist())
+            # Cada estrato se reparte 60/20/20 con como mucho una fila de diferencia
+            self.assertTrue(np.all(np.abs(counts - np.bincount(codes) * SPLIT_FRACTIONS[part]) < 1))
+
+        self.assertEqual(sum(len(positions) for positions in indices), len(self.df))
+        self.assertEqual(len(np.unique(np.concatenate(indices))), len(self.df))
+
+    def test_same_seed_same_split(self):
+        first = train_val_test_split_indices(self.df, rstate=7, stratify='class')
+        second = train_val_test_split_indices(self.df, rstate=7, stratify='class')
+
+        for a, b in zip(first, second):
+            np.testing.assert_array_equal(a, b)
+
+
+class HashSplitTests(TestCase):
+    """El split por hash no depende de las demás filas del dataset"""
+
+    def setUp(self):
+        self.v1 = load_arff_dataframe(io.BytesIO(make_arff(3000, seed=2)))
+        # Segunda versión: sin las primeras 500 filas, con 500 nuevas y en otro orden
+        added = load_arff_dataframe(io.BytesIO(make_arff(500, seed=3, start_id=3000)))
+        v2 = pd.concat([self.v1.iloc[500:], added], ignore_index=True)
+        self.v2 = v2.iloc[np.random.default_rng(4).permutation(len(v2))].reset_index(drop=True)
+
+    def test_rows_keep_their_part_across_versions(self):
+        before = split_parts(self.v1, hash_split_indices(self.v1, key_columns='id', seed=5))
+        after = split_parts(self.v2, hash_split_indices(self.v2, key_columns='id', seed=5))
+
+        common = before.keys() & after.keys()
+        self.assertEqual(len(common), 2500)
+        self.assertTrue(all(before[row_id] == after[row_id] for row_id in common))
+
+    def test_independent_of_chunks_and_workers(self):
+        serial = hash_split_indices(self.v1, seed=5, chunk_rows=len(self.v1), workers=1)
+        parallel = hash_split_indices(self.v1, seed=5, chunk_rows=256, workers=4)
+
+        for a, b in zip(serial, parallel):
+            np.testing.assert_array_equal(a, b)
+
+    def test_stratified_sizes_are_exact(self):
+        indices = hash_split_indices(self.v1, key_columns='id', stratify='class', seed=5)
+        codes, n_strata = stratum_codes(self.v1, 'class')
+        expected = allocate_stratum_counts(np.bincount(codes, minlength=n_strata), SPLIT_FRACTIONS)
+
+        for part, positions in enumerate(indices):
+            self.assertEqual(np.bincount(codes[positions], minlength=n_strata).tolist(), expected[:, part].tolist())
+
+    def test_stratified_rows_mostly_keep_their_part(self):
+        before = split_parts(self.v1, hash_split_indices(self.v1, key_columns='id', stratify='class', seed=5))
+        after = split_parts(self.v2, hash_split_indices(self.v2, key_columns='id', stratify='class', seed=5))
+
+        # Coste documentado de los tamaños exactos: las filas junto a los cortes de cada
+        # estrato pasan al conjunto vecino (aquí cambia un tercio de las filas)
+        common = before.keys() & after.keys()
+        moved = [(before[row_id], after[row_id]) for row_id in common if before[row_id] != after[row_id]]
+        self.assertLess(len(moved), len(common) * 0.05)
+        self.assertTrue(all(abs(old - new) == 1 for old, new in moved))
+
+
+class MediaTestCase(TestCase):
+    """Pruebas de la API que escriben en un MEDIA_ROOT temporal"""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root, SECURE_SSL_REDIRECT=False)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        dataframe_cache.clear()
+
+    def upload(self, name, content):
+        response = self.client.post(
+            reverse('upload-dataset'), {'file': SimpleUploadedFile(name, content), 'name': name})
+        self.assertEqual(response.status_code, 201, response.json())
+        return DatasetFile.objects.get(id=response.json()['dataset']['id'])
+
+
+class BlobTests(MediaTestCase):
+    """Un mismo contenido se guarda una sola vez y se borra con su última referencia"""
+
+    def test_same_content_is_stored_once(self):
+        content = make_arff(200)
+        first = self.upload('a.arff', content)
+        second = self.upload('b.arff', content)
+
+        self.assertEqual(first.file.name, second.file.name)
+        blob = ContentBlob.objects.get(path=first.file.name)
+        self.assertEqual(blob.ref_count, 2)
+        self.assertEqual(blob.sha256, hashlib.sha256(content).hexdigest())
+
+    def test_file_deleted_with_last_reference(self):
+        content = make_arff(200)
+        first = self.upload('a.arff', content)
+        second = self.upload('b.arff', content)
+        path = first.file.name
+
+        first.delete()
+        self.assertTrue(default_storage.exists(path))
+        self.assertEqual(ContentBlob.objects.get(path=path).ref_count, 1)
+
+        second.delete()
+        self.assertFalse(default_storage.exists(path))
+        self.assertFalse(ContentBlob.objects.filter(path=path).exists())
+
+
+@override_settings(UPLOAD_CHUNK_SIZE=64 * 1024)
+class ChunkedUploadTests(MediaTestCase):
+    """Subida por bloques que se reanuda tras una parte fallida"""
+
+    def put_chunk(self, upload_id, index, data, checksum=None):
+        headers = {'HTTP_X_CHUNK_SHA256': checksum} if checksum else {}
+        return self.client.put(
+            reverse('upload-chunk', args=[upload_id, index]), data,
+            content_type='application/octet-stream', **headers)
+
+    def test_resume_after_failed_chunk(self):
+        content = make_arff(12000)
+        response = self.client.post(
+            reverse('create-upload'), {'filename': 'big.arff', 'total_size': len(content)},
+            content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        upload = response.json()['upload']
+        chunk_size = upload['chunk_size']
+        chunks = [content[i:i + chunk_size] for i in range(0, len(content), chunk_size)]
+        self.assertGreater(len(chunks), 2)
+
+        # La segunda parte llega corrupta: se rechaza sin cerrar la subida
+        self.assertEqual(self.put_chunk(upload['id'], 0, chunks[0]).status_code, 200)
+        corrupted = b'x' + chunks[1][1:]
+        response = self.put_chunk(upload['id'], 1, corrupted, hashlib.sha256(chunks[1]).hexdigest())
+        self.assertEqual(response.status_code, 400)
+
+        # Reanudar: el estado indica qué partes faltan y se envían solo esas
+        status = self.client.get(reverse('upload-status', args=[upload['id']])).json()['upload']
+        self.assertEqual(status['status'], UploadSession.STATUS_OPEN)
+        self.assertEqual(status['received_chunks'], [0])
+        for index in range(1, len(chunks)):
+            response = self.put_chunk(upload['id'], index, chunks[index], hashlib.sha256(chunks[index]).hexdigest())
+            self.assertEqual(response.status_code, 200, response.json())
+        # Reenviar una parte ya recibida no cambia nada
+        self.assertEqual(self.put_chunk(upload['id'], 0, chunks[0]).status_code, 200)
+
+        response = self.client.post(
+            reverse('finalize-upload', args=[upload['id']]), {'sha256': hashlib.sha256(content).hexdigest()},
+            content_type='application/json')
+        self.assertEqual(response.status_code, 201, response.json())
+
+        dataset_file = DatasetFile.objects.get(id=response.json()['dataset']['id'])
+        self.assertEqual(dataset_file.rows, 12000)
+        with default_storage.open(dataset_file.file.name, 'rb') as fh:
+            self.assertEqual(fh.read(), content)
+
+        # Un reintento del cierre devuelve el mismo dataset sin crear otro
+        response = self.client.post(
+            reverse('finalize-upload', args=[upload['id']]), {}, content_type='application/json')
+        self.assertEqual(response.status_code, 201, response.json())
+        self.assertEqual(response.json()['dataset']['id'], dataset_file.id)
+        self.assertEqual(DatasetFile.objects.count(), 1)
+
+    def test_wrong_checksum_fails_the_upload(self):
+        content = make_arff(100)
+        response = self.client.post(
+            reverse('create-upload'), {'filename': 'a.arff', 'total_size': len(content)},
+            content_type='application/json')
+        upload_id = response.json()['upload']['id']
+        self.assertEqual(self.put_chunk(upload_id, 0, content).status_code, 200)
+
+        url = reverse('finalize-upload', args=[upload_id])
+        response = self.client.post(url, {'sha256': '0' * 64}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(UploadSession.objects.get(id=upload_id).status, UploadSession.STATUS_FAILED)
+        self.assertFalse(DatasetFile.objects.exists())
+        self.assertEqual(self.client.post(url, {}, content_type='application/json').status_code, 400)
+
+
+@override_settings(SPLIT_JOB_THREADS=0, SPLIT_JOB_LEASE_SECONDS=60, SPLIT_JOB_MAX_ATTEMPTS=2)
+class SplitJobTests(MediaTestCase):
+    """Ciclo de vida de los trabajos de división (sin pool: se ejecutan como el worker)"""
+
+    def enqueue(self, dataset_file, **parameters):
+        response = self.client.post(
+            reverse('split-dataset'), {'dataset_file_id': dataset_file.id, **parameters},
+            content_type='application/json')
+        self.assertEqual(response.status_code, 202, response.json())
+        return response.json()['job']['id']
+
+    def job_status(self, job_id):
+        return self.client.get(reverse('split-job-status', args=[job_id])).json()['job']
+
+    def expire(self, job_id):
+        SplitJob.objects.filter(id=job_id).update(heartbeat_at=timezone.now() - timedelta(seconds=120))
+
+    def test_queued_job_runs_to_completion(self):
+        dataset_file = self.upload('a.arff', make_arff(500))
+        job_id = self.enqueue(dataset_file, stratify_column='class', storage_mode='indices')
+        self.assertEqual(self.job_status(job_id)['status'], SplitJob.STATUS_QUEUED)
+
+        self.assertEqual(claim_next_job(), job_id)
+        self.assertIsNone(claim_next_job())
+        run_split_job(job_id)
+
+        job = self.job_status(job_id)
+        self.assertEqual(job['status'], SplitJob.STATUS_DONE)
+        self.assertEqual(job['progress'], 100)
+        self.assertEqual(job['attempts'], 1)
+        sizes = (job['split']['train_size'], job['split']['validation_size'], job['split']['test_size'])
+        self.assertEqual(sum(sizes), 500)
+        self.assertAlmostEqual(sizes[0], 300, delta=2)
+
+    def test_failed_job_reports_error(self):
+        dataset_file = self.upload('a.arff', make_arff(100))
+        job_id = self.enqueue(dataset_file)
+        # El archivo desaparece antes de que el trabajo se ejecute
+        default_storage.delete(dataset_file.file.name)
+        dataframe_cache.clear()
+        DatasetFile.objects.filter(id=dataset_file.id).update(file='datasets/missing.arff')
+
+        self.assertEqual(claim_next_job(), job_id)
+        run_split_job(job_id)
+
+        job = self.job_status(job_id)
+        self.assertEqual(job['status'], SplitJob.STATUS_FAILED)
+        self.assertIn('Error al dividir el dataset', job['message'])
+
+    def test_interrupted_job_is_reclaimed(self):
+        dataset_file = self.upload('a.arff', make_arff(100))
+        job_id = self.enqueue(dataset_file)
+        self.assertEqual(claim_next_job(), job_id)
+
+        # Dentro del plazo nadie más puede reclamarlo
+        self.assertIsNone(claim_next_job())
+
+        # El proceso que lo ejecutaba murió: vuelve a la cola y se reclama de nuevo
+        self.expire(job_id)
+        self.assertEqual(claim_next_job(), job_id)
+        self.assertEqual(SplitJob.objects.get(id=job_id).attempts, 2)
+
+        # Agotados los intentos se marca como fallido
+        self.expire(job_id)
+        self.assertIsNone(claim_next_job())
+        job = self.job_status(job_id)
+        self.assertEqual(job['status'], SplitJob.STATUS_FAILED)
+        self.assertIn('interrumpió', job['message'])
+
+
+def response_body(response):
+    return b''.join(response.streaming_content) if response.streaming else response.content
+
+
+class DownloadConditionalTests(MediaTestCase):
+    """ETag, 304, Range e If-Range de las descargas en los dos modos de almacenamiento"""
+
+    def setUp(self):
+        super().setUp()
+        dataset_file = self.upload('a.arff', make_arff(300))
+        self.files_split = create_dataset_split(dataset_file, storage_mode=DatasetSplit.STORAGE_FILES)
+        self.indices_split = create_dataset_split(dataset_file, storage_mode=DatasetSplit.STORAGE_INDICES)
+
+    def url(self, dataset_split, fmt='arff'):
+        return reverse('download-split-file', args=[dataset_split.id, 'train']) + f'?format={fmt}'
+
+    def test_stored_arff(self):
+        url = self.url(self.files_split)
+        response = self.client.get(url)
+        body = response_body(response)
+        etag = response['ETag']
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(etag.startswith('W/'))
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        response = self.client.get(url, HTTP_RANGE='bytes=10-29', HTTP_IF_RANGE=etag)
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 10-29/{len(body)}')
+        self.assertEqual(response_body(response), body[10:30])
+
+        # Otra versión: If-Range no coincide y se envía el archivo completo
+        response = self.client.get(url, HTTP_RANGE='bytes=10-29', HTTP_IF_RANGE='"otra"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response_body(response), body)
+
+    def test_indices_arff_is_never_stored(self):
+        url = self.url(self.indices_split)
+        blobs = ContentBlob.objects.count()
+
+        response = self.client.head(url)
+        etag = response['ETag']
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(etag.startswith('W/'))
+        self.assertNotIn('Content-Length', response)
+
+        response = self.client.get(url)
+        body = response_body(response)
+        self.assertEqual(response['ETag'], etag)
+        self.assertTrue(body.startswith(b'@relation sample_train'))
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        response = self.client.get(url, HTTP_RANGE='bytes=10-29')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response_body(response), body[10:30])
+
+        # Un ETag débil no sirve para If-Range
+        response = self.client.get(url, HTTP_RANGE='bytes=10-29', HTTP_IF_RANGE=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response_body(response), body)
+
+        self.assertFalse(SplitArtifact.objects.exists())
+        self.assertEqual(ContentBlob.objects.count(), blobs)
+
+    def test_derived_format_stored_after_full_get(self):
+        url = self.url(self.indices_split, 'csv.gz')
+
+        self.assertEqual(self.client.head(url).status_code, 200)
+        response = self.client.get(url, HTTP_RANGE='bytes=0-9')
+        self.assertEqual(response.status_code, 206)
+        self.assertFalse(SplitArtifact.objects.exists())
+
+        body = response_body(self.client.get(url))
+        artifact = SplitArtifact.objects.get()
+        self.assertEqual(artifact.size, len(body))
+
+        # Ya guardado: ETag fuerte y tamaño conocido
+        response = self.client.head(url)
+        self.assertFalse(response['ETag'].startswith('W/'))
+        self.assertEqual(int(response['Content-Length']), len(body))
+        response = self.client.get(url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=response['ETag'])
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response_body(response), body[:10])
+
+
+class DownloadFormatTests(MediaTestCase):
+    """Todos los formatos de descarga contienen las mismas filas en los dos modos"""
+
+    def setUp(self):
+        super().setUp()
+        # Un valor nominal ausente para comprobar cómo se exporta
+        content = make_arff(300).replace(b',dos\n', b',?\n', 1)
+        dataset_file = self.upload('a.arff', content)
+        self.splits = [
+            create_dataset_split(dataset_file, storage_mode=DatasetSplit.STORAGE_FILES),
+            create_dataset_split(dataset_file, storage_mode=DatasetSplit.STORAGE_INDICES),
+        ]
+
+    def download(self, dataset_split, part, fmt, **headers):
+        url = reverse('download-split-file', args=[dataset_split.id, part]) + f'?format={fmt}'
+        response = self.client.get(url, **headers)
+        self.assertEqual(response.status_code, 200, fmt)
+        return response, response_body(response)
+
+    def test_formats_match_arff(self):
+        for dataset_split in self.splits:
+            for part in ('train', 'validation', 'test'):
+                _, arff = self.download(dataset_split, part, 'arff')
+                expected = load_arff_dataframe(io.BytesIO(arff))
+
+                response, body = self.download(dataset_split, part, 'arff', HTTP_ACCEPT_ENCODING='gzip')
+                self.assertEqual(response['Content-Encoding'], 'gzip')
+                self.assertEqual(gzip.decompress(body), arff)
+
+                _, body = self.download(dataset_split, part, 'arff.gz')
+                self.assertEqual(gzip.decompress(body), arff)
+
+                _, body = self.download(dataset_split, part, 'csv.gz')
+                csv = pd.read_csv(io.BytesIO(gzip.decompress(body)))
+                self.assertEqual(csv['id'].tolist(), expected['id'].tolist())
+                self.assertEqual(csv['class'].fillna('?').tolist(), expected['class'].astype(object).fillna('?').tolist())
+
+                _, body = self.download(dataset_split, part, 'npz')
+                with np.load(io.BytesIO(body), allow_pickle=False) as arrays:
+                    np.testing.assert_array_equal(arrays['id'], expected['id'].to_numpy())
+                    np.testing.assert_array_equal(arrays['value'], expected['value'].to_numpy())
+                    self.assertEqual(arrays['class'].tolist(), expected['class'].astype(object).fillna('?').tolist())
+
+                if parquet_available():
+                    _, body = self.download(dataset_split, part, 'parquet')
+                    parquet = pd.read_parquet(io.BytesIO(body))
+                    self.assertEqual(parquet['id'].tolist(), expected['id'].tolist())
+
+    def test_missing_nominal_exported_as_question_mark(self):
+        found = []
+        for part in ('train', 'validation', 'test'):
+            _, body = self.download(self.splits[1], part, 'npz')
+            with np.load(io.BytesIO(body), allow_pickle=False) as arrays:
+                found.extend(arrays['class'].tolist())
+
+        self.assertEqual(found.count('?'), 1)
+        self.assertNotIn('nan', found)
+
+
+class StreamingSplitTests(MediaTestCase):
+    """El split por streaming reparte las mismas filas que los otros modos"""
+
+    def part_ids(self, dataset_split):
+        parts = []
+        for part in ('train', 'validation', 'test'):
+            url = reverse('download-split-file', args=[dataset_split.id, part])
+            df = load_arff_dataframe(io.BytesIO(response_body(self.client.get(url))))
+            parts.append(df['id'].tolist())
+        return parts
+
+    def test_same_rows_as_other_modes(self):
+        # Comentarios y líneas vacías en @data no cuentan como filas
+        content = make_arff(1000).replace(b'@data\n', b'@data\n% inicio\n\n', 1)
+        dataset_file = self.upload('a.arff', content)
+
+        variants = [
+            {},
+            {'stratify_column': 'class'},
+            {'method': DatasetSplit.METHOD_HASH, 'stratify_column': 'class'},
+        ]
+        for options in variants:
+            streamed = self.part_ids(create_dataset_split(
+                dataset_file, storage_mode=DatasetSplit.STORAGE_STREAMING, **options))
+            # Copia las líneas en el orden del archivo
+            self.assertTrue(all(ids == sorted(ids) for ids in streamed), options)
+            for mode in (DatasetSplit.STORAGE_FILES, DatasetSplit.STORAGE_INDICES):
+                expected = self.part_ids(create_dataset_split(dataset_file, storage_mode=mode, **options))
+                self.assertEqual(streamed, [sorted(ids) for ids in expected], (mode, options))
+
+
+class ListingTests(MediaTestCase):
+    """Paginación por cursor, filtros y ?fields= de los listados"""
+
+    def setUp(self):
+        super().setUp()
+        content = make_arff(50)
+        self.datasets = [self.upload(f'd{i}.arff', content) for i in range(5)]
+
+    def test_cursor_pagination_visits_every_dataset_once(self):
+        url = reverse('list-datasets') + '?page_size=2'
+        ids, sizes = [], []
+        while url:
+            data = self.client.get(url).json()
+            ids.extend(item['id'] for item in data['datasets'])
+            sizes.append(data['page_size'])
+            url = data['next']
+
+        self.assertEqual(ids, [dataset.id for dataset in reversed(self.datasets)])
+        self.assertEqual(sizes, [2, 2, 1])
+
+    def test_fields_and_filters(self):
+        data = self.client.get(reverse('list-datasets') + '?fields=id,name&name=d3').json()
+        self.assertEqual(data['datasets'], [{'id': self.datasets[3].id, 'name': 'd3.arff'}])
+
+        create_dataset_split(self.datasets[0], storage_mode=DatasetSplit.STORAGE_INDICES)
+        create_dataset_split(self.datasets[1])
+        url = reverse('list-splits') + f'?dataset={self.datasets[0].id}&fields=id,storage_mode'
+        data = self.client.get(url).json()
+        self.assertEqual(data['page_size'], 1)
+        self.assertEqual(set(data['splits'][0]), {'id', 'storage_mode'})
+        self.assertEqual(data['splits'][0]['storage_mode'], DatasetSplit.STORAGE_INDICES)
+
+        response = self.client.get(reverse('list-splits') + '?created_after=ayer')
+        self.assertEqual(response.status_code, 400)
+
+
+class CrossValidationTests(MediaTestCase):
+    """Tamaños de los folds y descargas de cada fold"""
+
+    def setUp(self):
+        super().setUp()
+        self.dataset_file = self.upload('a.arff', make_arff(503))
+        self.df = load_arff_dataframe(io.BytesIO(make_arff(503)))
+
+    def create(self, **parameters):
+        response = self.client.post(
+            reverse('create-cross-validation'), {'dataset_file_id': self.dataset_file.id, **parameters},
+            content_type='application/json')
+        self.assertEqual(response.status_code, 201, response.json())
+        return response.json()['cross_validation']
+
+    def fold_ids(self, cv_id, repeat, fold, file_type):
+        url = reverse('download-fold-file', args=[cv_id, repeat, fold, file_type])
+        df = load_arff_dataframe(io.BytesIO(response_body(self.client.get(url))))
+        return df['id'].tolist()
+
+    def test_fold_sizes(self):
+        cross_validation = self.create(method='repeated_stratified_kfold', n_splits=5, n_repeats=2,
+                                       stratify_column='class')
+
+        self.assertEqual(len(cross_validation['fold_sizes']), 2)
+        for sizes in cross_validation['fold_sizes']:
+            self.assertEqual(sum(sizes), 503)
+            self.assertLessEqual(max(sizes) - min(sizes), 1)
+
+    def test_fold_downloads_partition_the_dataset(self):
+        cross_validation = self.create(method='stratified_kfold', n_splits=4, stratify_column='class')
+        all_ids = set(self.df['id'].tolist())
+        counts = self.df['class'].value_counts()
+
+        seen = []
+        for fold in range(4):
+            test_ids = self.fold_ids(cross_validation['id'], 0, fold, 'test')
+            train_ids = self.fold_ids(cross_validation['id'], 0, fold, 'train')
+            self.assertEqual(len(test_ids), cross_validation['fold_sizes'][0][fold])
+            self.assertEqual(set(train_ids), all_ids - set(test_ids))
+            # Cada fold conserva la proporción de cada clase (±1 fila)
+            classes = self.df.set_index('id').loc[test_ids, 'class'].value_counts()
+            for label, total in counts.items():
+                self.assertLessEqual(abs(classes.get(label, 0) - total / 4), 1, label)
+            seen.extend(test_ids)
+
+        self.assertEqual(sorted(seen), sorted(all_ids))
+
+    def test_invalid_fold(self):
+        cross_validation = self.create(method='kfold', n_splits=3)
+        url = reverse('download-fold-file', args=[cross_validation['id'], 0, 3, 'test'])
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+
+class BatchSplitTests(MediaTestCase):
+    """Varios splits de un dataset en una sola petición"""
+
+    def setUp(self):
+        super().setUp()
+        self.dataset_file = self.upload('a.arff', make_arff(400))
+        self.df = load_arff_dataframe(io.BytesIO(make_arff(400)))
+
+    def batch(self, configurations, **parameters):
+        return self.client.post(
+            reverse('split-dataset-batch'),
+            {'dataset_file_id': self.dataset_file.id, 'configurations': configurations, **parameters},
+            content_type='application/json')
+
+    def part_ids(self, split_id):
+        parts = []
+        for part in ('train', 'validation', 'test'):
+            url = reverse('download-split-file', args=[split_id, part])
+            df = load_arff_dataframe(io.BytesIO(response_body(self.client.get(url))))
+            parts.append(sorted(df['id'].tolist()))
+        return parts
+
+    def test_each_configuration_matches_its_own_split(self):
+        configurations = [
+            {'random_state': 1, 'stratify_column': 'class'},
+            {'random_state': 2, 'stratify_column': 'class'},
+            {'random_state': 1},
+            {'method': 'hash', 'hash_columns': 'id', 'random_state': 3},
+        ]
+        for storage_mode in (DatasetSplit.STORAGE_INDICES, DatasetSplit.STORAGE_FILES):
+            response = self.batch(configurations, storage_mode=storage_mode)
+            self.assertEqual(response.status_code, 201, response.json())
+            splits = response.json()['splits']
+            self.assertEqual(len(splits), len(configurations))
+
+            for config, dataset_split in zip(configurations, splits):
+                self.assertEqual(dataset_split['storage_mode'], storage_mode)
+                if config.get('method') == 'hash':
+                    indices = hash_split_indices(self.df, key_columns='id', seed=3)
+                else:
+                    indices = train_val_test_split_indices(
+                        self.df, rstate=config['random_state'], stratify=config.get('stratify_column'))
+                expected = [sorted(self.df['id'].to_numpy()[positions].tolist()) for positions in indices]
+                self.assertEqual(self.part_ids(dataset_split['id']), expected, config)
+
+    def test_invalid_configuration_creates_nothing(self):
+        response = self.batch([{'random_state': 1}, {'stratify_column': 'falta'}])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(DatasetSplit.objects.exists())
+
+
+class ColumnarMmapTests(MediaTestCase):
+    """Caché columnar abierta con memmap (DATASET_ACCESS_MODE='mmap')"""
+
+    def setUp(self):
+        super().setUp()
+        mmap_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, mmap_root, ignore_errors=True)
+        settings_override = override_settings(COLUMNAR_MMAP_DIR=mmap_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.mmap_root = mmap_root
+        self.df = load_arff_dataframe(io.BytesIO(PRECISION_ARFF))
+
+    def assert_same_frame(self, df):
+        self.assertEqual(df.attrs['relation'], 'precision')
+        for col in self.df.columns:
+            series = df[col]
+            if isinstance(series.dtype, np.dtype):
+                # np.array devuelve un ndarray normal en lugar del memmap
+                series = pd.Series(np.array(series), name=col)
+            pd.testing.assert_series_equal(series, self.df[col])
+
+    def test_mapped_columns_match_and_are_not_counted(self):
+        write_columnar_cache('k', self.df, 'source')
+        mapped = read_columnar_cache('k', 'source', mmap=True)
+
+        self.assert_same_frame(mapped)
+        self.assertFalse(mapped['ratio'].to_numpy().flags.writeable)
+        self.assertLess(dataframe_nbytes(mapped), dataframe_nbytes(self.df))
+        # Otro origen: la caché no vale
+        self.assertIsNone(read_columnar_cache('k', 'otro', mmap=True))
+
+    def test_remote_storage_copies_columns_once(self):
+        write_columnar_cache('k', self.df, 'source')
+        local_path = default_storage.path
+
+        def remote_path(name):
+            # Como en un storage remoto, el directorio de la caché no tiene ruta local
+            if name.endswith('/'):
+                raise NotImplementedError
+            return local_path(name)
+
+        with mock.patch.object(default_storage, 'path', side_effect=remote_path):
+            first = read_columnar_cache('k', 'source', mmap=True)
+            second = read_columnar_cache('k', 'source', mmap=True)
+
+        self.assert_same_frame(first)
+        self.assert_same_frame(second)
+        copies = os.listdir(os.path.join(self.mmap_root, 'k'))
+        self.assertEqual(len(copies), 1)
+
+        delete_columnar_cache('k')
+        self.assertFalse(os.path.exists(os.path.join(self.mmap_root, 'k')))
+        self.assertIsNone(read_columnar_cache('k', 'source', mmap=True))
+
+    @override_settings(DATASET_ACCESS_MODE='mmap')
+    def test_dataset_frame_and_downloads_in_mmap_mode(self):
+        dataset_file = self.upload('p.arff', PRECISION_ARFF)
+        dataframe_cache.clear()
+
+        df = get_dataset_frame(dataset_file)
+        self.assert_same_frame(df)
+        self.assertFalse(df['ratio'].to_numpy().flags.writeable)
+
+        dataset_split = create_dataset_split(dataset_file, storage_mode=DatasetSplit.STORAGE_INDICES)
+        rows = 0
+        for part in ('train', 'validation', 'test'):
+            url = reverse('download-split-file', args=[dataset_split.id, part])
+            rows += len(load_arff_dataframe(io.BytesIO(response_body(self.client.get(url)))))
+        self.assertEqual(rows, 3)
+
+
+class MetricsTests(MediaTestCase):
+    """Endpoint /metrics con las métricas de las peticiones instrumentadas"""
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = Histogram('t_seconds', 'Prueba', ['view'], buckets=(0.1, 1))
+        for value in (0.05, 0.5, 5):
+            histogram.observe(value, view='a')
+
+        lines = histogram.render().splitlines()
+        self.assertIn('t_seconds_bucket{view="a",le="0.1"} 1', lines)
+        self.assertIn('t_seconds_bucket{view="a",le="1"} 2', lines)
+        self.assertIn('t_seconds_bucket{view="a",le="+Inf"} 3', lines)
+        self.assertIn('t_seconds_count{view="a"} 3', lines)
+
+    def test_requests_and_spans_are_exported(self):
+        self.upload('a.arff', make_arff(50))
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        text = response.content.decode('utf-8')
+
+        self.assertIn('arff_request_duration_seconds_count{method="POST",view="upload-dataset",status="201"}', text)
+        self.assertIn('arff_span_duration_seconds_count{span="arff.parse"}', text)
+        self.assertRegex(text, r'arff_storage_bytes_total\{direction="write"\} [1-9]')
+        self.assertRegex(text, r'arff_process_resident_memory_bytes [1-9]')
+        # Las consultas a /metrics no se miden
+        self.assertNotIn('view="metrics"', text)
+
+    @override_settings(METRICS_ALLOWED_IPS=['10.0.0.1'])
+    def test_only_allowed_addresses(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+        self.assertEqual(self.client.get(reverse('metrics'), REMOTE_ADDR='10.0.0.1').status_code, 200)
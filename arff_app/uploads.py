@@ -0,0 +1,216 @@
+import hashlib
+import math
+from django.conf import settings
+from django.core.files.base import ContentFile, File
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+
+from .models import UploadChunk, UploadSession, dataset_upload_path
+from .services import create_dataset_from_content
+from .utils.dataset_utils import load_arff_dataframe, parse_arff_header_prefix, validate_arff_rows
+from .utils.storage_utils import save_stream_to_storage
+
+# Tamaño por defecto de cada parte y límites aceptados
+DEFAULT_UPLOAD_CHUNK_SIZE = 4 * 1024 * 1024
+MIN_UPLOAD_CHUNK_SIZE = 64 * 1024
+MAX_UPLOAD_CHUNK_SIZE = 32 * 1024 * 1024
+
+
+class UploadError(ValueError):
+    """Error de una subida por bloques que se devuelve al cliente"""
+
+
+def create_upload_session(filename, total_size, name=None, chunk_size=None):
+    """Iniciar una subida por bloques"""
+    if not filename.lower().endswith('.arff'):
+        raise UploadError('Solo se permiten archivos ARFF')
+    if total_size <= 0:
+        raise UploadError('El archivo está vacío')
+
+    chunk_size = chunk_size or getattr(settings, 'UPLOAD_CHUNK_SIZE', DEFAULT_UPLOAD_CHUNK_SIZE)
+    chunk_size = min(max(chunk_size, MIN_UPLOAD_CHUNK_SIZE), MAX_UPLOAD_CHUNK_SIZE)
+
+    return UploadSession.objects.create(
+        name=name or filename,
+        filename=filename,
+        total_size=total_size,
+        chunk_size=chunk_size,
+        total_chunks=math.ceil(total_size / chunk_size)
+    )
+
+
+def store_chunk(session, index, data, checksum=None):
+    """
+    Guardar una parte en el storage y avanzar la validación.
+    Reenviar una parte ya recibida con el mismo contenido no hace nada, así que el
+    cliente puede reanudar una subida interrumpida reenviando solo las que falten.
+    """
+    if session.status != UploadSession.STATUS_OPEN:
+        raise UploadError(f'La subida no está abierta ({session.status}): {session.message}')
+    if not 0 <= index < session.total_chunks:
+        raise UploadError(f'Número de parte fuera de rango (0-{session.total_chunks - 1})')
+    if len(data) != session.expected_chunk_size(index):
+        raise UploadError(f'La parte {index} debe tener {session.expected_chunk_size(index)} bytes')
+
+    digest = hashlib.sha256(data).hexdigest()
+    if checksum and checksum.lower() != digest:
+        raise UploadError(f'El checksum de la parte {index} no coincide')
+
+    existing = UploadChunk.objects.filter(session=session, index=index).first()
+    if existing is not None:
+        if existing.sha256 != digest:
+            if index < session.validated_chunks:
+                raise UploadError(f'La parte {index} ya fue recibida con otro contenido')
+            existing.delete()
+        else:
+            return advance_validation(session)
+
+    chunk = UploadChunk(session=session, index=index, size=len(data), sha256=digest)
+    chunk.file.save(f"{index}.part", ContentFile(data), save=False)
+    try:
+        with transaction.atomic():
+            chunk.save()
+    except IntegrityError:
+        # La misma parte llegó dos veces a la vez: se conserva la primera
+        chunk.file.delete(save=False)
+        return advance_validation(session)
+
+    return advance_validation(session, {index: data})
+
+
+def _chunk_bytes(chunk, received):
+    """Contenido de una parte: de memoria si acaba de llegar, si no del storage"""
+    if chunk.index in received:
+        return received[chunk.index]
+    with chunk.file.open('rb') as fh:
+        return fh.read()
+
+
+def advance_validation(session, received=None):
+    """
+    Validar, en orden, las partes contiguas ya recibidas que aún no se habían validado.
+    Las líneas incompletas al final de una parte se guardan en session.carry hasta
+    que llega la siguiente, así que el ARFF se valida una sola vez mientras se sube.
+    """
+    received = received or {}
+
+    with transaction.atomic():
+        session = UploadSession.objects.select_for_update().get(id=session.id)
+        if session.status != UploadSession.STATUS_OPEN:
+            return session
+
+        pending = {
+            chunk.index: chunk
+            for chunk in session.chunks.filter(index__gte=session.validated_chunks)
+        }
+        buffer = bytes(session.carry)
+
+        try:
+            while session.validated_chunks in pending:
+                index = session.validated_chunks
+                buffer += _chunk_bytes(pending[index], received)
+                final = index == session.total_chunks - 1
+
+                if session.attributes is None:
+                    header = parse_arff_header_prefix(buffer, final=final)
+                    if header is None:
+                        session.validated_chunks += 1
+                        continue
+                    session.relation, session.attributes, offset = header
+                    buffer = buffer[offset:]
+
+                # Solo se validan líneas completas salvo en la última parte
+                cut = len(buffer) if final else buffer.rfind(b'\n') + 1
+                session.validated_rows += validate_arff_rows(buffer[:cut], session.attributes)
+                buffer = buffer[cut:]
+                session.validated_chunks += 1
+        except ValueError as e:
+            session.status = UploadSession.STATUS_FAILED
+            session.message = f'Error al validar el archivo ARFF: {str(e)}'
+
+        session.carry = buffer
+        session.save()
+
+    if session.status == UploadSession.STATUS_FAILED:
+        raise UploadError(session.message)
+    return session
+
+
+def _iter_upload_bytes(session, digest):
+    """Concatenar las partes en orden actualizando el hash del archivo completo"""
+    for chunk in session.chunks.order_by('index'):
+        with chunk.file.open('rb') as fh:
+            while True:
+                block = fh.read(File.DEFAULT_CHUNK_SIZE)
+                if not block:
+                    break
+                digest.update(block)
+                yield block
+
+
+def finalize_upload(session, checksum=None):
+    """
+    Unir las partes en el archivo final y registrar el dataset.
+    La sesión queda bloqueada mientras tanto: una llamada repetida (p. ej. el reintento
+    de un cliente) espera a la primera y devuelve el dataset que ya creó.
+    Las líneas ya se validaron al recibir las partes, así que al cargar el archivo para
+    el perfil no se vuelven a comprobar. Las partes se borran del storage al terminar.
+    """
+    with transaction.atomic():
+        session = UploadSession.objects.select_for_update().get(id=session.id)
+        if session.status == UploadSession.STATUS_COMPLETE:
+            return session
+        if session.status != UploadSession.STATUS_OPEN:
+            raise UploadError(f'La subida no está abierta ({session.status}): {session.message}')
+
+        missing = missing_chunks(session)
+        if missing:
+            raise UploadError(f'Faltan {len(missing)} partes por subir')
+        if session.validated_chunks != session.total_chunks:
+            raise UploadError('La validación de las partes no ha terminado')
+
+        digest = hashlib.sha256()
+        path = save_stream_to_storage(
+            _iter_upload_bytes(session, digest), dataset_upload_path(None, session.filename))
+
+        if checksum and checksum.lower() != digest.hexdigest():
+            default_storage.delete(path)
+            session.status = UploadSession.STATUS_FAILED
+            session.message = 'El checksum del archivo completo no coincide'
+            session.save()
+        else:
+            def load(path):
+                with default_storage.open(path, 'rb') as fh:
+                    df = load_arff_dataframe(fh, check_rows=False)
+                if len(df) != session.validated_rows:
+                    raise ValueError('El archivo unido no coincide con las partes validadas')
+                return df
+
+            try:
+                dataset_file = create_dataset_from_content(session.name, digest.hexdigest(), lambda: path, load)
+            except Exception:
+                default_storage.delete(path)
+                raise
+
+            # El mismo contenido ya estaba guardado: el archivo recién unido sobra
+            if dataset_file.file.name != path:
+                default_storage.delete(path)
+
+            for chunk in session.chunks.all():
+                chunk.delete()
+
+            session.status = UploadSession.STATUS_COMPLETE
+            session.message = 'Archivo ARFF subido exitosamente'
+            session.dataset_file = dataset_file
+            session.carry = b''
+            session.save()
+
+    if session.status == UploadSession.STATUS_FAILED:
+        raise UploadError(session.message)
+    return session
+
+
+def missing_chunks(session):
+    """Índices de las partes que aún no se han recibido"""
+    received = set(session.chunks.values_list('index', flat=True))
+    return [index for index in range(session.total_chunks) if index not in received]
@@ -9,17 +9,35 @@ urlpatterns = [
     path('datasets/', views.list_datasets, name='list-datasets'),
     path('datasets/<int:dataset_id>/info/', views.dataset_info, name='dataset-info'),
     
+    # Subida por bloques (reanudable) de archivos grandes
+    path('uploads/', views.create_upload, name='create-upload'),
+    path('uploads/<uuid:upload_id>/', views.upload_status, name='upload-status'),
+    path('uploads/<uuid:upload_id>/chunks/<int:index>/', views.upload_chunk, name='upload-chunk'),
+    path('uploads/<uuid:upload_id>/finalize/', views.finalize_upload_view, name='finalize-upload'),
+    
     # Divisiones de datasets
     path('splits/create/', views.split_dataset, name='split-dataset'),
+    path('splits/batch/', views.split_dataset_batch, name='split-dataset-batch'),
+    path('splits/jobs/<int:job_id>/', views.split_job_status, name='split-job-status'),
     path('splits/', views.list_splits, name='list-splits'),
     path('splits/<int:split_id>/', views.get_split_detail, name='get-split-detail'),
     path('splits/<int:split_id>/delete/', views.delete_split, name='delete-split'),
     
+    # Validación cruzada
+    path('cv/create/', views.create_cross_validation_view, name='create-cross-validation'),
+    path('cv/', views.list_cross_validations, name='list-cross-validations'),
+    path('cv/<int:cv_id>/', views.get_cross_validation_detail, name='get-cross-validation-detail'),
+    path('cv/<int:cv_id>/delete/', views.delete_cross_validation, name='delete-cross-validation'),
+    path('cv/<int:cv_id>/download/<int:repeat>/<int:fold>/<str:file_type>/', views.download_fold_file, name='download-fold-file'),
+    
     # Descargas
     path('splits/<int:split_id>/download/<str:file_type>/', views.download_split_file, name='download-split-file'),
     
     # Visualizaciones
     path('visualizations/generate/', views.generate_visualizations, name='generate-visualizations'),
+    
+    # Diagnóstico
+    path('cache/stats/', views.cache_stats, name='cache-stats'),
 ]
 
 # Servir archivos media en desarrollo
@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+
+from .dataset_utils import parse_stratify_columns, stratum_codes
+from ..instrumentation import timed
+
+# Número de categorías e intervalos que se envían al navegador
+TOP_CATEGORIES = 10
+HISTOGRAM_BINS = 30
+
+
+def _is_categorical(series):
+    """Misma regla que las gráficas PNG para decidir entre barras e histograma"""
+    return not pd.api.types.is_numeric_dtype(series) or isinstance(series.dtype, pd.CategoricalDtype)
+
+
+def value_counts_data(series, top=None):
+    """Conteos por valor, de mayor a menor, listos para una gráfica de barras"""
+    counts = series.value_counts()
+    total = int(counts.sum())
+    if top is not None:
+        counts = counts.head(top)
+
+    return {
+        'type': 'bar',
+        'labels': [str(v) for v in counts.index],
+        'counts': counts.astype(np.int64).tolist(),
+        'total': total,
+    }
+
+
+def histogram_data(series, bins=HISTOGRAM_BINS):
+    """Conteos y bordes de los intervalos de un histograma"""
+    values = series.dropna().to_numpy(dtype=np.float64)
+    if len(values) == 0:
+        return {'type': 'histogram', 'edges': [], 'counts': [], 'total': 0}
+
+    counts, edges = np.histogram(values, bins=bins)
+    return {
+        'type': 'histogram',
+        'edges': edges.tolist(),
+        'counts': counts.tolist(),
+        'total': int(len(values)),
+    }
+
+
+@timed('chart.column_data')
+def column_chart_data(df, column_name, top=TOP_CATEGORIES, bins=HISTOGRAM_BINS):
+    """Datos de la gráfica de distribución de una columna (equivalente a create_column_distribution_plot)"""
+    series = df[column_name]
+    if _is_categorical(series):
+        data = value_counts_data(series, top=top)
+    else:
+        data = histogram_data(series, bins=bins)
+    data['column'] = column_name
+    return data
+
+
+def _label_values(series):
+    """Texto de cada valor para las etiquetas; los ausentes se escriben '?', como en el ARFF"""
+    return series.astype(object).fillna('?').astype(str).to_numpy(dtype=object)
+
+
+@timed('chart.split_data')
+def split_chart_data(df, stratify, indices):
+    """
+    Conteos por estrato del dataset completo y de cada conjunto de un split.
+    Se calculan con bincount sobre los códigos de estrato, sin copiar filas.
+    """
+    codes, n_strata = stratum_codes(df, stratify)
+    present, first_rows = np.unique(codes, return_index=True)
+
+    # Etiqueta de cada estrato a partir de su primera fila
+    columns = parse_stratify_columns(stratify)
+    labels = _label_values(df[columns[0]].take(first_rows))
+    for col in columns[1:]:
+        labels = labels + ' | ' + _label_values(df[col].take(first_rows))
+
+    original = np.bincount(codes, minlength=n_strata)[present]
+    order = np.argsort(-original, kind='stable')
+
+    data = {
+        'type': 'comparison',
+        'column': ','.join(columns),
+        'labels': labels[order].tolist(),
+        'original': original[order].tolist(),
+    }
+    for name, positions in zip(('train', 'validation', 'test'), indices):
+        counts = np.bincount(codes[positions], minlength=n_strata)[present]
+        data[name] = counts[order].tolist()
+    return data
@@ -0,0 +1,260 @@
+import hashlib
+import io
+import json
+import os
+import posixpath
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+from .dataset_utils import load_kdd_dataset_from_file
+from ..instrumentation import timed
+
+# Directorio del storage donde se guardan las columnas ya parseadas
+COLUMNAR_CACHE_DIR = 'columnar'
+MANIFEST_NAME = 'manifest.json'
+CACHE_FORMAT_VERSION = 3
+
+# Directorio local por defecto de las copias para memmap con un storage remoto
+DEFAULT_MMAP_DIR = os.path.join(tempfile.gettempdir(), 'arff-columnar')
+
+
+def mmap_access_enabled():
+    """
+    DATASET_ACCESS_MODE='mmap': las columnas se abren con numpy.memmap en lugar de
+    cargarse en la memoria de cada worker, y todos los procesos de la máquina
+    comparten una sola copia en la caché de páginas del sistema.
+    """
+    return getattr(settings, 'DATASET_ACCESS_MODE', 'memory') == 'mmap'
+
+
+def columnar_cache_path(cache_key, filename=''):
+    """Ruta en el storage de la caché columnar (clave: DatasetFile.cache_key)"""
+    return posixpath.join(COLUMNAR_CACHE_DIR, str(cache_key), filename)
+
+
+def _save_bytes(path, content):
+    """Guardar bytes en una ruta fija, reemplazando el contenido anterior"""
+    if default_storage.exists(path):
+        default_storage.delete(path)
+    return default_storage.save(path, ContentFile(content))
+
+
+def _save_array(path, values):
+    """Serializar un array NumPy en formato .npy"""
+    buffer = io.BytesIO()
+    np.save(buffer, values, allow_pickle=False)
+    return _save_bytes(path, buffer.getvalue())
+
+
+def _load_array(path):
+    """Leer un array .npy del storage"""
+    with default_storage.open(path, 'rb') as fh:
+        return np.load(fh, allow_pickle=False)
+
+
+def _entry_files(entry):
+    """Archivos .npy de una columna (los enteros con nulos guardan además su máscara)"""
+    return [entry['file']] + ([entry['mask']] if 'mask' in entry else [])
+
+
+def _mmap_root():
+    return getattr(settings, 'COLUMNAR_MMAP_DIR', None) or DEFAULT_MMAP_DIR
+
+
+def _local_column_dir(cache_key, manifest):
+    """
+    Directorio local con los .npy de la caché, para abrirlos con memmap.
+    Con el sistema de archivos local son los propios archivos del storage; con un
+    storage remoto se copian una vez por versión del manifiesto a COLUMNAR_MMAP_DIR
+    y los comparten todos los workers de la máquina.
+    """
+    try:
+        return default_storage.path(columnar_cache_path(cache_key))
+    except NotImplementedError:
+        pass
+
+    version = hashlib.sha256(json.dumps(manifest, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+    parent = os.path.join(_mmap_root(), str(cache_key))
+    directory = os.path.join(parent, version)
+    if os.path.isdir(directory):
+        return directory
+
+    os.makedirs(parent, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix='.tmp-', dir=parent)
+    try:
+        for entry in manifest['columns']:
+            for filename in _entry_files(entry):
+                with default_storage.open(columnar_cache_path(cache_key, filename), 'rb') as src, \
+                        open(os.path.join(staging, filename), 'wb') as dst:
+                    shutil.copyfileobj(src, dst, 1024 * 1024)
+        # El renombrado es atómico: si otro worker ya publicó esta versión se usa la suya
+        os.rename(staging, directory)
+    except OSError:
+        shutil.rmtree(staging, ignore_errors=True)
+        if not os.path.isdir(directory):
+            raise
+
+    # Las versiones anteriores ya no se usan (los procesos que las tengan mapeadas
+    # conservan sus archivos hasta cerrarlos)
+    for name in os.listdir(parent):
+        if name != version and not name.startswith('.tmp-'):
+            shutil.rmtree(os.path.join(parent, name), ignore_errors=True)
+    return directory
+
+
+@timed('columnar.write')
+def write_columnar_cache(cache_key, df, source=None):
+    """
+    Guardar un DataFrame como un archivo .npy por columna más un manifiesto JSON.
+    Las columnas nominales y de texto se guardan como códigos enteros y categorías.
+    """
+    date_formats = df.attrs.get('date_formats', {})
+    columns = []
+    for position, col in enumerate(df.columns):
+        series = df[col]
+        filename = f"{position:04d}.npy"
+        entry = {'name': col, 'file': filename}
+
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            entry['kind'] = 'nominal'
+            entry['categories'] = [str(v) for v in series.cat.categories]
+            values = series.cat.codes.to_numpy()
+        elif isinstance(series.array, pd.arrays.IntegerArray):
+            # Enteros con nulos: valores (0 en los ausentes) y máscara por separado
+            entry['kind'] = 'numeric'
+            entry['mask'] = f"{position:04d}.mask.npy"
+            values = series.to_numpy(dtype=series.dtype.numpy_dtype, na_value=0)
+            _save_array(columnar_cache_path(cache_key, entry['mask']), series.isna().to_numpy())
+        elif pd.api.types.is_numeric_dtype(series):
+            entry['kind'] = 'numeric'
+            values = series.to_numpy()
+        else:
+            entry['kind'] = 'string'
+            codes, uniques = pd.factorize(series)
+            entry['categories'] = [str(v) for v in uniques]
+            if col in date_formats:
+                entry['date_format'] = date_formats[col]
+            values = codes.astype(np.int32)
+
+        _save_array(columnar_cache_path(cache_key, filename), values)
+        columns.append(entry)
+
+    # El manifiesto se escribe al final: sin él la caché se considera incompleta
+    manifest = {
+        'version': CACHE_FORMAT_VERSION,
+        'source': source,
+        'relation': df.attrs.get('relation'),
+        'rows': len(df),
+        'columns': columns,
+    }
+    _save_bytes(columnar_cache_path(cache_key, MANIFEST_NAME), json.dumps(manifest).encode('utf-8'))
+    return manifest
+
+
+def read_columnar_manifest(cache_key, source=None):
+    """Leer el manifiesto de la caché, o None si no existe, es de otra versión o de otro archivo"""
+    path = columnar_cache_path(cache_key, MANIFEST_NAME)
+    if not default_storage.exists(path):
+        return None
+
+    with default_storage.open(path, 'rb') as fh:
+        manifest = json.loads(fh.read().decode('utf-8'))
+
+    if manifest.get('version') != CACHE_FORMAT_VERSION:
+        return None
+    if source is not None and manifest.get('source') != source:
+        return None
+    return manifest
+
+
+@timed('columnar.read')
+def read_columnar_cache(cache_key, source=None, mmap=False):
+    """
+    Reconstruir el DataFrame desde la caché columnar, o None si no está disponible.
+    Con mmap=True las columnas numéricas y los códigos de las nominales son vistas
+    de solo lectura sobre los archivos mapeados, sin copiarlos a memoria.
+    """
+    manifest = read_columnar_manifest(cache_key, source)
+    if manifest is None:
+        return None
+
+    # Un archivo vacío no puede mapearse
+    directory = _local_column_dir(cache_key, manifest) if mmap and manifest['rows'] else None
+
+    def load(filename):
+        if directory is not None:
+            return np.load(os.path.join(directory, filename), mmap_mode='r', allow_pickle=False)
+        return _load_array(columnar_cache_path(cache_key, filename))
+
+    columns = {}
+    for entry in manifest['columns']:
+        values = load(entry['file'])
+        if len(values) != manifest['rows']:
+            return None
+
+        if entry['kind'] == 'nominal':
+            columns[entry['name']] = pd.Categorical.from_codes(
+                values, dtype=pd.CategoricalDtype(entry['categories']))
+        elif entry['kind'] == 'string':
+            uniques = np.array(entry['categories'] + [None], dtype=object)
+            columns[entry['name']] = uniques[values]
+        elif 'mask' in entry:
+            columns[entry['name']] = pd.arrays.IntegerArray(values, load(entry['mask']))
+        else:
+            columns[entry['name']] = values
+
+    df = pd.DataFrame(columns, copy=False)
+    df.attrs['relation'] = manifest.get('relation')
+    df.attrs['date_formats'] = {
+        entry['name']: entry['date_format'] for entry in manifest['columns'] if 'date_format' in entry
+    }
+    return df
+
+
+def delete_columnar_cache(cache_key):
+    """Eliminar todos los archivos de una caché columnar"""
+    directory = columnar_cache_path(cache_key)
+    try:
+        _, files = default_storage.listdir(directory)
+    except (FileNotFoundError, NotImplementedError):
+        return
+
+    for filename in files:
+        default_storage.delete(columnar_cache_path(cache_key, filename))
+
+    # El directorio vacío solo existe en storages con sistema de archivos (S3 no tiene)
+    try:
+        os.rmdir(default_storage.path(directory))
+    except (NotImplementedError, OSError):
+        pass
+
+    shutil.rmtree(os.path.join(_mmap_root(), str(cache_key)), ignore_errors=True)
+
+
+@timed('dataset.load')
+def load_dataset_frame(dataset_file):
+    """
+    Obtener el DataFrame de un DatasetFile desde la caché columnar.
+    Si la caché no existe se vuelve a parsear el ARFF y se regenera.
+    """
+    mmap = mmap_access_enabled()
+    try:
+        df = read_columnar_cache(dataset_file.cache_key, dataset_file.file.name, mmap=mmap)
+    except (OSError, ValueError, KeyError):
+        df = None
+
+    if df is None:
+        df = load_kdd_dataset_from_file(dataset_file.file)
+        write_columnar_cache(dataset_file.cache_key, df, dataset_file.file.name)
+        if mmap:
+            # Quedarse con las vistas mapeadas y liberar la copia recién parseada
+            mapped = read_columnar_cache(dataset_file.cache_key, dataset_file.file.name, mmap=True)
+            if mapped is not None:
+                df = mapped
+
+    return df
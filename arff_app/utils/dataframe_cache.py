@@ -0,0 +1,129 @@
+import threading
+from collections import OrderedDict
+from django.conf import settings
+
+# Presupuesto por defecto de la caché en memoria de cada worker (256 MB)
+DEFAULT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+
+def _is_mapped(array):
+    """Array respaldado por un archivo mapeado (memoria compartida entre procesos)"""
+    import mmap
+    import numpy as np
+
+    while array is not None:
+        if isinstance(array, (np.memmap, mmap.mmap)):
+            return True
+        array = getattr(array, 'base', None)
+    return False
+
+
+def dataframe_nbytes(df):
+    """
+    Memoria propia del proceso que ocupa un DataFrame.
+    Las columnas mapeadas con memmap no cuentan: viven en la caché de páginas del
+    sistema, compartidas por todos los workers.
+    """
+    import pandas as pd
+
+    total = int(df.memory_usage(deep=True).sum())
+    for position in range(df.shape[1]):
+        series = df.iloc[:, position]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            values = series.array.codes
+        elif series.dtype.kind in 'biuf' and not isinstance(series.dtype, pd.api.extensions.ExtensionDtype):
+            # Los enteros con nulos (Int32/Int64) se cuentan enteros
+            values = series.to_numpy()
+        else:
+            continue
+        if _is_mapped(values):
+            total -= values.nbytes
+    return total
+
+
+class DataFrameCache:
+    """
+    Caché LRU de DataFrames local al proceso, limitada por bytes.
+    Los DataFrames devueltos se comparten entre peticiones y no deben modificarse.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, df):
+        size = dataframe_nbytes(df)
+        with self._lock:
+            self._remove(key)
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (df, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate(self, cache_key):
+        """Eliminar todas las entradas de un DatasetFile (por su cache_key)"""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == cache_key]:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.current_bytes -= entry[1]
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'current_bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': self.hits / lookups if lookups else None,
+            }
+
+
+dataframe_cache = DataFrameCache(
+    getattr(settings, 'DATAFRAME_CACHE_MAX_BYTES', DEFAULT_CACHE_MAX_BYTES))
+
+
+def get_dataset_frame(dataset_file):
+    """
+    Obtener el DataFrame de un DatasetFile usando la caché del proceso.
+    La clave incluye el nombre del archivo para no servir datos de un archivo reemplazado;
+    los datasets con el mismo contenido comparten la entrada.
+    """
+    from .columnar_cache import load_dataset_frame
+
+    key = (dataset_file.cache_key, dataset_file.file.name)
+    df = dataframe_cache.get(key)
+    if df is None:
+        df = load_dataset_frame(dataset_file)
+        dataframe_cache.put(key, df)
+    return df
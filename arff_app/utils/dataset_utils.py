@@ -1,110 +1,987 @@
-import matplotlib
-matplotlib.use('Agg')  # Para evitar problemas con GUI
-import matplotlib.pyplot as plt
-import seaborn as sns
-import pandas as pd
 import io
-from django.core.files.base import ContentFile
 import os
+import re
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
 
-def create_distribution_plot(df, stratify_column):
-    """Crear gráfica de distribución de la columna de estratificación"""
-    plt.figure(figsize=(10, 6))
-    
-    # Gráfica de barras para la distribución
-    value_counts = df[stratify_column].value_counts()
-    bars = plt.bar(value_counts.index, value_counts.values)
-    
-    # Añadir valores en las barras
-    for bar in bars:
-        height = bar.get_height()
-        plt.text(bar.get_x() + bar.get_width()/2., height,
-                f'{int(height)}', ha='center', va='bottom')
-    
-    plt.title(f'Distribución de {stratify_column} - Dataset Completo')
-    plt.xlabel(stratify_column)
-    plt.ylabel('Frecuencia')
-    plt.xticks(rotation=45)
-    plt.tight_layout()
+from .storage_utils import save_stream_to_storage
+from ..instrumentation import timed
+
+# Número de filas de la sección @data que se procesan por bloque
+ARFF_CHUNK_ROWS = 50000
+ARFF_WRITE_CHUNK_ROWS = 20000
+
+# Bytes de la sección @data que se leen por bloque al parsear y al repartir líneas
+# en un split por streaming
+ARFF_PARSE_BLOCK_BYTES = 8 * 1024 * 1024
+ARFF_ROUTE_BLOCK_BYTES = 8 * 1024 * 1024
+
+# Proporciones de train, validation y test
+SPLIT_FRACTIONS = (0.6, 0.2, 0.2)
+
+# Filas por bloque al calcular el split por hash (cada bloque es independiente)
+HASH_CHUNK_ROWS = 200000
+
+# Constantes de splitmix64 y hash fijo de los valores ausentes
+_MIX_MULTIPLIERS = (np.uint64(0xBF58476D1CE4E5B9), np.uint64(0x94D049BB133111EB))
+_MISSING_HASH = np.uint64(0x9E3779B97F4A7C15)
+
+# Tokens de un atributo ARFF: nombres/valores entre comillas o texto libre
+_ARFF_TOKEN = re.compile(r"""'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*"|[^\s,{}]+""")
+_NOMINAL_VALUE = re.compile(r"""'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*"|[^,]+""")
+
+# Línea @data completa (con su salto de línea) dentro de un bloque de bytes
+_DATA_MARKER = re.compile(rb'^[ \t]*@data[ \t]*\r?\n', re.IGNORECASE | re.MULTILINE)
+
+# Línea @relation de una cabecera ARFF
+_RELATION_LINE = re.compile(rb'^[ \t]*@relation\b[^\n]*', re.IGNORECASE | re.MULTILINE)
+
+# Valores entre comillas de la sección @data, comentarios y filas en formato disperso
+_QUOTED_DATA_VALUE = re.compile(rb"""'(?:[^'\\\n]|\\.)*'|"(?:[^"\\\n]|\\.)*\"""")
+_DATA_COMMENT = re.compile(rb'%[^\n]*')
+_SPARSE_ROW = re.compile(rb'^[ \t]*\{', re.MULTILINE)
+
+
+def _unquote(token):
+    """Quitar comillas y espacios de un nombre o valor ARFF"""
+    token = token.strip()
+    if len(token) >= 2 and token[0] == token[-1] and token[0] in "'\"":
+        token = token[1:-1].replace("\\" + token[0], token[0])
+    return token
+
+
+def _parse_attribute(line):
+    """Convertir una línea @attribute en (nombre, tipo, categorías)"""
+    body = line.strip()[len('@attribute'):].strip()
+    match = _ARFF_TOKEN.match(body)
+    if not match:
+        raise ValueError(f"Atributo ARFF inválido: {line.strip()}")
+
+    name = _unquote(match.group(0))
+    type_spec = body[match.end():].strip()
+
+    if type_spec.startswith('{'):
+        if not type_spec.endswith('}'):
+            raise ValueError(f"Atributo nominal sin cerrar: {name}")
+        values = [_unquote(v) for v in _NOMINAL_VALUE.findall(type_spec[1:-1]) if v.strip()]
+        return name, 'nominal', values
+
+    type_name = type_spec.split()[0].lower() if type_spec else ''
+    if type_name in ('numeric', 'real'):
+        return name, 'real', None
+    if type_name == 'integer':
+        return name, 'integer', None
+    if type_name == 'string':
+        return name, 'string', None
+    if type_name == 'date':
+        # Se leen como texto; el formato se conserva para volver a escribir la cabecera
+        return name, 'date', _unquote(type_spec[len('date'):].strip()) or None
+
+    raise ValueError(f"Tipo de atributo ARFF no soportado para {name}: {type_spec}")
+
+
+def _open_arff_source(source):
+    """Abrir la fuente (ruta, archivo de Django o file object) en modo binario"""
+    if isinstance(source, str):
+        return open(source, 'rb'), True
+
+    # FieldFile de Django se abre de forma perezosa desde el storage
+    if hasattr(source, 'open') and getattr(source, 'closed', False):
+        source.open('rb')
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    return source, False
+
+
+def read_arff_header(fh):
+    """
+    Leer la cabecera ARFF hasta @data.
+    Devuelve (relación, atributos) dejando el archivo posicionado al inicio de los datos.
+    """
+    relation = None
+    attributes = []
+
+    while True:
+        raw = fh.readline()
+        if not raw:
+            raise ValueError("El archivo ARFF no contiene la sección @data")
+
+        line = raw.decode('utf-8') if isinstance(raw, bytes) else raw
+        stripped = line.strip()
+        if not stripped or stripped.startswith('%'):
+            continue
+
+        keyword = stripped.split(None, 1)[0].lower()
+        if keyword == '@relation':
+            relation = _unquote(stripped[len('@relation'):])
+        elif keyword == '@attribute':
+            attributes.append(_parse_attribute(stripped))
+        elif keyword == '@data':
+            break
+        else:
+            raise ValueError(f"Línea de cabecera ARFF inválida: {stripped}")
+
+    if not attributes:
+        raise ValueError("El archivo ARFF no declara atributos")
+
+    names = [name for name, _, _ in attributes]
+    if len(set(names)) != len(names):
+        raise ValueError("El archivo ARFF contiene atributos duplicados")
+
+    return relation, attributes
+
+
+def parse_arff_header_prefix(data, final=False):
+    """
+    Leer la cabecera ARFF al principio de un bloque de bytes.
+    Devuelve (relación, atributos, posición del inicio de los datos), o None si la
+    línea @data todavía no ha llegado y pueden llegar más bytes.
+    """
+    if not final and not _DATA_MARKER.search(data):
+        return None
+
+    fh = io.BytesIO(data)
+    relation, attributes = read_arff_header(fh)
+    return relation, attributes, fh.tell()
+
+
+def _codes_dtype(n_categories):
+    """Tipo entero mínimo para los códigos de una columna nominal"""
+    if n_categories < np.iinfo(np.int8).max:
+        return np.int8
+    if n_categories < np.iinfo(np.int16).max:
+        return np.int16
+    return np.int32
+
+
+def _iter_data_blocks(fh, block_size):
+    """Bloques de la sección @data que terminan en un salto de línea, con el número de su primera línea"""
+    pending = b''
+    line = 1
+    while True:
+        block = fh.read(block_size)
+        if isinstance(block, str):
+            block = block.encode('utf-8')
+        if not block:
+            break
+        block = pending + block
+        cut = block.rfind(b'\n') + 1
+        if not cut:
+            pending = block
+            continue
+        pending = block[cut:]
+        yield block[:cut], line
+        line += block.count(b'\n', 0, cut)
+
+    if pending.strip():
+        yield pending + b'\n', line
+
+
+def _single_quoted(match):
+    """Reescribir un valor entre comillas dobles con comillas simples"""
+    token = match.group(0)
+    if token.startswith(b"'"):
+        return token
+    inner = token[1:-1].replace(b'\\"', b'"').replace(b"'", b"\\'")
+    return b"'" + inner + b"'"
+
+
+def _check_data_block(block, n_fields, first_line):
+    """
+    Comprobar que cada fila del bloque tiene tantos valores como atributos.
+    Lanza ValueError con el número de línea (contado desde @data) de la primera
+    fila incorrecta o si el bloque está en formato disperso.
+    """
+    if b'{' in block and _SPARSE_ROW.search(block):
+        raise ValueError("El formato ARFF disperso (sparse) no está soportado")
+
+    # Sin valores entre comillas ni comentarios, las comas separan los valores
+    stripped = block
+    if b"'" in stripped or b'"' in stripped:
+        stripped = _QUOTED_DATA_VALUE.sub(b"''", stripped)
+    if b'%' in stripped:
+        stripped = _DATA_COMMENT.sub(b'', stripped)
+
+    data = np.frombuffer(stripped, dtype=np.uint8)
+    line_ends = np.flatnonzero(data == ord('\n'))
+    line_starts = np.concatenate(([0], line_ends[:-1] + 1))
+    # Contador más pequeño que no puede desbordarse con la línea más larga
+    longest = int((line_ends - line_starts).max())
+    counter = np.uint8 if longest <= np.iinfo(np.uint8).max else np.int64
+    commas = np.add.reduceat((data == ord(',')).view(np.uint8), line_starts, dtype=counter)
+    # Espacios, tabuladores y saltos de línea son los únicos bytes <= ' ' esperados
+    has_content = np.logical_or.reduceat(data > ord(' '), line_starts)
+
+    wrong = np.flatnonzero(has_content & (commas.astype(np.int64) + 1 != n_fields))
+    if len(wrong):
+        position = wrong[0]
+        raise ValueError(
+            f"Línea {first_line + position} de @data: se esperaban {n_fields} valores y hay {commas[position] + 1}")
+
+
+def _read_data_chunks(fh, attributes, chunk_rows, columns=None, block_size=ARFF_PARSE_BLOCK_BYTES,
+                      check_rows=True):
+    """
+    Leer la sección @data por bloques y devolver las piezas de cada columna.
+    Cada fila debe tener un valor por atributo; los valores pueden ir entre comillas
+    simples o dobles. Con columns solo se leen (y validan) esas columnas.
+    Con check_rows=False no se comprueba el número de valores de cada línea.
+    """
+    names = [name for name, _, _ in attributes]
+    if columns is not None:
+        attributes = [attribute for attribute in attributes if attribute[0] in columns]
+    read_dtypes = {}
+    for name, kind, _ in attributes:
+        if kind in ('real', 'integer'):
+            read_dtypes[name] = np.float64
+        else:
+            read_dtypes[name] = 'category' if kind == 'nominal' else object
+
+    pieces = {name: [] for name, _, _ in attributes}
+    for block, first_line in _iter_data_blocks(fh, block_size):
+        if check_rows:
+            _check_data_block(block, len(names), first_line)
+        # El parser solo admite un tipo de comillas: las dobles se pasan a simples
+        if b'"' in block:
+            block = _QUOTED_DATA_VALUE.sub(_single_quoted, block)
+
+        try:
+            reader = pd.read_csv(
+                io.BytesIO(block),
+                header=None,
+                names=names,
+                index_col=False,
+                dtype=read_dtypes,
+                na_values=['?'],
+                keep_default_na=False,
+                quotechar="'",
+                escapechar='\\',
+                skipinitialspace=True,
+                skip_blank_lines=True,
+                comment='%',
+                chunksize=chunk_rows,
+                engine='c',
+                usecols=columns,
+            )
+            for chunk in reader:
+                for name, kind, categories in attributes:
+                    column = chunk[name]
+                    if kind == 'nominal':
+                        found = column.cat.categories
+                        if (found != found.str.strip()).any():
+                            column = column.astype(object).str.strip().astype('category')
+                        declared = column.cat.set_categories(categories)
+                        if declared.isna().sum() != column.isna().sum():
+                            invalid = column[declared.isna() & column.notna()].iloc[0]
+                            raise ValueError(f"Valor nominal '{invalid}' no declarado para {name}")
+                        pieces[name].append(declared.cat.codes.to_numpy().astype(_codes_dtype(len(categories))))
+                    elif kind in ('string', 'date'):
+                        pieces[name].append(column.to_numpy(dtype=object))
+                    else:
+                        pieces[name].append(column.to_numpy())
+        except pd.errors.EmptyDataError:
+            # Solo comentarios o líneas vacías
+            continue
+        except pd.errors.ParserError as e:
+            raise ValueError(f"Sección @data inválida: {e}") from e
+
+    return pieces
+
+
+def validate_arff_rows(data, attributes):
+    """
+    Validar un bloque de líneas completas de la sección @data con el mismo parser
+    que la carga completa. Devuelve el número de filas del bloque.
+    """
+    if not data.strip():
+        return 0
+
+    pieces = _read_data_chunks(io.BytesIO(data), attributes, ARFF_CHUNK_ROWS)
+    return sum(len(part) for part in pieces[attributes[0][0]])
+
+
+def _build_column(kind, categories, parts):
+    """Concatenar las piezas de una columna en su tipo final"""
+    if kind == 'nominal':
+        codes = np.concatenate(parts) if parts else np.empty(0, dtype=np.int8)
+        return pd.Categorical.from_codes(codes, dtype=pd.CategoricalDtype(categories))
+
+    if kind in ('string', 'date'):
+        return np.concatenate(parts) if parts else np.empty(0, dtype=object)
+
+    values = np.concatenate(parts) if parts else np.empty(0, dtype=np.float64)
+    if kind == 'integer':
+        return _integer_column(values)
+    return _real_column(values)
+
+
+def _real_column(values):
+    """float32 si todos los valores sobreviven al redondeo sin cambios; si no, float64"""
+    narrow = values.astype(np.float32)
+    with np.errstate(invalid='ignore'):
+        exact = (narrow.astype(np.float64) == values) | np.isnan(values)
+    return narrow if exact.all() else values
+
+
+def _integer_column(values):
+    """
+    int32 (o int64 si no cabe) para atributos INTEGER; con valores ausentes, el entero
+    con nulos de pandas (Int32/Int64). Si hay decimales se conservan en float64.
+    """
+    missing = np.isnan(values)
+    present = values[~missing]
+    if not np.array_equal(present, np.trunc(present)):
+        return values
+
+    int32 = np.iinfo(np.int32)
+    fits_int32 = not len(present) or (present.min() >= int32.min and present.max() <= int32.max)
+    dtype = np.int32 if fits_int32 else np.int64
+    if not missing.any():
+        return values.astype(dtype)
+    return pd.arrays.IntegerArray(np.where(missing, 0, values).astype(dtype), missing)
+
+
+@timed('arff.parse')
+def load_arff_dataframe(source, chunk_rows=ARFF_CHUNK_ROWS, columns=None, check_rows=True):
+    """
+    Cargar un archivo ARFF en un DataFrame con columnas tipadas.
+    Los atributos numéricos se guardan como float32/int32 solo si los valores no cambian
+    (si no, float64/int64; los INTEGER con ausentes como Int32/Int64) y los nominales
+    como Categorical.
+    Con columns solo se cargan esas columnas; con una lista vacía el DataFrame no tiene
+    columnas pero sí el número de filas.
+    check_rows=False omite la comprobación de cada línea cuando el contenido ya se
+    validó (p. ej. al subirlo por bloques).
+    """
+    fh, should_close = _open_arff_source(source)
+    try:
+        relation, attributes = read_arff_header(fh)
+        missing = [col for col in columns or [] if col not in {name for name, _, _ in attributes}]
+        if missing:
+            raise KeyError(f"Columnas inexistentes en el ARFF: {', '.join(missing)}")
+        # Sin columnas pedidas se lee la primera solo para contar las filas
+        selected = columns or ([attributes[0][0]] if columns is not None else None)
+        pieces = _read_data_chunks(fh, attributes, chunk_rows, selected, check_rows=check_rows)
+    finally:
+        if should_close:
+            fh.close()
+
+    data = {}
+    for name, kind, categories in attributes:
+        if name in pieces:
+            data[name] = _build_column(kind, categories, pieces.pop(name))
+
+    if columns is not None and not columns:
+        n_rows = len(next(iter(data.values())))
+        df = pd.DataFrame(index=pd.RangeIndex(n_rows))
+    else:
+        df = pd.DataFrame(data, copy=False)
+    df.attrs['relation'] = relation
+    df.attrs['date_formats'] = {
+        name: categories or '' for name, kind, categories in attributes if kind == 'date' and name in data
+    }
+    return df
+
+
+def load_kdd_dataset_from_file(file):
+    """Cargar dataset NSL-KDD desde un archivo ARFF subido o almacenado"""
+    return load_arff_dataframe(file)
+
+
+def parse_stratify_columns(stratify):
+    """Normalizar la estratificación a una lista de columnas ('a,b' o ['a', 'b'])"""
+    if not stratify:
+        return []
+    if isinstance(stratify, str):
+        stratify = stratify.split(',')
+    return [col.strip() for col in stratify if col and col.strip()]
+
+
+def _small_codes(codes, n_values):
+    """Reducir el tipo de un array de códigos (acelera la ordenación estable)"""
+    return codes.astype(_codes_dtype(n_values) if n_values < np.iinfo(np.int32).max else np.int64)
+
+
+def _column_codes(series):
+    """Códigos enteros de una columna y número de valores (los ausentes cuentan como un valor más)"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes = series.cat.codes.to_numpy().astype(np.int64)
+        n_values = len(series.cat.categories)
+        if (codes < 0).any():
+            codes[codes < 0] = n_values
+            n_values += 1
+        return codes, n_values
+
+    codes, uniques = pd.factorize(series, use_na_sentinel=False)
+    return codes.astype(np.int64), len(uniques)
+
+
+@timed('split.strata')
+def stratum_codes(df, stratify):
+    """
+    Código de estrato de cada fila y número de estratos.
+    Con varias columnas cada combinación de valores es un estrato.
+    """
+    columns = parse_stratify_columns(stratify)
+    if not columns:
+        return np.zeros(len(df), dtype=np.int8), 1
+
+    missing = [col for col in columns if col not in df.columns]
+    if missing:
+        raise KeyError(f"Columnas de estratificación inexistentes: {', '.join(missing)}")
+
+    combined, n_strata = _column_codes(df[columns[0]])
+    for col in columns[1:]:
+        codes, n_values = _column_codes(df[col])
+        combined = combined * n_values + codes
+        n_strata *= n_values
+        # Compactar solo si hay más combinaciones posibles que filas
+        if n_strata > len(df):
+            combined, uniques = pd.factorize(combined)
+            n_strata = len(uniques)
+
+    return _small_codes(combined, n_strata), n_strata
+
+
+def stratum_labels(df, stratify):
+    """Etiqueta legible del estrato de cada fila ('tcp | normal' con varias columnas)"""
+    columns = parse_stratify_columns(stratify)
+    if len(columns) == 1:
+        return df[columns[0]]
+
+    labels = df[columns[0]].astype(object).fillna('?').astype(str)
+    for col in columns[1:]:
+        labels = labels + ' | ' + df[col].astype(object).fillna('?').astype(str)
+    return labels.astype('category').rename(','.join(columns))
+
+
+def allocate_stratum_counts(counts, fractions):
+    """
+    Reparto exacto de las filas de cada estrato entre los conjuntos.
+    Se redondea por el método del resto mayor; los empates favorecen al primer conjunto.
+    """
+    fractions = np.asarray(fractions, dtype=np.float64)
+    quotas = counts[:, None] * fractions[None, :]
+    allocation = np.floor(quotas).astype(np.int64)
+    missing = counts - allocation.sum(axis=1)
+
+    order = np.argsort(allocation - quotas, axis=1, kind='stable')
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.arange(len(fractions))[None, :].repeat(len(counts), axis=0), axis=1)
+    return allocation + (ranks < missing[:, None])
+
+
+def stratified_assignment(codes, n_strata, fractions=SPLIT_FRACTIONS, rstate=42, shuffle=True):
+    """
+    Repartir las filas entre conjuntos (0, 1, 2...) respetando las proporciones en cada estrato.
+    Devuelve (row_order, parts): el orden de filas usado (permutación o identidad) y el
+    conjunto asignado a cada posición de ese orden.
+    """
+    n_rows = len(codes)
+    if shuffle:
+        row_order = np.random.default_rng(rstate).permutation(n_rows)
+    else:
+        row_order = np.arange(n_rows)
+    return row_order, assign_in_order(codes, n_strata, row_order, fractions)
+
+
+def assign_in_order(codes, n_strata, row_order, fractions=SPLIT_FRACTIONS):
+    """
+    Conjunto de cada posición de row_order: dentro de cada estrato, las primeras filas
+    (en el orden de row_order) a train, las siguientes a validation...
+    """
+    # Posiciones agrupadas por estrato, conservando el orden de row_order dentro de cada uno
+    by_stratum = np.argsort(codes[row_order], kind='stable')
+    counts = np.bincount(codes, minlength=n_strata)
+    allocation = allocate_stratum_counts(counts, fractions)
+
+    n_parts = len(fractions)
+    labels = np.tile(np.arange(n_parts, dtype=np.int8), n_strata)
+    parts = np.empty(len(codes), dtype=np.int8)
+    parts[by_stratum] = np.repeat(labels, allocation.ravel())
+    return parts
+
+
+def assignment_to_indices(row_order, parts, n_parts):
+    """Posiciones int32 de cada conjunto, en el orden (aleatorio u original) de row_order"""
+    selection = np.argsort(parts, kind='stable')
+    totals = np.bincount(parts, minlength=n_parts)
+    positions = row_order[selection].astype(np.int32)
+    return np.split(positions, np.cumsum(totals)[:-1])
+
+
+@timed('split.indices')
+def train_val_test_split_indices(df, rstate=42, shuffle=True, stratify=None):
+    """
+    Posiciones de las filas de train (60%), validation (20%) y test (20%).
+    La estratificación admite una o varias columnas y es exacta incluso para clases con pocas filas.
+    """
+    codes, n_strata = stratum_codes(df, stratify)
+    return split_indices_from_codes(codes, n_strata, rstate=rstate, shuffle=shuffle)
+
+
+@timed('split.indices')
+def split_indices_from_codes(codes, n_strata, rstate=42, shuffle=True):
+    """
+    Posiciones de train/validation/test a partir de códigos de estrato ya calculados.
+    Permite reutilizar la misma agrupación para varias semillas.
+    """
+    row_order, parts = stratified_assignment(
+        codes, n_strata, SPLIT_FRACTIONS, rstate=rstate, shuffle=shuffle)
+    return assignment_to_indices(row_order, parts, len(SPLIT_FRACTIONS))
+
+
+def _mix64(values):
+    """Finalizador de splitmix64 sobre un array uint64 (cada bit de entrada afecta a toda la salida)"""
+    values = values ^ (values >> np.uint64(30))
+    values = values * _MIX_MULTIPLIERS[0]
+    values = values ^ (values >> np.uint64(27))
+    values = values * _MIX_MULTIPLIERS[1]
+    return values ^ (values >> np.uint64(31))
+
+
+def _value_hashes(values):
+    """Hash uint64 de cada valor por su texto (nominales y strings)"""
+    return pd.util.hash_array(np.asarray(values, dtype=object).astype(str), categorize=True)
+
+
+def column_hashes(series):
+    """
+    Hash uint64 de cada valor de una columna que solo depende del valor, no del archivo:
+    los nominales se hashean por su texto (no por el código de categoría, que cambia si
+    cambia la cabecera) y los números como float64 (int32 1 y float64 1.0 coinciden).
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        table = np.append(_value_hashes(series.cat.categories), _MISSING_HASH)
+        # Código -1 (valor ausente) apunta al último elemento
+        return table[series.cat.codes.to_numpy()]
+
+    if pd.api.types.is_numeric_dtype(series):
+        values = series.to_numpy(dtype=np.float64, na_value=np.nan) + 0.0  # -0.0 -> 0.0
+        return np.where(np.isnan(values), _MISSING_HASH, _mix64(values.view(np.uint64)))
+
+    values = series.to_numpy(dtype=object)
+    return np.where(pd.isna(values), _MISSING_HASH, _value_hashes(np.where(pd.isna(values), '', values)))
+
+
+def row_hashes(df, key_columns, seed=0):
+    """Hash uint64 de cada fila a partir de sus columnas clave y la semilla"""
+    row_hash = np.full(len(df), _mix64(np.array([seed & 0xFFFFFFFFFFFFFFFF], dtype=np.uint64))[0])
+    for col in key_columns:
+        row_hash = _mix64(row_hash ^ column_hashes(df[col]))
+    return row_hash
+
+
+def hash_assignment(row_hash, fractions=SPLIT_FRACTIONS):
+    """Conjunto (0, 1, 2...) de cada fila según la fracción [0, 1) que representa su hash"""
+    # 53 bits altos -> fracción uniforme en [0, 1)
+    unit = (row_hash >> np.uint64(11)).astype(np.float64) * 2.0 ** -53
+    bounds = np.cumsum(np.asarray(fractions, dtype=np.float64))[:-1]
+    return np.searchsorted(bounds, unit, side='right').astype(np.int8)
+
+
+@timed('split.indices')
+def hash_split_indices(df, key_columns=None, stratify=None, seed=0, chunk_rows=HASH_CHUNK_ROWS, workers=None):
+    """
+    Posiciones de train/validation/test a partir del hash de las columnas clave de cada
+    fila (todas si no se indican) y la semilla. Los hashes se calculan por bloques en paralelo.
     
-    # Convertir a imagen
+    Sin estratificación el hash decide directamente el conjunto: una fila con la misma
+    clave cae en el mismo conjunto en cualquier versión del dataset (las proporciones
+    son 60/20/20 en media, también dentro de cada estrato). Con estratificación las filas
+    de cada estrato se ordenan por su hash y se cortan con el mismo reparto exacto que el
+    split aleatorio. Los tamaños exactos tienen un coste:
+    - las filas añadidas o quitadas en un estrato desplazan sus cortes, y las filas
+      junto a ellos pasan al conjunto vecino (en la práctica, unas pocas por ciento);
+    - hay que ordenar todos los hashes (O(n log n)) en lugar de compararlos con un umbral.
+    Si importa más la estabilidad que el tamaño exacto de cada estrato, es mejor no
+    estratificar. Las posiciones van en el orden del archivo.
+    """
+    key_columns = parse_stratify_columns(key_columns) or list(df.columns)
+    missing = [col for col in key_columns if col not in df.columns]
+    if missing:
+        raise KeyError(f"Columnas clave inexistentes: {', '.join(missing)}")
+
+    n_rows = len(df)
+    hashes = np.empty(n_rows, dtype=np.uint64)
+
+    def compute(start):
+        hashes[start:start + chunk_rows] = row_hashes(df.iloc[start:start + chunk_rows], key_columns, seed)
+
+    starts = range(0, n_rows, chunk_rows)
+    workers = min(workers or os.cpu_count() or 1, len(starts))
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='split-hash') as executor:
+            list(executor.map(compute, starts))
+    else:
+        for start in starts:
+            compute(start)
+
+    if parse_stratify_columns(stratify):
+        codes, n_strata = stratum_codes(df, stratify)
+        row_order = np.argsort(hashes, kind='stable')
+        parts = np.empty(n_rows, dtype=np.int8)
+        parts[row_order] = assign_in_order(codes, n_strata, row_order)
+    else:
+        parts = hash_assignment(hashes)
+
+    return assignment_to_indices(np.arange(n_rows), parts, len(SPLIT_FRACTIONS))
+
+
+def fold_assignment(codes, n_folds, rstate=42, shuffle=True, stratified=True):
+    """
+    Fold (0..n_folds-1) de cada fila.
+    Con estratificación las filas ordenadas por estrato se reparten de forma circular, de modo
+    que cada estrato y cada fold difieren como mucho en una fila; sin ella se usan bloques contiguos.
+    """
+    n_rows = len(codes)
+    if shuffle:
+        row_order = np.random.default_rng(rstate).permutation(n_rows)
+    else:
+        row_order = np.arange(n_rows)
+
+    folds = np.empty(n_rows, dtype=np.int8)
+    if stratified:
+        by_stratum = row_order[np.argsort(codes[row_order], kind='stable')]
+        folds[by_stratum] = np.arange(n_rows) % n_folds
+    else:
+        folds[row_order] = np.arange(n_rows, dtype=np.int64) * n_folds // max(n_rows, 1)
+    return folds
+
+
+@timed('split.folds')
+def cross_validation_folds(df, n_splits=5, n_repeats=1, rstate=42, shuffle=True, stratify=None):
+    """
+    Asignación de folds para K-fold, K-fold estratificado o K-fold estratificado repetido.
+    Devuelve un array int8 de forma (n_repeats, n_filas).
+    """
+    if not 2 <= n_splits <= np.iinfo(np.int8).max:
+        raise ValueError("El número de folds debe estar entre 2 y 127")
+    if n_splits > len(df):
+        raise ValueError("Hay más folds que filas en el dataset")
+
+    codes, _ = stratum_codes(df, stratify)
+    stratified = bool(parse_stratify_columns(stratify))
+    seeds = np.random.SeedSequence(rstate).spawn(n_repeats)
+
+    folds = np.empty((n_repeats, len(df)), dtype=np.int8)
+    for repeat, seed in enumerate(seeds):
+        folds[repeat] = fold_assignment(codes, n_splits, rstate=seed, shuffle=shuffle, stratified=stratified)
+    return folds
+
+
+def fold_indices(folds, repeat, fold):
+    """Posiciones int32 de train (resto de folds) y test (el fold indicado) de una repetición"""
+    assignment = folds[repeat]
+    return (np.flatnonzero(assignment != fold).astype(np.int32),
+            np.flatnonzero(assignment == fold).astype(np.int32))
+
+
+def serialize_folds(folds):
+    """Guardar una asignación de folds en formato .npy"""
     buffer = io.BytesIO()
-    plt.savefig(buffer, format='png', dpi=150, bbox_inches='tight')
-    buffer.seek(0)
-    plt.close()
-    
-    return buffer
+    np.save(buffer, folds.astype(np.int8), allow_pickle=False)
+    return buffer.getvalue()
 
-def create_comparison_plot(original_df, train_df, val_df, test_df, stratify_column):
-    """Crear gráfica comparativa de distribuciones entre splits"""
-    fig, axes = plt.subplots(2, 2, figsize=(15, 12))
-    fig.suptitle(f'Comparación de Distribuciones - {stratify_column}', fontsize=16)
-    
-    # Dataset original
-    original_counts = original_df[stratify_column].value_counts()
-    axes[0, 0].bar(original_counts.index, original_counts.values, color='blue', alpha=0.7)
-    axes[0, 0].set_title('Dataset Original')
-    axes[0, 0].set_ylabel('Frecuencia')
-    axes[0, 0].tick_params(axis='x', rotation=45)
-    
-    # Training set
-    train_counts = train_df[stratify_column].value_counts()
-    axes[0, 1].bar(train_counts.index, train_counts.values, color='green', alpha=0.7)
-    axes[0, 1].set_title('Training Set')
-    axes[0, 1].tick_params(axis='x', rotation=45)
-    
-    # Validation set
-    val_counts = val_df[stratify_column].value_counts()
-    axes[1, 0].bar(val_counts.index, val_counts.values, color='orange', alpha=0.7)
-    axes[1, 0].set_title('Validation Set')
-    axes[1, 0].set_ylabel('Frecuencia')
-    axes[1, 0].tick_params(axis='x', rotation=45)
-    
-    # Test set
-    test_counts = test_df[stratify_column].value_counts()
-    axes[1, 1].bar(test_counts.index, test_counts.values, color='red', alpha=0.7)
-    axes[1, 1].set_title('Test Set')
-    axes[1, 1].tick_params(axis='x', rotation=45)
-    
-    plt.tight_layout()
-    
-    # Convertir a imagen
+
+def deserialize_folds(fh):
+    """Leer una asignación de folds (n_repeats, filas) desde un archivo .npy"""
+    return np.load(fh, allow_pickle=False)
+
+
+def train_val_test_split(df, rstate=42, shuffle=True, stratify=None):
+    """Dividir el dataset en train (60%), validation (20%) y test (20%)"""
+    indices = train_val_test_split_indices(df, rstate=rstate, shuffle=shuffle, stratify=stratify)
+    return tuple(df.take(idx) for idx in indices)
+
+
+def serialize_split_indices(train_idx, val_idx, test_idx):
+    """Guardar los índices de un split como un único array int32 en formato .npy"""
     buffer = io.BytesIO()
-    plt.savefig(buffer, format='png', dpi=150, bbox_inches='tight')
-    buffer.seek(0)
-    plt.close()
-    
-    return buffer
+    np.save(buffer, np.concatenate([train_idx, val_idx, test_idx]).astype(np.int32), allow_pickle=False)
+    return buffer.getvalue()
 
-def create_column_distribution_plot(df, column_name):
-    """Crear gráfica de distribución para una columna específica"""
-    plt.figure(figsize=(12, 6))
-    
-    if df[column_name].dtype == 'object':
-        # Columna categórica
-        value_counts = df[column_name].value_counts().head(10)  # Top 10
-        bars = plt.bar(value_counts.index, value_counts.values)
-        
-        for bar in bars:
-            height = bar.get_height()
-            plt.text(bar.get_x() + bar.get_width()/2., height,
-                    f'{int(height)}', ha='center', va='bottom')
-        
-        plt.title(f'Distribución de {column_name} (Top 10)')
-        plt.xticks(rotation=45)
+
+def deserialize_split_indices(fh, train_size, validation_size):
+    """Leer un archivo .npy de índices y devolver (train, validation, test)"""
+    positions = np.load(fh, allow_pickle=False)
+    return np.split(positions, [train_size, train_size + validation_size])
+
+
+def _is_categorical_column(series):
+    """Indica si una columna debe tratarse como categórica"""
+    return not pd.api.types.is_numeric_dtype(series) or isinstance(series.dtype, pd.CategoricalDtype)
+
+
+def get_dataset_info(df):
+    """Obtener información básica del dataset"""
+    return {
+        'basic_info': {
+            'shape': list(df.shape),
+            'columns': list(df.columns),
+            'dtypes': {col: str(dtype) for col, dtype in df.dtypes.items()},
+            'memory_usage': int(df.memory_usage(deep=True).sum()),
+        },
+        'null_counts': {col: int(count) for col, count in df.isna().sum().items()},
+    }
+
+
+def get_available_stratification_columns(df):
+    """Obtener columnas candidatas para estratificación"""
+    columns = {}
+    for col in df.columns:
+        series = df[col]
+        unique_values = int(series.nunique())
+
+        if not _is_categorical_column(series) and unique_values > 10:
+            continue
+
+        columns[col] = {
+            'unique_values': unique_values,
+            'recommended': 2 <= unique_values <= 30,
+        }
+
+    return columns
+
+
+def _json_number(value):
+    """Convertir un escalar NumPy a float de Python (None si es NaN)"""
+    value = float(value)
+    return None if np.isnan(value) else value
+
+
+def _column_profile(series, max_value_counts=50):
+    """Perfil estadístico de una columna"""
+    profile = {
+        'dtype': str(series.dtype),
+        'null_count': int(series.isna().sum()),
+        'cardinality': int(series.nunique()),
+    }
+
+    if _is_categorical_column(series):
+        counts = series.value_counts()
+        profile['kind'] = 'nominal'
+        profile['value_counts'] = {str(k): int(v) for k, v in counts.head(max_value_counts).items()}
     else:
-        # Columna numérica
-        plt.hist(df[column_name].dropna(), bins=30, alpha=0.7, edgecolor='black')
-        plt.title(f'Distribución de {column_name}')
-        plt.xlabel(column_name)
-        plt.ylabel('Frecuencia')
-    
-    plt.tight_layout()
-    
-    # Convertir a imagen
-    buffer = io.BytesIO()
-    plt.savefig(buffer, format='png', dpi=150, bbox_inches='tight')
-    buffer.seek(0)
-    plt.close()
-    
-    return buffer
\ No newline at end of file
+        values = series.dropna()
+        quantiles = values.quantile([0.25, 0.5, 0.75]) if len(values) else pd.Series(dtype=float)
+        profile['kind'] = 'numeric'
+        profile['min'] = _json_number(values.min()) if len(values) else None
+        profile['max'] = _json_number(values.max()) if len(values) else None
+        profile['mean'] = _json_number(values.to_numpy().mean(dtype=np.float64)) if len(values) else None
+        profile['std'] = _json_number(values.std()) if len(values) > 1 else None
+        profile['quantiles'] = {f"{int(q * 100)}%": _json_number(v) for q, v in quantiles.items()}
+
+    return profile
+
+
+@timed('dataset.profile')
+def compute_dataset_profile(df):
+    """
+    Calcular el perfil completo del dataset (serializable a JSON).
+    Incluye la información básica, las columnas de estratificación y estadísticas por columna.
+    """
+    return {
+        'info': get_dataset_info(df),
+        'stratification_columns': get_available_stratification_columns(df),
+        'columns': {col: _column_profile(df[col]) for col in df.columns},
+    }
+
+
+def _arff_value(value):
+    """Citar un nombre o valor nominal si es necesario"""
+    value = str(value)
+    if value == '' or re.search(r"[\s,{}%'\"]", value):
+        return "'" + value.replace("\\", "\\\\").replace("'", "\\'") + "'"
+    return value
+
+
+def _arff_type(series, date_format=None):
+    """
+    Tipo ARFF correspondiente a una columna del DataFrame.
+    El texto se escribe como STRING, o como DATE si se leyó de un atributo DATE
+    (date_format es su formato, '' si no lo declaraba).
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return '{' + ','.join(_arff_value(v) for v in series.cat.categories) + '}'
+    if pd.api.types.is_integer_dtype(series):
+        return 'INTEGER'
+    if pd.api.types.is_numeric_dtype(series):
+        return 'REAL'
+    if date_format is not None:
+        return f'DATE {_arff_value(date_format)}' if date_format else 'DATE'
+    return 'STRING'
+
+
+def dataframe_to_arff_header(df, relation):
+    """Generar la cabecera ARFF de un DataFrame"""
+    date_formats = df.attrs.get('date_formats', {})
+    lines = [f"@relation {_arff_value(relation)}", '']
+    for col in df.columns:
+        lines.append(f"@attribute {_arff_value(col)} {_arff_type(df[col], date_formats.get(col))}")
+    lines.extend(['', '@data', ''])
+    return '\n'.join(lines)
+
+
+def _format_number(value):
+    """Representación ARFF de un valor numérico"""
+    if np.isnan(value):
+        return '?'
+    if np.isfinite(value) and float(value).is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _format_numeric_block(values):
+    """Formatear un bloque numérico formateando una sola vez cada valor distinto"""
+    uniques, inverse = np.unique(values, return_inverse=True)
+    table = np.array([_format_number(v) for v in uniques], dtype=object)
+    return table[inverse.reshape(-1)]
+
+
+def _format_string_block(block):
+    """Formatear un bloque de texto citando los valores que lo necesitan"""
+    values = block.astype(object)
+    missing = values.isna()
+    text = values.where(~missing, '').astype(str)
+    needs_quotes = text.str.contains(r"[\s,{}%'\"]", regex=True) | (text == '')
+    quoted = "'" + text.str.replace('\\', '\\\\', regex=False).str.replace("'", "\\'", regex=False) + "'"
+    text = text.where(~needs_quotes, quoted).where(~missing, '?')
+    return text.to_numpy(dtype=object)
+
+
+def _arff_column_formatter(series):
+    """Función que convierte un bloque de la columna en un array de strings ARFF"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # Código -1 (valor ausente) apunta al último elemento: '?'
+        table = np.array([_arff_value(v) for v in series.cat.categories] + ['?'], dtype=object)
+        return lambda block: table[block.cat.codes.to_numpy()]
+    if isinstance(series.dtype, pd.api.extensions.ExtensionDtype) and pd.api.types.is_numeric_dtype(series):
+        # Enteros con nulos: los ausentes pasan a NaN para escribirse como '?'
+        return lambda block: _format_numeric_block(block.to_numpy(dtype=np.float64, na_value=np.nan))
+    if pd.api.types.is_numeric_dtype(series):
+        return lambda block: _format_numeric_block(block.to_numpy())
+    return _format_string_block
+
+
+def _format_arff_rows(block, formatters):
+    """Unir las columnas formateadas de un bloque en líneas @data"""
+    n_rows, n_cols = block.shape
+    grid = np.empty((n_rows, 2 * n_cols), dtype=object)
+    for position, formatter in enumerate(formatters):
+        grid[:, 2 * position] = formatter(block.iloc[:, position])
+    grid[:, 1::2] = ','
+    grid[:, -1] = '\n'
+    return ''.join(grid.ravel().tolist()).encode('utf-8')
+
+
+@timed('arff.serialize')
+def iter_arff_chunks(df, relation, positions=None, chunk_rows=ARFF_WRITE_CHUNK_ROWS):
+    """
+    Serializar un DataFrame como ARFF en bloques de bytes.
+    Si se indican posiciones solo se escriben esas filas, sin copiar el DataFrame completo.
+    """
+    yield dataframe_to_arff_header(df, relation).encode('utf-8')
+
+    if not len(df.columns):
+        return
+
+    formatters = [_arff_column_formatter(df[col]) for col in df.columns]
+    total = len(df) if positions is None else len(positions)
+
+    for start in range(0, total, chunk_rows):
+        if positions is None:
+            block = df.iloc[start:start + chunk_rows]
+        else:
+            block = df.take(positions[start:start + chunk_rows])
+        yield _format_arff_rows(block, formatters)
+
+
+def split_relation(relation, part):
+    """
+    @relation de una parte de un split. Solo depende del dataset, no del nombre del
+    split: los archivos se comparten entre splits idénticos.
+    """
+    return f"{relation or 'dataset'}_{part}"
+
+
+@timed('arff.save')
+def save_dataframe_to_arff(df, name, positions=None, relation=None):
+    """
+    Guardar un DataFrame (o las filas indicadas) como archivo ARFF en el storage y devolver su ruta.
+    El @relation es name salvo que se indique otro.
+    """
+    return save_stream_to_storage(iter_arff_chunks(df, relation or name, positions), f"splits/{name}.arff")
+
+
+def _iter_data_lines(fh, block_size):
+    """Líneas de la sección @data (sin el salto de línea) en listas por bloque"""
+    pending = b''
+    while True:
+        block = fh.read(block_size)
+        if not block:
+            break
+        lines = (pending + block).split(b'\n')
+        pending = lines.pop()
+        yield lines
+    if pending:
+        yield [pending]
+
+
+@timed('arff.route')
+def route_arff_rows(source, part_of_row, parts, block_size=ARFF_ROUTE_BLOCK_BYTES):
+    """
+    Copiar cada fila de @data, tal cual, al archivo de su conjunto.
+    part_of_row indica el conjunto (0, 1, 2...) de cada fila en el orden del archivo y
+    parts el nombre de cada conjunto ('train'...), que se añade al @relation original.
+    Devuelve un archivo temporal por conjunto, con la cabecera original y sus filas en
+    el orden del archivo.
+    La memoria usada no depende del tamaño del archivo, solo del bloque de lectura.
+    """
+    fh, should_close = _open_arff_source(source)
+    outputs = [tempfile.TemporaryFile() for _ in parts]
+    try:
+        relation, _ = read_arff_header(fh)
+        relations = [split_relation(relation, part) for part in parts]
+        data_start = fh.tell()
+        fh.seek(0)
+        header = fh.read(data_start)
+
+        for output, part_relation in zip(outputs, relations):
+            line = f"@relation {_arff_value(part_relation)}".encode('utf-8')
+            output.write(_RELATION_LINE.sub(lambda match: line, header, count=1)
+                         if _RELATION_LINE.search(header) else line + b'\n' + header)
+            if not header.endswith(b'\n'):
+                output.write(b'\n')
+
+        # Mismas filas que cuenta el parser: sin líneas vacías ni comentarios
+        row = 0
+        for lines in _iter_data_lines(fh, block_size):
+            data = [line for line in lines if line.strip() and not line.lstrip().startswith(b'%')]
+            if not data:
+                continue
+            block_parts = part_of_row[row:row + len(data)]
+            if len(block_parts) < len(data):
+                raise ValueError("El archivo tiene más filas que en la primera pasada")
+            data = np.array(data, dtype=object)
+            for position, output in enumerate(outputs):
+                selected = data[block_parts == position]
+                if len(selected):
+                    output.write(b'\n'.join(selected) + b'\n')
+            row += len(data)
+
+        if row != len(part_of_row):
+            raise ValueError("El archivo tiene menos filas que en la primera pasada")
+    except BaseException:
+        for output in outputs:
+            output.close()
+        raise
+    finally:
+        if should_close:
+            fh.close()
+
+    for output in outputs:
+        output.seek(0)
+    return outputs
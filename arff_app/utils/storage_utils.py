@@ -1,31 +1,94 @@
-import os
+import contextvars
+import io
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
 from django.core.files.storage import default_storage
-from django.core.files.base import ContentFile
-import tempfile
+from django.core.files.base import File
 
-def save_file_to_storage(file_content, filename):
+from ..instrumentation import timed
+
+logger = logging.getLogger(__name__)
+
+_write_executor = None
+_write_executor_lock = threading.Lock()
+
+class IterableStream(io.RawIOBase):
     """
-    Guarda un archivo en el sistema de almacenamiento configurado
-    (S3 en producción, sistema de archivos local en desarrollo)
+    Objeto tipo archivo de solo lectura sobre un iterable de bloques de bytes.
+    Permite subir contenido generado al vuelo sin tenerlo entero en memoria.
     """
-    try:
-        # Crear archivo temporal
-        with tempfile.NamedTemporaryFile(delete=False) as temp_file:
-            temp_file.write(file_content)
-            temp_file.flush()
-            
-            # Guardar usando el storage de Django
-            with open(temp_file.name, 'rb') as file:
-                saved_path = default_storage.save(filename, ContentFile(file.read()))
-            
-            # Limpiar archivo temporal
-            os.unlink(temp_file.name)
-            
-            return saved_path
-            
-    except Exception as e:
-        print(f"Error saving file to storage: {e}")
-        raise
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._pending = b''
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self._pending:
+            try:
+                self._pending = memoryview(next(self._chunks))
+            except StopIteration:
+                return 0
+
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+@timed('storage.save_stream')
+def save_stream_to_storage(chunks, filename):
+    """
+    Guarda en el storage el contenido producido por un iterable de bytes,
+    bloque a bloque y sin archivos temporales
+    """
+    stream = io.BufferedReader(IterableStream(chunks), buffer_size=File.DEFAULT_CHUNK_SIZE)
+    return default_storage.save(filename, File(stream, name=filename))
+
+def _get_write_executor():
+    """Pool de hilos compartido para escribir en el storage"""
+    global _write_executor
+    with _write_executor_lock:
+        if _write_executor is None:
+            _write_executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'STORAGE_WRITE_THREADS', 4),
+                thread_name_prefix='storage-write'
+            )
+    return _write_executor
+
+def save_concurrently(writes):
+    """
+    Ejecutar varias escrituras al storage a la vez.
+    writes es un dict nombre -> función sin argumentos que guarda y devuelve la ruta;
+    devuelve un dict nombre -> ruta. El tiempo total es el de la escritura más lenta.
+    Las funciones no deben usar la base de datos (cada hilo abriría su conexión).
+    """
+    if len(writes) <= 1:
+        return {name: write() for name, write in writes.items()}
+
+    # Cada escritura lleva una copia del contexto para que sus fases y bytes
+    # cuenten en el desglose de la petición o el trabajo que la lanzó
+    executor = _get_write_executor()
+    futures = {
+        name: executor.submit(contextvars.copy_context().run, write)
+        for name, write in writes.items()
+    }
+
+    paths, error = {}, None
+    for name, future in futures.items():
+        try:
+            paths[name] = future.result()
+        except Exception as e:
+            error = error or e
+    if error is not None:
+        # No dejar archivos huérfanos si alguna escritura falla
+        for path in paths.values():
+            default_storage.delete(path)
+        raise error
+    return paths
 
 def get_file_from_storage(file_path):
     """
@@ -35,8 +98,8 @@ def get_file_from_storage(file_path):
         if default_storage.exists(file_path):
             return default_storage.open(file_path)
         return None
-    except Exception as e:
-        print(f"Error getting file from storage: {e}")
+    except Exception:
+        logger.exception("Error al obtener %s del storage", file_path)
         return None
 
 def delete_file_from_storage(file_path):
@@ -48,6 +111,6 @@ def delete_file_from_storage(file_path):
             default_storage.delete(file_path)
             return True
         return False
-    except Exception as e:
-        print(f"Error deleting file from storage: {e}")
+    except Exception:
+        logger.exception("Error al eliminar %s del storage", file_path)
         return False
\ No newline at end of file
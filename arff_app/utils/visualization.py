@@ -1,110 +1,114 @@
-import matplotlib
-matplotlib.use('Agg')  # Para evitar problemas con GUI
-import matplotlib.pyplot as plt
-import seaborn as sns
-import pandas as pd
 import io
-from django.core.files.base import ContentFile
-import os
-
-def create_distribution_plot(df, stratify_column):
-    """Crear gráfica de distribución de la columna de estratificación"""
-    plt.figure(figsize=(10, 6))
-    
-    # Gráfica de barras para la distribución
-    value_counts = df[stratify_column].value_counts()
-    bars = plt.bar(value_counts.index, value_counts.values)
-    
-    # Añadir valores en las barras
-    for bar in bars:
-        height = bar.get_height()
-        plt.text(bar.get_x() + bar.get_width()/2., height,
-                f'{int(height)}', ha='center', va='bottom')
-    
-    plt.title(f'Distribución de {stratify_column} - Dataset Completo')
-    plt.xlabel(stratify_column)
-    plt.ylabel('Frecuencia')
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-    
-    # Convertir a imagen
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from ..instrumentation import timed
+
+# Plantillas de figura: tamaño, resolución y estilo de cada tipo de gráfica.
+# Se usan objetos Figure explícitos (sin pyplot), así que varias gráficas
+# pueden renderizarse a la vez desde distintos hilos.
+PLOT_TEMPLATES = {
+    'distribution': {'figsize': (10, 6), 'dpi': 150, 'color': '#1f77b4'},
+    'comparison': {'figsize': (15, 12), 'dpi': 150, 'color': None},
+    'column_distribution': {'figsize': (12, 6), 'dpi': 150, 'color': '#1f77b4'},
+}
+
+COMPARISON_PANELS = [
+    ('original', 'Dataset Original', 'blue'),
+    ('train', 'Training Set', 'green'),
+    ('validation', 'Validation Set', 'orange'),
+    ('test', 'Test Set', 'red'),
+]
+
+def _new_figure(template_name, figsize=None):
+    """
+    Figura nueva con su propio canvas Agg para una plantilla.
+    No se reutilizan entre renders: una figura guardada por hilo mantendría vivo su
+    renderer (varios MB) mientras dure el hilo.
+    """
+    template = PLOT_TEMPLATES[template_name]
+    fig = Figure(figsize=figsize or template['figsize'])
+    FigureCanvasAgg(fig)
+    return fig
+
+
+def _render_png(fig, dpi):
+    """Rasterizar la figura con su propio canvas Agg y devolver el PNG en un buffer"""
     buffer = io.BytesIO()
-    plt.savefig(buffer, format='png', dpi=150, bbox_inches='tight')
+    fig.savefig(buffer, format='png', dpi=dpi, bbox_inches='tight')
     buffer.seek(0)
-    plt.close()
-    
     return buffer
 
-def create_comparison_plot(original_df, train_df, val_df, test_df, stratify_column):
-    """Crear gráfica comparativa de distribuciones entre splits"""
-    fig, axes = plt.subplots(2, 2, figsize=(15, 12))
-    fig.suptitle(f'Comparación de Distribuciones - {stratify_column}', fontsize=16)
-    
-    # Dataset original
-    original_counts = original_df[stratify_column].value_counts()
-    axes[0, 0].bar(original_counts.index, original_counts.values, color='blue', alpha=0.7)
-    axes[0, 0].set_title('Dataset Original')
+
+def _bar_with_labels(ax, labels, counts, color=None):
+    """Barras con el conteo encima de cada una"""
+    bars = ax.bar(labels, counts, color=color)
+    for bar in bars:
+        height = bar.get_height()
+        ax.text(bar.get_x() + bar.get_width() / 2., height,
+                f'{int(height)}', ha='center', va='bottom')
+
+
+@timed('plot.distribution')
+def create_distribution_plot(chart, dpi=None):
+    """Crear gráfica de distribución de la columna de estratificación a partir de sus conteos"""
+    template = PLOT_TEMPLATES['distribution']
+    fig = _new_figure('distribution')
+    ax = fig.add_subplot()
+
+    _bar_with_labels(ax, chart['labels'], chart['original'], template['color'])
+
+    ax.set_title(f"Distribución de {chart['column']} - Dataset Completo")
+    ax.set_xlabel(chart['column'])
+    ax.set_ylabel('Frecuencia')
+    ax.tick_params(axis='x', rotation=45)
+    fig.tight_layout()
+
+    return _render_png(fig, dpi or template['dpi'])
+
+
+@timed('plot.comparison')
+def create_comparison_plot(chart, dpi=None):
+    """Crear gráfica comparativa de distribuciones entre splits a partir de sus conteos"""
+    template = PLOT_TEMPLATES['comparison']
+    fig = _new_figure('comparison')
+    axes = fig.subplots(2, 2)
+    fig.suptitle(f"Comparación de Distribuciones - {chart['column']}", fontsize=16)
+
+    for ax, (key, title, color) in zip(axes.ravel(), COMPARISON_PANELS):
+        ax.bar(chart['labels'], chart[key], color=color, alpha=0.7)
+        ax.set_title(title)
+        ax.tick_params(axis='x', rotation=45)
     axes[0, 0].set_ylabel('Frecuencia')
-    axes[0, 0].tick_params(axis='x', rotation=45)
-    
-    # Training set
-    train_counts = train_df[stratify_column].value_counts()
-    axes[0, 1].bar(train_counts.index, train_counts.values, color='green', alpha=0.7)
-    axes[0, 1].set_title('Training Set')
-    axes[0, 1].tick_params(axis='x', rotation=45)
-    
-    # Validation set
-    val_counts = val_df[stratify_column].value_counts()
-    axes[1, 0].bar(val_counts.index, val_counts.values, color='orange', alpha=0.7)
-    axes[1, 0].set_title('Validation Set')
     axes[1, 0].set_ylabel('Frecuencia')
-    axes[1, 0].tick_params(axis='x', rotation=45)
-    
-    # Test set
-    test_counts = test_df[stratify_column].value_counts()
-    axes[1, 1].bar(test_counts.index, test_counts.values, color='red', alpha=0.7)
-    axes[1, 1].set_title('Test Set')
-    axes[1, 1].tick_params(axis='x', rotation=45)
-    
-    plt.tight_layout()
-    
-    # Convertir a imagen
-    buffer = io.BytesIO()
-    plt.savefig(buffer, format='png', dpi=150, bbox_inches='tight')
-    buffer.seek(0)
-    plt.close()
-    
-    return buffer
 
-def create_column_distribution_plot(df, column_name):
-    """Crear gráfica de distribución para una columna específica"""
-    plt.figure(figsize=(12, 6))
-    
-    if df[column_name].dtype == 'object':
-        # Columna categórica
-        value_counts = df[column_name].value_counts().head(10)  # Top 10
-        bars = plt.bar(value_counts.index, value_counts.values)
-        
-        for bar in bars:
-            height = bar.get_height()
-            plt.text(bar.get_x() + bar.get_width()/2., height,
-                    f'{int(height)}', ha='center', va='bottom')
-        
-        plt.title(f'Distribución de {column_name} (Top 10)')
-        plt.xticks(rotation=45)
+    fig.tight_layout()
+
+    return _render_png(fig, dpi or template['dpi'])
+
+
+@timed('plot.column_distribution')
+def create_column_distribution_plot(chart, dpi=None, figsize=None):
+    """Crear gráfica de distribución de una columna a partir de column_chart_data"""
+    template = PLOT_TEMPLATES['column_distribution']
+    fig = _new_figure('column_distribution', figsize)
+    ax = fig.add_subplot()
+    column_name = chart['column']
+
+    if chart['type'] == 'bar':
+        # Columna categórica: conteos del top de valores
+        _bar_with_labels(ax, chart['labels'], chart['counts'], template['color'])
+        ax.set_title(f'Distribución de {column_name} (Top {len(chart["labels"])})')
+        ax.tick_params(axis='x', rotation=45)
     else:
-        # Columna numérica
-        plt.hist(df[column_name].dropna(), bins=30, alpha=0.7, edgecolor='black')
-        plt.title(f'Distribución de {column_name}')
-        plt.xlabel(column_name)
-        plt.ylabel('Frecuencia')
-    
-    plt.tight_layout()
-    
-    # Convertir a imagen
-    buffer = io.BytesIO()
-    plt.savefig(buffer, format='png', dpi=150, bbox_inches='tight')
-    buffer.seek(0)
-    plt.close()
-    
-    return buffer
\ No newline at end of file
+        # Columna numérica: histograma ya agregado (bordes + conteos)
+        edges = chart['edges']
+        if edges:
+            ax.hist(edges[:-1], bins=edges, weights=chart['counts'], alpha=0.7, edgecolor='black')
+        ax.set_title(f'Distribución de {column_name}')
+        ax.set_xlabel(column_name)
+        ax.set_ylabel('Frecuencia')
+
+    fig.tight_layout()
+
+    return _render_png(fig, dpi or template['dpi'])
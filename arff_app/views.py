@@ -2,32 +2,46 @@ from rest_framework import status
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
-from django.http import FileResponse, HttpResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import content_disposition_header
+from django.http import StreamingHttpResponse, Http404
+from django.conf import settings
 import os
 
-from .models import DatasetFile, DatasetSplit
+from .models import CrossValidation, DatasetFile, DatasetSplit, SplitJob, UploadSession
 from .serializers import (
     DatasetFileSerializer, 
     DatasetSplitSerializer, 
     SplitDatasetSerializer,
-    VisualizationSerializer
-)
-from .utils.dataset_utils import (
-    load_kdd_dataset_from_file,
-    train_val_test_split,
-    get_dataset_info,
-    get_available_stratification_columns,
-    save_dataframe_to_arff
-)
-from .utils.visualization import (
-    create_distribution_plot,
-    create_comparison_plot,
-    create_column_distribution_plot
+    SplitJobSerializer,
+    BatchSplitDatasetSerializer,
+    CrossValidationSerializer,
+    CreateCrossValidationSerializer,
+    VisualizationSerializer,
+    UploadSessionSerializer,
+    CreateUploadSessionSerializer,
+    FinalizeUploadSerializer
 )
+from .utils.dataframe_cache import dataframe_cache, get_dataset_frame
+from .instrumentation import span
+from .jobs import enqueue_split_job, schedule_pending_jobs
+from .filters import DatasetFileFilter, DatasetSplitFilter
+from .pagination import DatasetCursorPagination, SplitCursorPagination
+
+# NumPy, pandas y matplotlib (utils.dataset_utils, utils.chart_data, services...)
+# se importan dentro de las vistas que los usan: listar, borrar o consultar
+# trabajos no necesita cargar la pila científica al arrancar cada worker.
 
 @api_view(['POST'])
 def upload_dataset(request):
     """Endpoint para subir archivos ARFF"""
+    from django.core.files.storage import default_storage
+    from .blobs import hash_file
+    from .models import dataset_upload_path
+    from .services import create_dataset_from_content
+    from .utils.dataset_utils import load_kdd_dataset_from_file
+    
     if 'file' not in request.FILES:
         return Response({
             'status': 'error',
@@ -45,16 +59,19 @@ def upload_dataset(request):
         }, status=status.HTTP_400_BAD_REQUEST)
     
     try:
-        # Cargar dataset para validar
-        df = load_kdd_dataset_from_file(file)
+        # El contenido se identifica por su hash: un archivo ya subido no se guarda
+        # ni se parsea otra vez
+        with span('upload.hash'):
+            digest = hash_file(file)
         
-        # Crear objeto DatasetFile
-        dataset_file = DatasetFile.objects.create(
-            name=name,
-            file=file,
-            rows=len(df),
-            columns=len(df.columns)
-        )
+        # Crear objeto DatasetFile con su perfil y su caché columnar
+        with span('upload.create_dataset'):
+            dataset_file = create_dataset_from_content(
+                name,
+                digest,
+                lambda: default_storage.save(dataset_upload_path(None, file.name), file),
+                lambda path: load_kdd_dataset_from_file(file)
+            )
         
         serializer = DatasetFileSerializer(dataset_file)
         
@@ -70,85 +87,205 @@ def upload_dataset(request):
             'message': f'Error al procesar el archivo ARFF: {str(e)}'
         }, status=status.HTTP_400_BAD_REQUEST)
 
-@api_view(['GET'])
-def list_datasets(request):
-    """Endpoint para listar todos los datasets subidos"""
-    datasets = DatasetFile.objects.all()
-    serializer = DatasetFileSerializer(datasets, many=True)
+@api_view(['POST'])
+def create_upload(request):
+    """Endpoint para iniciar una subida por bloques de un archivo ARFF grande"""
+    from .uploads import UploadError, create_upload_session
+    
+    serializer = CreateUploadSessionSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        session = create_upload_session(**serializer.validated_data)
+    except UploadError as e:
+        return Response({
+            'status': 'error',
+            'message': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
     
     return Response({
         'status': 'success',
-        'datasets': serializer.data,
-        'count': len(serializer.data)
+        'upload': UploadSessionSerializer(session).data
+    }, status=status.HTTP_201_CREATED)
+
+@api_view(['GET', 'DELETE'])
+def upload_status(request, upload_id):
+    """Endpoint para consultar (y reanudar) o cancelar una subida por bloques"""
+    session = get_object_or_404(UploadSession, id=upload_id)
+    
+    if request.method == 'DELETE':
+        session.delete()
+        return Response({
+            'status': 'success',
+            'message': 'Subida cancelada'
+        }, status=status.HTTP_200_OK)
+    
+    return Response({
+        'status': 'success',
+        'upload': UploadSessionSerializer(session).data
+    }, status=status.HTTP_200_OK)
+
+@api_view(['PUT'])
+def upload_chunk(request, upload_id, index):
+    """
+    Endpoint para subir una parte. El cuerpo son los bytes de la parte y la cabecera
+    X-Chunk-SHA256 (opcional) su checksum; la parte se valida al recibirla.
+    """
+    from .uploads import UploadError, store_chunk
+    
+    session = get_object_or_404(UploadSession, id=upload_id)
+    
+    # Leer como máximo el tamaño esperado (+1 para detectar partes demasiado grandes)
+    expected = session.expected_chunk_size(index) if 0 <= index < session.total_chunks else 0
+    with span('upload.read_chunk'):
+        data = request.stream.read(expected + 1) if request.stream is not None else b''
+    
+    try:
+        with span('upload.store_chunk'):
+            session = store_chunk(session, index, data, request.headers.get('X-Chunk-SHA256'))
+    except UploadError as e:
+        return Response({
+            'status': 'error',
+            'message': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    return Response({
+        'status': 'success',
+        'validated_chunks': session.validated_chunks,
+        'validated_rows': session.validated_rows
     }, status=status.HTTP_200_OK)
 
+@api_view(['POST'])
+def finalize_upload_view(request, upload_id):
+    """Endpoint para cerrar una subida por bloques y crear el dataset"""
+    from .uploads import UploadError, finalize_upload
+    
+    session = get_object_or_404(UploadSession, id=upload_id)
+    serializer = FinalizeUploadSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        with span('upload.finalize'):
+            session = finalize_upload(session, serializer.validated_data.get('sha256'))
+    except UploadError as e:
+        return Response({
+            'status': 'error',
+            'message': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        return Response({
+            'status': 'error',
+            'message': f'Error al procesar el archivo ARFF: {str(e)}'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    return Response({
+        'status': 'success',
+        'message': session.message,
+        'dataset': DatasetFileSerializer(session.dataset_file).data
+    }, status=status.HTTP_201_CREATED)
+
+def _requested_fields(request):
+    """Campos pedidos con ?fields=id,name,... (None si se piden todos)"""
+    fields = [f.strip() for f in request.query_params.get('fields', '').split(',') if f.strip()]
+    return fields or None
+
+def _paginated_list(request, queryset, filterset_class, paginator, serializer_class, key):
+    """Filtrar, paginar por cursor y serializar un listado"""
+    filterset = filterset_class(request.query_params, queryset=queryset)
+    if not filterset.is_valid():
+        return Response({
+            'status': 'error',
+            'message': 'Filtros inválidos',
+            'errors': filterset.errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    page = paginator.paginate_queryset(filterset.qs, request)
+    data = serializer_class(page, many=True, fields=_requested_fields(request)).data
+    
+    # Con cursor no se cuenta el total: page_size es el número de elementos de esta página
+    return Response({
+        'status': 'success',
+        key: data,
+        'page_size': len(data),
+        'next': paginator.get_next_link(),
+        'previous': paginator.get_previous_link()
+    }, status=status.HTTP_200_OK)
+
+@api_view(['GET'])
+def list_datasets(request):
+    """
+    Endpoint para listar los datasets subidos.
+    Admite ?name=, ?uploaded_after=, ?uploaded_before=, ?fields= y paginación por cursor.
+    """
+    # El perfil puede ser grande y no se serializa en el listado
+    datasets = DatasetFile.objects.defer('profile')
+    return _paginated_list(
+        request, datasets, DatasetFileFilter, DatasetCursorPagination(), DatasetFileSerializer, 'datasets')
+
 @api_view(['POST'])
 def split_dataset(request):
-    """Endpoint para dividir el dataset"""
+    """Endpoint para encolar la división de un dataset (responde 202 con el trabajo)"""
+    from .services import find_existing_split, validate_hash_columns, validate_stratify_columns
+    
     serializer = SplitDatasetSerializer(data=request.data)
     
     if serializer.is_valid():
         try:
             dataset_file_id = serializer.validated_data['dataset_file_id']
-            stratify_column = serializer.validated_data.get('stratify_column')
-            random_state = serializer.validated_data.get('random_state', 42)
-            shuffle = serializer.validated_data.get('shuffle', True)
-            generate_plots = serializer.validated_data.get('generate_plots', True)
             
             # Obtener dataset file
             dataset_file = get_object_or_404(DatasetFile, id=dataset_file_id)
             
-            # Cargar dataset
-            df = load_kdd_dataset_from_file(dataset_file.file)
+            try:
+                with span('split.validate'):
+                    stratify_column = validate_stratify_columns(
+                        dataset_file, serializer.validated_data.get('stratify_column'))
+                    method = serializer.validated_data.get('method', DatasetSplit.METHOD_RANDOM)
+                    hash_columns = ''
+                    if method == DatasetSplit.METHOD_HASH:
+                        hash_columns = validate_hash_columns(
+                            dataset_file, serializer.validated_data.get('hash_columns'))
+            except ValueError as e:
+                return Response({
+                    'status': 'error',
+                    'message': str(e)
+                }, status=status.HTTP_400_BAD_REQUEST)
             
-            # Dividir dataset
-            train_set, val_set, test_set = train_val_test_split(
-                df, rstate=random_state, shuffle=shuffle, stratify=stratify_column)
+            parameters = {
+                'stratify_column': stratify_column,
+                'random_state': serializer.validated_data.get('random_state', 42),
+                'shuffle': serializer.validated_data.get('shuffle', True),
+                'generate_plots': serializer.validated_data.get('generate_plots', False),
+                'storage_mode': serializer.validated_data.get('storage_mode', DatasetSplit.STORAGE_FILES),
+                'method': method,
+                'hash_columns': hash_columns,
+            }
             
-            # Crear objeto DatasetSplit
-            split_name = f"{dataset_file.name}_split_{DatasetSplit.objects.count() + 1}"
-            dataset_split = DatasetSplit.objects.create(
-                name=split_name,
-                dataset_file=dataset_file,
-                stratify_column=stratify_column,
-                random_state=random_state,
-                shuffle=shuffle,
-                train_size=len(train_set),
-                validation_size=len(val_set),
-                test_size=len(test_set)
-            )
+            # Una división idéntica ya creada se devuelve sin encolar nada
+            with span('split.find_existing'):
+                existing = find_existing_split(dataset_file, **parameters)
+            if existing is not None:
+                return Response({
+                    'status': 'success',
+                    'message': 'División idéntica ya existente',
+                    'reused': True,
+                    'split': DatasetSplitSerializer(existing).data
+                }, status=status.HTTP_200_OK)
             
-            # Guardar splits como archivos ARFF
-            dataset_split.train_file = save_dataframe_to_arff(train_set, f"{split_name}_train")
-            dataset_split.validation_file = save_dataframe_to_arff(val_set, f"{split_name}_validation")
-            dataset_split.test_file = save_dataframe_to_arff(test_set, f"{split_name}_test")
-            
-            # Generar gráficas si se solicita
-            if generate_plots and stratify_column:
-                # Gráfica de distribución
-                dist_plot_buffer = create_distribution_plot(df, stratify_column)
-                dataset_split.distribution_plot.save(
-                    f"{split_name}_distribution.png", 
-                    dist_plot_buffer
-                )
-                
-                # Gráfica comparativa
-                comp_plot_buffer = create_comparison_plot(df, train_set, val_set, test_set, stratify_column)
-                dataset_split.comparison_plot.save(
-                    f"{split_name}_comparison.png", 
-                    comp_plot_buffer
-                )
-            
-            dataset_split.save()
-            
-            response_serializer = DatasetSplitSerializer(dataset_split)
+            with span('split.enqueue'):
+                job = enqueue_split_job(dataset_file, parameters)
             
             return Response({
-                'status': 'success',
-                'message': 'Dataset dividido exitosamente',
-                'split': response_serializer.data
-            }, status=status.HTTP_201_CREATED)
+                'status': 'accepted',
+                'message': 'División en cola',
+                'job': SplitJobSerializer(job).data,
+                'status_url': reverse('split-job-status', args=[job.id])
+            }, status=status.HTTP_202_ACCEPTED)
             
+        except Http404:
+            raise
         except Exception as e:
             return Response({
                 'status': 'error', 
@@ -157,51 +294,200 @@ def split_dataset(request):
     
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-# Añadir esta importación al inicio del archivo
-from django.conf import settings
+@api_view(['POST'])
+def split_dataset_batch(request):
+    """Endpoint para crear varios splits (semillas/estratificaciones) de un dataset en una sola pasada"""
+    from .services import create_dataset_splits_batch
+    
+    serializer = BatchSplitDatasetSerializer(data=request.data)
+    
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    dataset_file = get_object_or_404(DatasetFile, id=serializer.validated_data['dataset_file_id'])
+    
+    try:
+        with span('split.batch'):
+            splits = create_dataset_splits_batch(
+                dataset_file,
+                serializer.validated_data['configurations'],
+                storage_mode=serializer.validated_data['storage_mode']
+            )
+    except ValueError as e:
+        return Response({
+            'status': 'error',
+            'message': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        return Response({
+            'status': 'error',
+            'message': f'Error al dividir el dataset: {str(e)}'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    return Response({
+        'status': 'success',
+        'message': f'{len(splits)} divisiones creadas exitosamente',
+        'splits': DatasetSplitSerializer(splits, many=True).data,
+        'count': len(splits)
+    }, status=status.HTTP_201_CREATED)
 
-# Y actualizar la función download_split_file para producción
 @api_view(['GET'])
+def split_job_status(request, job_id):
+    """
+    Endpoint para consultar el estado y progreso de un trabajo de división.
+    Si sigue pendiente, el pool de este proceso lo recoge en caso de que el proceso
+    que iba a ejecutarlo se haya reiniciado.
+    """
+    job = get_object_or_404(SplitJob.objects.select_related('split__dataset_file'), id=job_id)
+    if job.status in (SplitJob.STATUS_QUEUED, SplitJob.STATUS_RUNNING):
+        schedule_pending_jobs()
+    
+    return Response({
+        'status': 'success',
+        'job': SplitJobSerializer(job).data
+    }, status=status.HTTP_200_OK)
+
+@api_view(['GET', 'HEAD'])
 def download_split_file(request, split_id, file_type):
-    """Endpoint para descargar archivos de splits"""
-    dataset_split = get_object_or_404(DatasetSplit, id=split_id)
+    """
+    Endpoint para descargar archivos de splits.
+    ?format= elige entre arff (por defecto), arff.gz, csv.gz, parquet y npz; el ARFF
+    se comprime con zstd o gzip si el cliente lo acepta en Accept-Encoding.
+    
+    Lo que ya está en el storage (el ARFF de un split guardado como archivos y los
+    formatos ya generados) se sirve con ETag fuerte, 304, Range e If-Range.
+    Lo demás se genera al servirlo, con un ETag débil que permite 304:
+    - GET completo: se envía mientras se genera; los formatos derivados se guardan
+      al terminar, el ARFF de un split guardado como índices nunca se guarda.
+    - HEAD: solo cabeceras, sin generar ni guardar nada.
+    - Range: se genera en un archivo temporal para servir el intervalo, sin guardarlo.
+    """
+    from .blobs import file_digest
+    from .downloads import (
+        DOWNLOAD_FORMATS,
+        IMMUTABLE_CACHE_CONTROL,
+        SPLIT_PARTS,
+        DownloadError,
+        build_split_download,
+        check_download,
+        generated_etag,
+        get_split_artifact,
+        iter_split_arff,
+        negotiate_encoding,
+        serve_file,
+        stream_split_artifact
+    )
     
-    file_mapping = {
-        'train': dataset_split.train_file,
-        'validation': dataset_split.validation_file,
-        'test': dataset_split.test_file
-    }
+    dataset_split = get_object_or_404(DatasetSplit.objects.select_related('dataset_file'), id=split_id)
     
-    if file_type not in file_mapping:
+    if file_type not in SPLIT_PARTS:
         return Response({
             'status': 'error',
             'message': 'Tipo de archivo no válido. Opciones: train, validation, test'
         }, status=status.HTTP_400_BAD_REQUEST)
     
-    file = file_mapping[file_type]
+    fmt = request.query_params.get('format', 'arff')
+    if fmt not in DOWNLOAD_FORMATS:
+        return Response({
+            'status': 'error',
+            'message': f'Formato no válido. Opciones: {", ".join(DOWNLOAD_FORMATS)}'
+        }, status=status.HTTP_400_BAD_REQUEST)
     
-    if not file:
+    try:
+        check_download(dataset_split, file_type, fmt)
+    except DownloadError as e:
         return Response({
             'status': 'error',
-            'message': f'Archivo {file_type} no disponible'
+            'message': str(e)
         }, status=status.HTTP_404_NOT_FOUND)
     
-    # En producción, redirigir a la URL de S3
-    if not settings.DEBUG and hasattr(file, 'url'):
-        return Response({
-            'status': 'success',
-            'download_url': file.url,
-            'filename': file.name
-        }, status=status.HTTP_200_OK)
+    content_type, extension = DOWNLOAD_FORMATS[fmt]
+    filename = f"{dataset_split.name}_{file_type}.{extension}"
+    encoding = negotiate_encoding(request.META.get('HTTP_ACCEPT_ENCODING')) if fmt == 'arff' else None
     
-    # En desarrollo, servir el archivo directamente
-    response = FileResponse(file.open(), as_attachment=True, filename=file.name)
+    if fmt == 'arff' and encoding is None and dataset_split.storage_mode != DatasetSplit.STORAGE_INDICES:
+        # El ARFF guardado al dividir, tal cual
+        file = getattr(dataset_split, f'{file_type}_file')
+        last_modified = dataset_split.created_at
+    else:
+        # Los demás formatos se sirven desde el storage si ya se generaron
+        with span('download.artifact'):
+            artifact = get_split_artifact(dataset_split, file_type, fmt, encoding)
+        
+        if artifact is None:
+            etag = generated_etag(dataset_split, file_type, fmt, encoding)
+            response = get_conditional_response(request, etag=etag)
+            if response is None and 'HTTP_RANGE' in request.META and request.method != 'HEAD':
+                with span('download.build'):
+                    file = build_split_download(dataset_split, file_type, fmt, encoding)
+                response = serve_file(request, file, filename, content_type, etag, content_encoding=encoding)
+            elif response is None:
+                if request.method == 'HEAD':
+                    # Sin cuerpo ni Content-Length: el tamaño no se conoce sin generarlo
+                    response = StreamingHttpResponse(iter(()), content_type=content_type)
+                elif fmt == 'arff' and encoding is None:
+                    # Split guardado como índices: el ARFF se construye bajo demanda
+                    response = StreamingHttpResponse(iter_split_arff(dataset_split, file_type), content_type=content_type)
+                else:
+                    response = StreamingHttpResponse(
+                        stream_split_artifact(dataset_split, file_type, fmt, encoding), content_type=content_type)
+                response['Content-Disposition'] = content_disposition_header(True, filename)
+                response['Accept-Ranges'] = 'bytes'
+                if encoding:
+                    response['Content-Encoding'] = encoding
+            response['ETag'] = etag
+            response['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+            if fmt == 'arff':
+                patch_vary_headers(response, ['Accept-Encoding'])
+            return response
+        
+        file = artifact.file
+        last_modified = artifact.created_at
+    
+    with span('download.etag'):
+        etag = file_digest(file.name)
+    response = serve_file(request, file, filename, content_type, etag, last_modified, content_encoding=encoding)
+    if fmt == 'arff':
+        patch_vary_headers(response, ['Accept-Encoding'])
     return response
 
-@api_view(['POST'])
+def _dataset_columns(dataset_file):
+    """Columnas del dataset según el perfil precalculado (o cargando el archivo)"""
+    if dataset_file.profile:
+        return dataset_file.profile['info']['basic_info']['columns']
+    return list(get_dataset_frame(dataset_file).columns)
+
+def _cached_plot_response(request, plot):
+    """Servir un PNG cacheado con ETag/Last-Modified, 304 y Range"""
+    from .downloads import serve_file
+    
+    # La gráfica de una columna se vuelve a renderizar si cambia el archivo del dataset
+    return serve_file(
+        request, plot.image, f"{plot.column_name}_distribution.png", 'image/png', plot.etag, plot.created_at,
+        immutable=False)
+
+def _split_plot_response(request, dataset_split, plot_type):
+    """Servir una gráfica PNG guardada de un split (no cambia nunca)"""
+    from .blobs import file_digest
+    from .downloads import serve_file
+    
+    image = getattr(dataset_split, f'{plot_type}_plot')
+    return serve_file(
+        request, image, f"{dataset_split.name}_{plot_type}.png", 'image/png', file_digest(image.name),
+        dataset_split.created_at, as_attachment=False)
+
+@api_view(['GET', 'POST'])
 def generate_visualizations(request):
-    """Endpoint para generar visualizaciones"""
-    serializer = VisualizationSerializer(data=request.data)
+    """
+    Endpoint de visualizaciones.
+    Por defecto devuelve los datos agregados en JSON para dibujarlos en el navegador;
+    con output='png' exporta la imagen (GET admite caché HTTP condicional).
+    """
+    from .services import get_or_render_column_plot
+    from .utils.chart_data import column_chart_data
+    
+    data = request.data if request.method == 'POST' else request.query_params
+    serializer = VisualizationSerializer(data=data)
     
     if serializer.is_valid():
         try:
@@ -209,25 +495,53 @@ def generate_visualizations(request):
             split_id = serializer.validated_data.get('split_id')
             column_name = serializer.validated_data.get('column_name')
             plot_type = serializer.validated_data.get('plot_type', 'all')
+            as_png = serializer.validated_data['output'] == 'png'
             
             if dataset_file_id:
                 dataset_file = get_object_or_404(DatasetFile, id=dataset_file_id)
-                df = load_kdd_dataset_from_file(dataset_file.file)
                 
-                if column_name and column_name in df.columns:
-                    # Gráfica de distribución de columna específica
-                    plot_buffer = create_column_distribution_plot(df, column_name)
-                    response = HttpResponse(plot_buffer.getvalue(), content_type='image/png')
-                    response['Content-Disposition'] = f'attachment; filename="{column_name}_distribution.png"'
-                    return response
+                if column_name and column_name in _dataset_columns(dataset_file) and not as_png:
+                    # Conteos o histograma de la columna para dibujar en el navegador
+                    with span('dataset.frame'):
+                        df = get_dataset_frame(dataset_file)
+                    return Response({
+                        'status': 'success',
+                        'chart': column_chart_data(df, column_name)
+                    }, status=status.HTTP_200_OK)
+                
+                elif column_name and column_name in _dataset_columns(dataset_file):
+                    # Exportación PNG de la columna (cacheada en el storage)
+                    with span('plot.get_or_render'):
+                        plot = get_or_render_column_plot(
+                            dataset_file,
+                            column_name,
+                            dpi=serializer.validated_data['dpi'],
+                            width=serializer.validated_data['width'],
+                            height=serializer.validated_data['height']
+                        )
+                    return _cached_plot_response(request, plot)
                 
             elif split_id:
                 dataset_split = get_object_or_404(DatasetSplit, id=split_id)
+                chart_data = dataset_split.chart_data
+                
+                if not as_png and chart_data:
+                    if plot_type == 'distribution':
+                        chart = {
+                            'type': 'bar',
+                            'column': chart_data['column'],
+                            'labels': chart_data['labels'],
+                            'counts': chart_data['original'],
+                            'total': sum(chart_data['original'])
+                        }
+                    else:
+                        chart = chart_data
+                    return Response({'status': 'success', 'chart': chart}, status=status.HTTP_200_OK)
                 
                 if plot_type == 'distribution' and dataset_split.distribution_plot:
-                    return FileResponse(dataset_split.distribution_plot.open(), content_type='image/png')
+                    return _split_plot_response(request, dataset_split, 'distribution')
                 elif plot_type == 'comparison' and dataset_split.comparison_plot:
-                    return FileResponse(dataset_split.comparison_plot.open(), content_type='image/png')
+                    return _split_plot_response(request, dataset_split, 'comparison')
             
             return Response({
                 'status': 'error',
@@ -244,15 +558,19 @@ def generate_visualizations(request):
 
 @api_view(['GET'])
 def list_splits(request):
-    """Endpoint para listar todas las divisiones"""
-    splits = DatasetSplit.objects.all()
-    serializer = DatasetSplitSerializer(splits, many=True)
+    """
+    Endpoint para listar las divisiones.
+    Admite ?dataset=, ?stratify_column=, ?storage_mode=, ?method=, ?created_after=, ?created_before=,
+    ?fields= y paginación por cursor.
+    """
+    splits = DatasetSplit.objects.select_related('dataset_file').defer('dataset_file__profile')
     
-    return Response({
-        'status': 'success',
-        'splits': serializer.data,
-        'count': len(serializer.data)
-    }, status=status.HTTP_200_OK)
+    fields = _requested_fields(request)
+    if fields is not None and 'chart_data' not in fields:
+        splits = splits.defer('chart_data')
+    
+    return _paginated_list(
+        request, splits, DatasetSplitFilter, SplitCursorPagination(), DatasetSplitSerializer, 'splits')
 
 @api_view(['GET'])
 def get_split_detail(request, split_id):
@@ -279,19 +597,27 @@ def delete_split(request, split_id):
 @api_view(['GET'])
 def dataset_info(request, dataset_id):
     """Endpoint para obtener información de un dataset específico"""
+    from .utils.dataset_utils import compute_dataset_profile
+    
     dataset_file = get_object_or_404(DatasetFile, id=dataset_id)
     
     try:
-        df = load_kdd_dataset_from_file(dataset_file.file)
-        info = get_dataset_info(df)
-        stratification_columns = get_available_stratification_columns(df)
+        # Datasets anteriores al perfil precalculado: calcularlo una sola vez
+        if dataset_file.profile is None:
+            with span('dataset.frame'):
+                df = get_dataset_frame(dataset_file)
+            dataset_file.profile = compute_dataset_profile(df)
+            dataset_file.save(update_fields=['profile'])
+        
+        profile = dataset_file.profile
         
         return Response({
             'status': 'success',
             'dataset_id': dataset_id,
             'dataset_name': dataset_file.name,
-            'info': info,
-            'stratification_columns': stratification_columns
+            'info': profile['info'],
+            'stratification_columns': profile['stratification_columns'],
+            'columns': profile['columns']
         }, status=status.HTTP_200_OK)
         
     except Exception as e:
@@ -299,3 +625,118 @@ def dataset_info(request, dataset_id):
             'status': 'error',
             'message': f'Error al obtener información del dataset: {str(e)}'
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['GET'])
+def cache_stats(request):
+    """Endpoint para consultar los contadores de la caché de DataFrames del worker"""
+    return Response({
+        'status': 'success',
+        'pid': os.getpid(),
+        'dataset_access_mode': getattr(settings, 'DATASET_ACCESS_MODE', 'memory'),
+        'dataframe_cache': dataframe_cache.stats()
+    }, status=status.HTTP_200_OK)
+
+@api_view(['POST'])
+def create_cross_validation_view(request):
+    """Endpoint para generar una validación cruzada (K-fold, estratificada o repetida)"""
+    from .services import create_cross_validation
+    
+    serializer = CreateCrossValidationSerializer(data=request.data)
+    
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    data = dict(serializer.validated_data)
+    dataset_file = get_object_or_404(DatasetFile, id=data.pop('dataset_file_id'))
+    
+    try:
+        with span('cross_validation.create'):
+            cross_validation = create_cross_validation(dataset_file, **data)
+    except ValueError as e:
+        return Response({
+            'status': 'error',
+            'message': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        return Response({
+            'status': 'error',
+            'message': f'Error al generar la validación cruzada: {str(e)}'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    return Response({
+        'status': 'success',
+        'message': 'Validación cruzada generada exitosamente',
+        'cross_validation': CrossValidationSerializer(cross_validation).data
+    }, status=status.HTTP_201_CREATED)
+
+@api_view(['GET'])
+def list_cross_validations(request):
+    """Endpoint para listar las validaciones cruzadas"""
+    cross_validations = CrossValidation.objects.select_related('dataset_file')
+    serializer = CrossValidationSerializer(cross_validations, many=True)
+    
+    return Response({
+        'status': 'success',
+        'cross_validations': serializer.data,
+        'count': len(serializer.data)
+    }, status=status.HTTP_200_OK)
+
+@api_view(['GET'])
+def get_cross_validation_detail(request, cv_id):
+    """Endpoint para obtener los detalles de una validación cruzada"""
+    cross_validation = get_object_or_404(CrossValidation.objects.select_related('dataset_file'), id=cv_id)
+    
+    return Response({
+        'status': 'success',
+        'cross_validation': CrossValidationSerializer(cross_validation).data
+    }, status=status.HTTP_200_OK)
+
+@api_view(['DELETE'])
+def delete_cross_validation(request, cv_id):
+    """Endpoint para eliminar una validación cruzada"""
+    cross_validation = get_object_or_404(CrossValidation, id=cv_id)
+    cross_validation.delete()
+    
+    return Response({
+        'status': 'success',
+        'message': 'Validación cruzada eliminada exitosamente'
+    }, status=status.HTTP_200_OK)
+
+@api_view(['GET'])
+def download_fold_file(request, cv_id, repeat, fold, file_type):
+    """Endpoint para descargar el train o test de un fold, generado bajo demanda"""
+    from .utils.dataset_utils import deserialize_folds, fold_indices, iter_arff_chunks
+    
+    cross_validation = get_object_or_404(CrossValidation.objects.select_related('dataset_file'), id=cv_id)
+    
+    if file_type not in ('train', 'test'):
+        return Response({
+            'status': 'error',
+            'message': 'Tipo de archivo no válido. Opciones: train, test'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    if repeat >= cross_validation.n_repeats or fold >= cross_validation.n_splits:
+        return Response({
+            'status': 'error',
+            'message': f'Fold no válido: repetición 0-{cross_validation.n_repeats - 1}, fold 0-{cross_validation.n_splits - 1}'
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    if not cross_validation.folds_file:
+        return Response({
+            'status': 'error',
+            'message': 'Asignación de folds no disponible'
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    with span('cross_validation.load_folds'):
+        with cross_validation.folds_file.open('rb') as fh:
+            folds = deserialize_folds(fh)
+    train_idx, test_idx = fold_indices(folds, repeat, fold)
+    positions = train_idx if file_type == 'train' else test_idx
+    
+    filename = f"{cross_validation.name}_r{repeat}_f{fold}_{file_type}"
+    with span('dataset.frame'):
+        df = get_dataset_frame(cross_validation.dataset_file)
+    response = StreamingHttpResponse(
+        iter_arff_chunks(df, filename, positions), content_type='text/plain; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}.arff"'
+    return response
@@ -24,11 +24,13 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'rest_framework',
+    'django_filters',
     'corsheaders',
     'arff_app',
 ]
 
 MIDDLEWARE = [
+    'arff_app.instrumentation.InstrumentationMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
@@ -40,7 +42,7 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
-ROOT_URLCONF = 'nsl_kdd_api.urls'
+ROOT_URLCONF = 'arff_project.urls'
 
 TEMPLATES = [
     {
@@ -58,7 +60,7 @@ TEMPLATES = [
     },
 ]
 
-WSGI_APPLICATION = 'nsl_kdd_api.wsgi.application'
+WSGI_APPLICATION = 'arff_project.wsgi.application'
 
 DATABASES = {
     'default': dj_database_url.config(
@@ -96,6 +98,48 @@ STATICFILES_DIRS = [
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Storage de datasets, splits y gráficas: S3 o compatible (MinIO con AWS_S3_ENDPOINT_URL)
+# si hay bucket configurado; si no, el sistema de archivos local en MEDIA_ROOT.
+# Ambos backends cuentan los bytes leídos y escritos (arff_app.storage_backends).
+AWS_STORAGE_BUCKET_NAME = config('AWS_STORAGE_BUCKET_NAME', default='')
+STORAGES = {
+    'default': {
+        'BACKEND': 'arff_app.storage_backends.InstrumentedFileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+if AWS_STORAGE_BUCKET_NAME:
+    from botocore.config import Config
+
+    STORAGES = {
+        'default': {
+            'BACKEND': 'arff_app.storage_backends.InstrumentedS3Storage',
+            'OPTIONS': {
+                'bucket_name': AWS_STORAGE_BUCKET_NAME,
+                'endpoint_url': config('AWS_S3_ENDPOINT_URL', default=None),
+                'region_name': config('AWS_S3_REGION_NAME', default=None),
+                'access_key': config('AWS_ACCESS_KEY_ID', default=None),
+                'secret_key': config('AWS_SECRET_ACCESS_KEY', default=None),
+                # Cada hilo reutiliza su cliente y su pool de conexiones HTTP: el pool
+                # debe admitir al menos las escrituras simultáneas (STORAGE_WRITE_THREADS).
+                # MinIO y otros compatibles suelen necesitar addressing_style='path'.
+                'client_config': Config(
+                    s3={'addressing_style': config('AWS_S3_ADDRESSING_STYLE', default='auto')},
+                    max_pool_connections=config('AWS_S3_MAX_POOL_CONNECTIONS', default=10, cast=int),
+                    retries={'max_attempts': 3, 'mode': 'standard'},
+                ),
+                'file_overwrite': False,
+                'default_acl': None,
+                'querystring_auth': True,
+            },
+        },
+        'staticfiles': {
+            'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+        },
+    }
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
@@ -107,6 +151,8 @@ REST_FRAMEWORK = {
         'rest_framework.parsers.MultiPartParser',
         'rest_framework.parsers.FormParser',
     ],
+    # Solo se devuelve JSON: ?format= se reserva para el formato de las descargas
+    'URL_FORMAT_OVERRIDE': None,
 }
 
 CORS_ALLOWED_ORIGINS = [
@@ -125,12 +171,53 @@ if not DEBUG:
 DATA_UPLOAD_MAX_MEMORY_SIZE = 10485760
 FILE_UPLOAD_MAX_MEMORY_SIZE = 10485760
 
+# Tamaño de cada parte en las subidas por bloques (/api/uploads/), sin límite de tamaño total
+UPLOAD_CHUNK_SIZE = config('UPLOAD_CHUNK_SIZE', default=4194304, cast=int)
+
+# Presupuesto en bytes de la caché de DataFrames en memoria de cada worker
+DATAFRAME_CACHE_MAX_BYTES = config('DATAFRAME_CACHE_MAX_BYTES', default=268435456, cast=int)
+
+# Acceso a los datos de los datasets: 'memory' carga las columnas en la memoria de
+# cada worker; 'mmap' las abre con numpy.memmap y todos los workers comparten una sola
+# copia en la caché de páginas (para datasets de varios GB con poca RAM).
+# Con S3 las columnas se copian una vez por máquina a COLUMNAR_MMAP_DIR (disco local).
+DATASET_ACCESS_MODE = config('DATASET_ACCESS_MODE', default='memory')
+COLUMNAR_MMAP_DIR = config('COLUMNAR_MMAP_DIR', default=os.path.join(BASE_DIR, 'columnar_mmap'))
+
+# Hilos por worker que ejecutan los trabajos de división en segundo plano.
+# Con 0 los trabajos solo los procesa `python manage.py run_split_worker`.
+SPLIT_JOB_THREADS = config('SPLIT_JOB_THREADS', default=2, cast=int)
+
+# Un trabajo 'running' sin avances durante este tiempo (p. ej. porque se reinició el
+# proceso que lo ejecutaba) vuelve a la cola, hasta SPLIT_JOB_MAX_ATTEMPTS veces
+SPLIT_JOB_LEASE_SECONDS = config('SPLIT_JOB_LEASE_SECONDS', default=600, cast=int)
+SPLIT_JOB_MAX_ATTEMPTS = config('SPLIT_JOB_MAX_ATTEMPTS', default=3, cast=int)
+
+# Escrituras simultáneas al storage al crear varios artefactos (los ARFF de un split
+# y sus gráficas PNG, que se renderizan en el mismo hilo que las guarda)
+STORAGE_WRITE_THREADS = config('STORAGE_WRITE_THREADS', default=4, cast=int)
+
+# Métricas Prometheus en /metrics (por proceso), solo accesibles desde estas IPs
+METRICS_ALLOWED_IPS = config(
+    'METRICS_ALLOWED_IPS', default='127.0.0.1,::1', cast=lambda v: [ip.strip() for ip in v.split(',') if ip.strip()])
+
+# Las peticiones más lentas que esto (ms) guardan un perfil de pyinstrument en
+# SLOW_REQUEST_PROFILE_DIR. Con 0 (por defecto) no se perfila nada.
+SLOW_REQUEST_PROFILE_MS = config('SLOW_REQUEST_PROFILE_MS', default=0, cast=int)
+SLOW_REQUEST_PROFILE_DIR = config('SLOW_REQUEST_PROFILE_DIR', default=os.path.join(BASE_DIR, 'profiles'))
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
+    'formatters': {
+        'simple': {
+            'format': '%(asctime)s %(levelname)s %(name)s: %(message)s',
+        },
+    },
     'handlers': {
         'console': {
             'class': 'logging.StreamHandler',
+            'formatter': 'simple',
         },
     },
     'root': {
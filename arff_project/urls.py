@@ -4,9 +4,12 @@ from django.views.generic import TemplateView
 from django.conf import settings
 from django.conf.urls.static import static
 
+from arff_app.instrumentation import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('api/', include('dataset_splitter.urls')),
+    path('api/', include('arff_app.urls')),
+    path('metrics', metrics_view, name='metrics'),
     # Servir el frontend para cualquier otra ruta
     re_path(r'^.*$', TemplateView.as_view(template_name='index.html')),
 ]
@@ -0,0 +1,41 @@
+"""
+Settings de los benchmarks: la configuración real con base de datos y storage
+propios en BENCHMARK_WORKDIR, para no tocar los datos de desarrollo.
+"""
+import os
+
+from arff_project.settings import *  # noqa: F401,F403
+
+WORKDIR = os.environ['BENCHMARK_WORKDIR']
+
+DEBUG = False
+ALLOWED_HOSTS = ['testserver', 'localhost', '127.0.0.1']
+SECURE_SSL_REDIRECT = False
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(WORKDIR, 'db.sqlite3'),
+        # Varios hilos del benchmark de concurrencia escriben a la vez
+        'OPTIONS': {'timeout': 30},
+    }
+}
+MEDIA_ROOT = os.path.join(WORKDIR, 'media')
+STATIC_ROOT = os.path.join(WORKDIR, 'static')
+os.makedirs(STATIC_ROOT, exist_ok=True)
+
+# Sin perfilado de peticiones lentas ni una línea de log por petición
+SLOW_REQUEST_PROFILE_MS = 0
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'root': {
+        'handlers': ['console'],
+        'level': 'WARNING',
+    },
+}
@@ -0,0 +1,65 @@
+"""
+Comparar dos resultados de benchmarks/pipeline.py (p. ej. el commit base y el actual).
+
+Para cada medición común compara la mediana (y el p95 de las mezclas concurrentes):
+una proporción > 1 es más lenta. Termina con código 1 si alguna empeora más que
+--threshold, para poder usarlo en CI.
+
+Uso:
+    python benchmarks/compare.py base.json actual.json [--threshold 0.10]
+"""
+import argparse
+import json
+import sys
+
+# Métricas comparadas: en todas, menor es mejor
+METRICS = ('median', 'p95')
+
+
+def compare(base, current, threshold):
+    """Filas (nombre, métrica, base, actual, proporción, empeora)"""
+    rows = []
+    for name in sorted(set(base['results']) & set(current['results'])):
+        for metric in METRICS:
+            before = base['results'][name].get(metric)
+            after = current['results'][name].get(metric)
+            if not before or after is None:
+                continue
+            ratio = after / before
+            rows.append((name, metric, before, after, ratio, ratio > 1 + threshold))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('base')
+    parser.add_argument('current')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='Empeoramiento relativo tolerado (0.10 = 10%%)')
+    args = parser.parse_args()
+
+    with open(args.base) as fh:
+        base = json.load(fh)
+    with open(args.current) as fh:
+        current = json.load(fh)
+
+    for label, report in (('base', base), ('actual', current)):
+        env = report['environment']
+        dirty = ' (con cambios sin commit)' if env.get('dirty') else ''
+        print(f"{label:<7} {env.get('commit') or '?'}{dirty}  python {env['python']}  "
+              f"numpy {env['numpy']}  pandas {env['pandas']}  {env['cpus']} CPU")
+
+    rows = compare(base, current, args.threshold)
+    print(f"\n{'medición':<28} {'métrica':<7} {'base':>10} {'actual':>10} {'cambio':>8}")
+    for name, metric, before, after, ratio, regressed in rows:
+        flag = '  <-- más lento' if regressed else ''
+        print(f"{name:<28} {metric:<7} {before * 1000:>8.1f}ms {after * 1000:>8.1f}ms {ratio - 1:>+8.1%}{flag}")
+
+    regressions = [row for row in rows if row[-1]]
+    if regressions:
+        print(f'\n{len(regressions)} mediciones empeoran más de un {args.threshold:.0%}')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
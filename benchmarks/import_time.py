@@ -0,0 +1,99 @@
+"""
+Benchmark del tiempo de arranque de un worker.
+
+Cada medición se hace en un intérprete nuevo: se mide django.setup() más la
+importación de las URLs de la app (lo que hace gunicorn al cargar la WSGI) y
+qué librerías pesadas quedaron cargadas. Después se mide el coste de importar
+cada librería por separado.
+
+Uso:
+    python benchmarks/import_time.py [--repeat 5] [--json salida.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = [
+    'numpy', 'pandas', 'matplotlib', 'matplotlib.pyplot', 'seaborn', 'sklearn',
+    # Solo necesarios con el backend S3 (AWS_STORAGE_BUCKET_NAME)
+    'boto3', 'botocore', 'storages.backends.s3',
+]
+
+BOOT_SNIPPET = """
+import json, sys, time
+start = time.perf_counter()
+import django
+django.setup()
+setup = time.perf_counter()
+import arff_app.urls
+end = time.perf_counter()
+print(json.dumps({
+    'django_setup': setup - start,
+    'app_urls': end - setup,
+    'total': end - start,
+    'loaded': [m for m in %r if m in sys.modules],
+}))
+""" % (HEAVY_MODULES,)
+
+MODULE_SNIPPET = """
+import json, time
+start = time.perf_counter()
+import %s
+print(json.dumps({'total': time.perf_counter() - start}))
+"""
+
+
+def run_snippet(code):
+    """Ejecutar código en un intérprete nuevo y devolver su salida JSON"""
+    env = dict(os.environ)
+    env.setdefault('DJANGO_SETTINGS_MODULE', 'arff_project.settings')
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [ROOT, env.get('PYTHONPATH')]))
+    output = subprocess.run(
+        [sys.executable, '-c', code], cwd=ROOT, env=env, check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def measure(code, repeat):
+    """Mediana y mínimo de varias ejecuciones en frío"""
+    runs = [run_snippet(code) for _ in range(repeat)]
+    totals = [run['total'] for run in runs]
+    result = dict(runs[-1])
+    result.update({'total_median': statistics.median(totals), 'total_min': min(totals)})
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--json', help='Guardar los resultados en este archivo')
+    args = parser.parse_args()
+
+    results = {'boot': measure(BOOT_SNIPPET, args.repeat), 'modules': {}}
+    for module in HEAVY_MODULES:
+        try:
+            results['modules'][module] = measure(MODULE_SNIPPET % module, args.repeat)['total_median']
+        except subprocess.CalledProcessError:
+            results['modules'][module] = None
+
+    boot = results['boot']
+    print(f"Arranque del worker: {boot['total_median'] * 1000:.0f} ms (mediana de {args.repeat})")
+    print(f"  django.setup():    {boot['django_setup'] * 1000:.0f} ms")
+    print(f"  arff_app.urls:     {boot['app_urls'] * 1000:.0f} ms")
+    print(f"  librerías cargadas: {', '.join(boot['loaded']) or 'ninguna'}")
+    print('Importación aislada de cada librería:')
+    for module, seconds in results['modules'].items():
+        print(f"  {module:<20} {'no instalado' if seconds is None else f'{seconds * 1000:.0f} ms'}")
+
+    if args.json:
+        with open(args.json, 'w') as fh:
+            json.dump(results, fh, indent=2)
+
+
+if __name__ == '__main__':
+    main()
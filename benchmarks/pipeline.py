@@ -0,0 +1,344 @@
+"""
+Benchmark del pipeline de división sobre datasets sintéticos con el esquema de NSL-KDD.
+
+Para cada tamaño se genera (o se reutiliza) un ARFF con benchmarks/synthetic_kdd.py
+y se mide:
+  - load, profile, split, split_hash, arff_write y plot_render: las funciones de arff_app.utils
+    llamadas directamente, con filas/s y MB/s;
+  - upload, split_job y download: los endpoints de extremo a extremo con el cliente
+    de pruebas de Django (la división incluye esperar al trabajo en segundo plano);
+  - read_mix@N: latencia (p50/p95/p99) y rendimiento de una mezcla de peticiones
+    de lectura lanzadas desde N hilos a la vez.
+
+Todo se ejecuta contra una base de datos y un storage temporales (bench_settings).
+Los resultados se guardan en JSON con el commit y las versiones de las librerías;
+benchmarks/compare.py compara dos de esos archivos.
+
+Uso:
+    python benchmarks/pipeline.py --rows 10000,100000,1000000 [--repeat 3]
+        [--concurrency 1,4,8] [--requests 64] [--endpoint-max-rows 1000000]
+        [--data-dir DIR] [--json salida.json]
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCHMARKS_DIR)
+
+DEFAULT_DATA_DIR = os.path.join(tempfile.gettempdir(), 'arff-benchmarks')
+
+
+def setup_django(workdir):
+    """Configurar Django con la base de datos y el storage del benchmark"""
+    sys.path[:0] = [ROOT, BENCHMARKS_DIR]
+    os.environ['DJANGO_SETTINGS_MODULE'] = 'bench_settings'
+    os.environ['BENCHMARK_WORKDIR'] = workdir
+
+    import django
+    from django.core.management import call_command
+
+    django.setup()
+    call_command('migrate', verbosity=0)
+
+
+def dataset_path(data_dir, rows, seed):
+    """ARFF sintético de `rows` filas, generado solo la primera vez"""
+    from synthetic_kdd import write_synthetic_kdd
+
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, f'nsl_kdd_{rows}_s{seed}.arff')
+    if not os.path.exists(path):
+        print(f'Generando {path}...', flush=True)
+        write_synthetic_kdd(path + '.tmp', rows, seed)
+        os.replace(path + '.tmp', path)
+    return path
+
+
+def summarize(seconds, rows=None, nbytes=None):
+    """Mediana y mínimo de varias ejecuciones, con filas/s y MB/s sobre la mediana"""
+    median = statistics.median(seconds)
+    result = {'median': median, 'min': min(seconds), 'runs': seconds}
+    if rows is not None and median > 0:
+        result['rows_per_s'] = rows / median
+    if nbytes is not None and median > 0:
+        result['mb_per_s'] = nbytes / median / 1024 ** 2
+    return result
+
+
+def timeit(func, repeat):
+    """Tiempos de `repeat` llamadas y el resultado de la última"""
+    seconds, value = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        value = func()
+        seconds.append(time.perf_counter() - start)
+    return seconds, value
+
+
+def bench_functions(path, rows, repeat):
+    """Fases del pipeline llamando directamente a las utilidades"""
+    from arff_app.utils.chart_data import split_chart_data
+    from arff_app.utils.dataset_utils import (
+        compute_dataset_profile,
+        hash_split_indices,
+        iter_arff_chunks,
+        load_kdd_dataset_from_file,
+        train_val_test_split_indices
+    )
+    from arff_app.utils.visualization import create_comparison_plot, create_distribution_plot
+
+    file_size = os.path.getsize(path)
+    results = {}
+
+    seconds, df = timeit(lambda: load_kdd_dataset_from_file(path), repeat)
+    results['load'] = summarize(seconds, rows, file_size)
+
+    seconds, _ = timeit(lambda: compute_dataset_profile(df), repeat)
+    results['profile'] = summarize(seconds, rows)
+
+    seconds, indices = timeit(lambda: train_val_test_split_indices(df, stratify='class'), repeat)
+    results['split'] = summarize(seconds, rows)
+
+    seconds, _ = timeit(
+        lambda: train_val_test_split_indices(df, stratify='protocol_type,service,flag,class'), repeat)
+    results['split_multi'] = summarize(seconds, rows)
+
+    # Hash de todas las columnas, estratificado
+    seconds, _ = timeit(lambda: hash_split_indices(df, stratify='class'), repeat)
+    results['split_hash'] = summarize(seconds, rows)
+
+    # Serializar las tres partes sin escribirlas (solo el coste de formatear)
+    def write_arff():
+        return sum(len(chunk) for part in indices for chunk in iter_arff_chunks(df, 'bench', part))
+
+    seconds, nbytes = timeit(write_arff, repeat)
+    results['arff_write'] = summarize(seconds, rows, nbytes)
+
+    def render_plots():
+        chart = split_chart_data(df, 'class', indices)
+        images = [create_distribution_plot(chart), create_comparison_plot(chart)]
+        return sum(image.getbuffer().nbytes for image in images)
+
+    seconds, _ = timeit(render_plots, repeat)
+    results['plot_render'] = summarize(seconds)
+    return results
+
+
+def _consume(response):
+    """Leer todo el cuerpo (las descargas son streaming) y devolver su tamaño"""
+    if response.streaming:
+        return sum(len(chunk) for chunk in response.streaming_content)
+    return len(response.content)
+
+
+def _check(response, expected, what):
+    if response.status_code != expected:
+        raise RuntimeError(f'{what}: HTTP {response.status_code} {response.content[:300]!r}')
+    return response
+
+
+def _wait_for_job(client, status_url, timeout=3600):
+    """Esperar a que termine un trabajo de división y devolver el split"""
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        job = _check(client.get(status_url), 200, 'estado del trabajo').json()['job']
+        if job['status'] == 'done':
+            return job['split']
+        if job['status'] == 'failed':
+            raise RuntimeError(f"Trabajo de división fallido: {job['message']}")
+        time.sleep(0.02)
+    raise RuntimeError('El trabajo de división no terminó a tiempo')
+
+
+def bench_read_mix(urls, concurrency, total_requests):
+    """Latencias y rendimiento de una mezcla de GET desde `concurrency` hilos"""
+    from django.db import connection
+    from django.test import Client
+
+    latencies, errors = [], []
+    lock = threading.Lock()
+
+    def worker(offset):
+        client = Client()
+        own = []
+        try:
+            for i in range(offset, total_requests, concurrency):
+                start = time.perf_counter()
+                response = client.get(urls[i % len(urls)])
+                _consume(response)
+                own.append(time.perf_counter() - start)
+                if response.status_code != 200:
+                    errors.append(response.status_code)
+        finally:
+            connection.close()
+        with lock:
+            latencies.extend(own)
+
+    threads = [threading.Thread(target=worker, args=(offset,)) for offset in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+
+    def percentile(q):
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))]
+
+    return {
+        'median': statistics.median(latencies),
+        'p95': percentile(0.95),
+        'p99': percentile(0.99),
+        'requests': len(latencies),
+        'errors': len(errors),
+        'throughput_rps': len(latencies) / elapsed,
+    }
+
+
+def bench_endpoints(path, rows, repeat, concurrency_levels, total_requests):
+    """Endpoints de extremo a extremo con el cliente de pruebas de Django"""
+    from django.test import Client
+    from arff_app.models import DatasetFile
+    from arff_app.utils.dataframe_cache import dataframe_cache
+
+    client = Client()
+    results = {}
+
+    # Cada subida parte de cero: el contenido ya subido se deduplicaría por hash
+    seconds = []
+    for _ in range(repeat):
+        for dataset_file in DatasetFile.objects.all():
+            dataset_file.delete()
+        dataframe_cache.clear()
+        with open(path, 'rb') as fh:
+            start = time.perf_counter()
+            response = client.post('/api/datasets/upload/', {'file': fh})
+            seconds.append(time.perf_counter() - start)
+        dataset = _check(response, 201, 'subida').json()['dataset']
+    results['upload'] = summarize(seconds, rows, os.path.getsize(path))
+
+    # Una semilla distinta en cada ejecución para no reutilizar splits idénticos
+    seconds, split = [], None
+    for run in range(repeat):
+        start = time.perf_counter()
+        response = _check(client.post('/api/splits/create/', {
+            'dataset_file_id': dataset['id'],
+            'stratify_column': 'class',
+            'random_state': 1000 + run,
+        }, content_type='application/json'), 202, 'división')
+        split = _wait_for_job(client, response.json()['status_url'])
+        seconds.append(time.perf_counter() - start)
+    results['split_job'] = summarize(seconds, rows)
+
+    seconds, nbytes = timeit(
+        lambda: _consume(_check(client.get(f"/api/splits/{split['id']}/download/train/"), 200, 'descarga')),
+        repeat)
+    results['download'] = summarize(seconds, rows, nbytes)
+
+    urls = [
+        f"/api/datasets/{dataset['id']}/info/",
+        f"/api/visualizations/generate/?dataset_file_id={dataset['id']}&column_name=service",
+        '/api/splits/?fields=id,name,train_size',
+        f"/api/splits/{split['id']}/",
+        f"/api/splits/{split['id']}/download/validation/",
+        f"/api/visualizations/generate/?split_id={split['id']}&plot_type=distribution",
+    ]
+    for concurrency in concurrency_levels:
+        results[f'read_mix@{concurrency}'] = bench_read_mix(urls, concurrency, total_requests)
+    return results
+
+
+def environment():
+    """Commit y versiones, para saber qué se está comparando"""
+    import numpy
+    import pandas
+    from django.conf import settings
+
+    def git(*args):
+        try:
+            return subprocess.run(
+                ['git', *args], cwd=ROOT, check=True, capture_output=True, text=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    return {
+        'commit': git('rev-parse', 'HEAD'),
+        'dirty': bool(git('status', '--porcelain', '--untracked-files=no')),
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'numpy': numpy.__version__,
+        'pandas': pandas.__version__,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'dataset_access_mode': settings.DATASET_ACCESS_MODE,
+    }
+
+
+def _int_list(value):
+    return [int(item) for item in value.split(',') if item.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=_int_list, default=[10000, 100000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--concurrency', type=_int_list, default=[1, 4, 8])
+    parser.add_argument('--requests', type=int, default=64, help='Peticiones por nivel de concurrencia')
+    parser.add_argument('--endpoint-max-rows', type=int, default=1000000,
+                        help='Los endpoints solo se miden hasta este tamaño')
+    parser.add_argument('--data-dir', default=DEFAULT_DATA_DIR, help='Dónde guardar los ARFF generados')
+    parser.add_argument('--json', help='Guardar los resultados en este archivo')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='arff-bench-')
+    try:
+        setup_django(workdir)
+        report = {
+            'environment': environment(),
+            'parameters': {k: v for k, v in vars(args).items() if k not in ('json', 'data_dir')},
+            'results': {},
+        }
+
+        for rows in args.rows:
+            path = dataset_path(args.data_dir, rows, args.seed)
+            print(f'== {rows} filas ({os.path.getsize(path) / 1024 ** 2:.1f} MB)', flush=True)
+
+            phases = bench_functions(path, rows, args.repeat)
+            if rows <= args.endpoint_max_rows:
+                phases.update(bench_endpoints(path, rows, args.repeat, args.concurrency, args.requests))
+
+            for name, result in phases.items():
+                report['results'][f'{rows}/{name}'] = result
+                extra = ''
+                if 'rows_per_s' in result:
+                    extra += f"  {result['rows_per_s']:>12,.0f} filas/s"
+                if 'mb_per_s' in result:
+                    extra += f"  {result['mb_per_s']:>8.1f} MB/s"
+                if 'throughput_rps' in result:
+                    extra += f"  p95 {result['p95'] * 1000:.1f} ms  {result['throughput_rps']:.1f} req/s"
+                    if result['errors']:
+                        extra += f"  {result['errors']} errores"
+                print(f"  {name:<14} {result['median'] * 1000:>10.1f} ms{extra}", flush=True)
+
+        if args.json:
+            with open(args.json, 'w') as fh:
+                json.dump(report, fh, indent=2)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
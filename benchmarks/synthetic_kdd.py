@@ -0,0 +1,186 @@
+"""
+Generador de archivos ARFF sintéticos con el esquema de NSL-KDD.
+
+Mismas 41 características y atributo class que KDDTrain+.arff: protocol_type,
+service y flag nominales, land/logged_in/is_host_login/is_guest_login nominales
+{'0','1'} y el resto numéricas. Las frecuencias de protocolos, servicios, flags
+y clases siguen aproximadamente las de KDDTrain+ (53% normal / 47% anomaly) y
+las anomalías se concentran en las conexiones S0/REJ, como en el original.
+
+El archivo se escribe por bloques, así que sirve de 10k a varios millones de
+filas con memoria constante. Con la misma semilla el contenido es idéntico.
+
+Uso:
+    python benchmarks/synthetic_kdd.py salida.arff --rows 1000000 [--seed 0]
+"""
+import argparse
+import numpy as np
+import pandas as pd
+
+PROTOCOLS = {'tcp': 0.815, 'udp': 0.119, 'icmp': 0.066}
+
+# Servicios más frecuentes de KDDTrain+; el resto se reparte entre los demás
+TOP_SERVICES = {
+    'http': 0.320, 'private': 0.173, 'domain_u': 0.072, 'smtp': 0.058, 'ftp_data': 0.055,
+    'eco_i': 0.036, 'other': 0.035, 'ecr_i': 0.024, 'telnet': 0.019, 'finger': 0.014,
+}
+OTHER_SERVICES = [
+    'IRC', 'X11', 'Z39_50', 'aol', 'auth', 'bgp', 'courier', 'csnet_ns', 'ctf', 'daytime',
+    'discard', 'domain', 'echo', 'efs', 'exec', 'ftp', 'gopher', 'harvest', 'hostnames',
+    'http_2784', 'http_443', 'http_8001', 'imap4', 'iso_tsap', 'klogin', 'kshell', 'ldap',
+    'link', 'login', 'mtp', 'name', 'netbios_dgm', 'netbios_ns', 'netbios_ssn', 'netstat',
+    'nnsp', 'nntp', 'ntp_u', 'pm_dump', 'pop_2', 'pop_3', 'printer', 'red_i', 'remote_job',
+    'rje', 'shell', 'sql_net', 'ssh', 'sunrpc', 'supdup', 'systat', 'tftp_u', 'tim_i',
+    'time', 'urh_i', 'urp_i', 'uucp', 'uucp_path', 'vmnet', 'whois',
+]
+
+FLAGS = {
+    'SF': 0.594, 'S0': 0.277, 'REJ': 0.089, 'RSTR': 0.019, 'RSTO': 0.012, 'S1': 0.003,
+    'SH': 0.002, 'S2': 0.001, 'RSTOS0': 0.001, 'S3': 0.001, 'OTH': 0.001,
+}
+
+# Probabilidad de anomalía según el flag (S0 y REJ son casi siempre ataques);
+# con estas probabilidades la proporción global queda cerca del 47%
+ANOMALY_BY_FLAG = {'SF': 0.16, 'S0': 0.98, 'REJ': 0.80}
+ANOMALY_OTHER_FLAGS = 0.60
+
+BINARY_COLUMNS = {'land', 'logged_in', 'is_host_login', 'is_guest_login'}
+
+COLUMNS = [
+    'duration', 'protocol_type', 'service', 'flag', 'src_bytes', 'dst_bytes', 'land',
+    'wrong_fragment', 'urgent', 'hot', 'num_failed_logins', 'logged_in', 'num_compromised',
+    'root_shell', 'su_attempted', 'num_root', 'num_file_creations', 'num_shells',
+    'num_access_files', 'num_outbound_cmds', 'is_host_login', 'is_guest_login', 'count',
+    'srv_count', 'serror_rate', 'srv_serror_rate', 'rerror_rate', 'srv_rerror_rate',
+    'same_srv_rate', 'diff_srv_rate', 'srv_diff_host_rate', 'dst_host_count',
+    'dst_host_srv_count', 'dst_host_same_srv_rate', 'dst_host_diff_srv_rate',
+    'dst_host_same_src_port_rate', 'dst_host_srv_diff_host_rate', 'dst_host_serror_rate',
+    'dst_host_srv_serror_rate', 'dst_host_rerror_rate', 'dst_host_srv_rerror_rate', 'class',
+]
+
+CHUNK_ROWS = 100000
+
+
+def _service_probabilities():
+    """Servicios y probabilidades: los frecuentes y el resto a partes iguales"""
+    names = list(TOP_SERVICES) + OTHER_SERVICES
+    rest = (1 - sum(TOP_SERVICES.values())) / len(OTHER_SERVICES)
+    return names, np.array(list(TOP_SERVICES.values()) + [rest] * len(OTHER_SERVICES))
+
+
+def _choice(rng, values, size):
+    """Valores nominales con las probabilidades de un dict valor -> frecuencia"""
+    names = list(values)
+    p = np.array(list(values.values()))
+    return np.array(names, dtype=object)[rng.choice(len(names), size=size, p=p / p.sum())]
+
+
+def arff_header(relation='KDDTrain'):
+    """Cabecera ARFF con el esquema de NSL-KDD"""
+    services, _ = _service_probabilities()
+    nominal = {
+        'protocol_type': list(PROTOCOLS),
+        'service': services,
+        'flag': list(FLAGS),
+        'class': ['normal', 'anomaly'],
+    }
+    lines = [f"@relation '{relation}'", '']
+    for col in COLUMNS:
+        if col in nominal:
+            values = ','.join(f"'{value}'" for value in nominal[col])
+            lines.append(f"@attribute '{col}' {{{values}}}")
+        elif col in BINARY_COLUMNS:
+            lines.append(f"@attribute '{col}' {{'0','1'}}")
+        else:
+            lines.append(f"@attribute '{col}' real")
+    lines.append('@data')
+    return '\n'.join(lines) + '\n'
+
+
+def generate_chunk(rng, rows):
+    """DataFrame con `rows` conexiones sintéticas"""
+    services, service_p = _service_probabilities()
+    flag = _choice(rng, FLAGS, rows)
+
+    anomaly_p = np.full(rows, ANOMALY_OTHER_FLAGS)
+    for name, p in ANOMALY_BY_FLAG.items():
+        anomaly_p[flag == name] = p
+    anomaly = rng.random(rows) < anomaly_p
+
+    def rate(high_when_anomaly):
+        # Tasas con dos decimales, altas en los ataques de tipo DoS/probe
+        base = rng.beta(0.3, 3.0, rows)
+        value = np.where(anomaly & high_when_anomaly, 1 - base, base)
+        return np.round(value, 2)
+
+    serror = np.isin(flag, ['S0', 'S1', 'S2', 'S3', 'RSTOS0'])
+    rerror = np.isin(flag, ['REJ', 'RSTR', 'RSTO'])
+    data = {
+        'duration': np.where(rng.random(rows) < 0.92, 0, rng.lognormal(4, 2, rows).astype(np.int64)),
+        'protocol_type': _choice(rng, PROTOCOLS, rows),
+        'service': np.array(services, dtype=object)[rng.choice(len(services), size=rows, p=service_p)],
+        'flag': flag,
+        'src_bytes': np.where(anomaly & serror, 0, rng.lognormal(5.5, 2.2, rows).astype(np.int64)),
+        'dst_bytes': np.where(anomaly, 0, rng.lognormal(6.5, 2.5, rows).astype(np.int64)),
+        'land': (rng.random(rows) < 0.0002).astype(np.int8),
+        'wrong_fragment': np.where(rng.random(rows) < 0.009, rng.integers(1, 4, rows), 0),
+        'urgent': np.where(rng.random(rows) < 0.0001, 1, 0),
+        'hot': np.where(rng.random(rows) < 0.02, rng.integers(1, 30, rows), 0),
+        'num_failed_logins': np.where(rng.random(rows) < 0.001, rng.integers(1, 5, rows), 0),
+        'logged_in': ((~anomaly) & (rng.random(rows) < 0.7)).astype(np.int8),
+        'num_compromised': np.where(rng.random(rows) < 0.01, rng.integers(1, 10, rows), 0),
+        'root_shell': (rng.random(rows) < 0.0013).astype(np.int8),
+        'su_attempted': (rng.random(rows) < 0.0006).astype(np.int8),
+        'num_root': np.where(rng.random(rows) < 0.005, rng.integers(1, 10, rows), 0),
+        'num_file_creations': np.where(rng.random(rows) < 0.002, rng.integers(1, 20, rows), 0),
+        'num_shells': (rng.random(rows) < 0.0004).astype(np.int8),
+        'num_access_files': np.where(rng.random(rows) < 0.003, rng.integers(1, 5, rows), 0),
+        'num_outbound_cmds': np.zeros(rows, dtype=np.int8),
+        'is_host_login': (rng.random(rows) < 0.00001).astype(np.int8),
+        'is_guest_login': (rng.random(rows) < 0.009).astype(np.int8),
+        'count': np.where(anomaly, rng.integers(100, 512, rows), rng.integers(1, 30, rows)),
+        'srv_count': np.where(anomaly & serror, rng.integers(1, 30, rows), rng.integers(1, 60, rows)),
+        'serror_rate': rate(serror),
+        'srv_serror_rate': rate(serror),
+        'rerror_rate': rate(rerror),
+        'srv_rerror_rate': rate(rerror),
+        'same_srv_rate': np.round(np.where(anomaly, rng.beta(1, 6, rows), rng.beta(8, 1, rows)), 2),
+        'diff_srv_rate': np.round(rng.beta(0.5, 8, rows), 2),
+        'srv_diff_host_rate': np.round(rng.beta(0.4, 4, rows), 2),
+        'dst_host_count': np.where(anomaly, 255, rng.integers(1, 256, rows)),
+        'dst_host_srv_count': np.where(anomaly, rng.integers(1, 30, rows), rng.integers(1, 256, rows)),
+        'dst_host_same_srv_rate': np.round(np.where(anomaly, rng.beta(1, 8, rows), rng.beta(6, 1, rows)), 2),
+        'dst_host_diff_srv_rate': np.round(rng.beta(0.5, 6, rows), 2),
+        'dst_host_same_src_port_rate': np.round(rng.beta(0.4, 2, rows), 2),
+        'dst_host_srv_diff_host_rate': np.round(rng.beta(0.3, 6, rows), 2),
+        'dst_host_serror_rate': rate(serror),
+        'dst_host_srv_serror_rate': rate(serror),
+        'dst_host_rerror_rate': rate(rerror),
+        'dst_host_srv_rerror_rate': rate(rerror),
+        'class': np.where(anomaly, 'anomaly', 'normal'),
+    }
+    return pd.DataFrame(data, columns=COLUMNS)
+
+
+def write_synthetic_kdd(path, rows, seed=0, chunk_rows=CHUNK_ROWS):
+    """Escribir un ARFF sintético de `rows` filas por bloques"""
+    rng = np.random.default_rng(seed)
+    with open(path, 'w', encoding='utf-8', newline='\n') as fh:
+        fh.write(arff_header())
+        for start in range(0, rows, chunk_rows):
+            block = generate_chunk(rng, min(chunk_rows, rows - start))
+            fh.write(block.to_csv(header=False, index=False, lineterminator='\n'))
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('path')
+    parser.add_argument('--rows', type=int, default=125973)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    write_synthetic_kdd(args.path, args.rows, args.seed)
+
+
+if __name__ == '__main__':
+    main()
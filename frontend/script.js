@@ -4,6 +4,14 @@ const API_BASE_URL = '/api';
 // Estado global
 let currentDatasets = [];
 let currentSplits = [];
+let datasetsNextPage = null;
+let selectedFile = null;
+let splitsNextPage = null;
+
+// Campos que muestran las tablas (el resto no se pide al servidor)
+const DATASET_LIST_FIELDS = 'id,name,rows,columns,uploaded_at';
+const SPLIT_LIST_FIELDS = 'id,name,dataset_file_name,stratify_column,train_size,validation_size,test_size,' +
+    'created_at,distribution_plot_url,comparison_plot_url';
 
 // Inicialización
 document.addEventListener('DOMContentLoaded', function() {
@@ -62,10 +70,8 @@ function handleFileSelect(file) {
         return;
     }
     
-    if (file.size > 10 * 1024 * 1024) {
-        showNotification('El archivo es demasiado grande. Máximo 10MB.', 'error');
-        return;
-    }
+    // Sin límite de tamaño: los archivos se suben por bloques
+    selectedFile = file;
     
     const uploadPlaceholder = document.getElementById('upload-placeholder');
     const fileInfo = document.getElementById('file-info');
@@ -86,6 +92,7 @@ function clearFile() {
     const datasetNameInput = document.getElementById('dataset-name');
     
     fileInput.value = '';
+    selectedFile = null;
     uploadPlaceholder.style.display = 'block';
     fileInfo.style.display = 'none';
     uploadBtn.disabled = true;
@@ -93,6 +100,12 @@ function clearFile() {
 }
 
 // Funciones de API
+// Convertir el enlace 'next' de la paginación en un endpoint para apiCall
+function toApiEndpoint(link) {
+    const url = new URL(link, window.location.origin);
+    return url.pathname.replace(/^\/api/, '') + url.search;
+}
+
 async function apiCall(endpoint, options = {}) {
     const url = `${API_BASE_URL}${endpoint}`;
     
@@ -137,53 +150,134 @@ async function apiCall(endpoint, options = {}) {
 }
 
 // Funciones de datasets
+// Subida por bloques: cada parte se envía con su checksum y la subida se puede
+// reanudar (se guarda el id de la sesión en localStorage por archivo)
+const UPLOAD_PARALLEL_CHUNKS = 3;
+
+function uploadResumeKey(file) {
+    return `arff-upload:${file.name}:${file.size}:${file.lastModified}`;
+}
+
+async function sha256Hex(buffer) {
+    // crypto.subtle solo existe en contextos seguros (https o localhost)
+    if (!window.crypto || !window.crypto.subtle) {
+        return null;
+    }
+    const digest = await window.crypto.subtle.digest('SHA-256', buffer);
+    return Array.from(new Uint8Array(digest)).map(b => b.toString(16).padStart(2, '0')).join('');
+}
+
+async function uploadRequest(endpoint, options = {}) {
+    const response = await fetch(`${API_BASE_URL}${endpoint}`, options);
+    let data;
+    try {
+        data = await response.json();
+    } catch (e) {
+        data = { message: `Error ${response.status}: ${response.statusText}` };
+    }
+    if (!response.ok) {
+        throw new Error(data.message || data.detail || 'Error al subir el archivo');
+    }
+    return data;
+}
+
+async function getOrCreateUploadSession(file, name) {
+    const resumeId = localStorage.getItem(uploadResumeKey(file));
+    if (resumeId) {
+        try {
+            const data = await uploadRequest(`/uploads/${resumeId}/`);
+            if (data.upload.status === 'open') {
+                return data.upload;
+            }
+        } catch (e) {
+            // La sesión ya no existe: se empieza de nuevo
+        }
+        localStorage.removeItem(uploadResumeKey(file));
+    }
+    
+    const data = await uploadRequest('/uploads/', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ filename: file.name, name: name, total_size: file.size })
+    });
+    localStorage.setItem(uploadResumeKey(file), data.upload.id);
+    return data.upload;
+}
+
 async function uploadDataset() {
     const fileInput = document.getElementById('file-input');
     const datasetNameInput = document.getElementById('dataset-name');
     
-    if (!fileInput.files.length) {
+    const file = selectedFile || fileInput.files[0];
+    if (!file) {
         showNotification('Selecciona un archivo primero', 'error');
         return;
     }
     
-    const file = fileInput.files[0];
-    const formData = new FormData();
-    formData.append('file', file);
-    formData.append('name', datasetNameInput.value || file.name.replace('.arff', ''));
+    const name = datasetNameInput.value || file.name.replace('.arff', '');
     
     try {
         showLoading(true);
-        const response = await fetch(`${API_BASE_URL}/datasets/upload/`, {
-            method: 'POST',
-            body: formData
-        });
+        const upload = await getOrCreateUploadSession(file, name);
         
-        let data;
-        try {
-            data = await response.json();
-        } catch (e) {
-            data = { message: `Error ${response.status}: ${response.statusText}` };
+        // Solo se envían las partes que el servidor aún no tiene
+        const received = new Set(upload.received_chunks);
+        const pending = [];
+        for (let index = 0; index < upload.total_chunks; index++) {
+            if (!received.has(index)) {
+                pending.push(index);
+            }
         }
         
-        if (!response.ok) {
-            throw new Error(data.message || data.detail || 'Error al subir el archivo');
-        }
+        let done = upload.total_chunks - pending.length;
+        const sendNext = async () => {
+            while (pending.length) {
+                const index = pending.shift();
+                const start = index * upload.chunk_size;
+                const buffer = await file.slice(start, Math.min(start + upload.chunk_size, file.size)).arrayBuffer();
+                const checksum = await sha256Hex(buffer);
+                
+                await uploadRequest(`/uploads/${upload.id}/chunks/${index}/`, {
+                    method: 'PUT',
+                    headers: {
+                        'Content-Type': 'application/octet-stream',
+                        ...(checksum ? { 'X-Chunk-SHA256': checksum } : {})
+                    },
+                    body: buffer
+                });
+                done++;
+                showNotification(`Subiendo ${file.name}: ${Math.round((done * 100) / upload.total_chunks)}%`, 'info');
+            }
+        };
+        await Promise.all(Array.from({ length: UPLOAD_PARALLEL_CHUNKS }, sendNext));
+        
+        await uploadRequest(`/uploads/${upload.id}/finalize/`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({})
+        });
+        localStorage.removeItem(uploadResumeKey(file));
         
         showNotification('Dataset subido exitosamente', 'success');
         clearFile();
         loadDatasets();
         
     } catch (error) {
-        showNotification(error.message, 'error');
+        showNotification(`${error.message}. Vuelve a pulsar "Subir Dataset" para reanudar.`, 'error');
     } finally {
         showLoading(false);
     }
 }
 
-async function loadDatasets() {
+async function loadDatasets(append = false) {
     try {
-        const data = await apiCall('/datasets/');
-        currentDatasets = data.datasets || [];
+        const endpoint = append && datasetsNextPage
+            ? toApiEndpoint(datasetsNextPage)
+            : `/datasets/?fields=${DATASET_LIST_FIELDS}`;
+        const data = await apiCall(endpoint);
+        currentDatasets = append ? currentDatasets.concat(data.datasets || []) : (data.datasets || []);
+        datasetsNextPage = data.next || null;
+        document.getElementById('datasets-more-btn').style.display = datasetsNextPage ? 'inline-block' : 'none';
         renderDatasetsTable();
         updateSplitDatasetSelect();
         
@@ -287,6 +381,9 @@ async function splitDataset() {
     const randomState = document.getElementById('random-state');
     const shuffle = document.getElementById('shuffle');
     const generatePlots = document.getElementById('generate-plots');
+    const storageMode = document.getElementById('storage-mode');
+    const splitMethod = document.getElementById('split-method');
+    const hashColumns = document.getElementById('hash-columns');
     
     if (!datasetSelect.value) {
         showNotification('Selecciona un dataset primero', 'error');
@@ -304,7 +401,10 @@ async function splitDataset() {
         stratify_column: stratifyColumn.value || null,
         random_state: parseInt(randomState.value) || 42,
         shuffle: shuffle.checked,
-        generate_plots: generatePlots.checked
+        generate_plots: generatePlots.checked,
+        storage_mode: storageMode.value,
+        method: splitMethod.value,
+        hash_columns: hashColumns.value.trim()
     };
     
     try {
@@ -314,20 +414,100 @@ async function splitDataset() {
             body: JSON.stringify(payload)
         });
         
-        showNotification('Dataset dividido exitosamente', 'success');
-        loadSplits();
         stratifyColumn.value = '';
         document.getElementById('split-btn').disabled = true;
         
+        // Una división idéntica ya existente se devuelve al momento, sin trabajo en cola
+        if (data.reused) {
+            showNotification('División idéntica ya existente', 'success');
+            setSplitStatus(`División idéntica ya existente: ${data.split.name}`);
+            showSplit(data.split);
+            return;
+        }
+        
+        showNotification('División en cola...', 'info');
+        setSplitStatus('División en cola...');
+        
+        const job = await pollSplitJob(data.job.id);
+        
+        if (job.status === 'done') {
+            showNotification('Dataset dividido exitosamente', 'success');
+            setSplitStatus('Dataset dividido exitosamente');
+            loadSplits();
+        } else {
+            const message = job.message || 'Error al dividir el dataset';
+            showNotification(message, 'error');
+            setSplitStatus(message, true);
+        }
+        
     } catch (error) {
         console.error('Error splitting dataset:', error);
+        const message = error.message || 'Error al dividir el dataset';
+        showNotification(message, 'error');
+        setSplitStatus(message, true);
+    }
+}
+
+// Estado del último trabajo de división bajo el formulario (no desaparece como las notificaciones)
+function setSplitStatus(message, isError = false) {
+    const status = document.getElementById('split-status');
+    status.textContent = message;
+    status.className = `job-status${isError ? ' error' : ''}`;
+}
+
+// Tiempo máximo esperando un trabajo de división antes de dejar de consultarlo
+const SPLIT_JOB_TIMEOUT_MS = 30 * 60 * 1000;
+
+// Consultar el estado de un trabajo de división hasta que termine (o se agote el tiempo)
+async function pollSplitJob(jobId, intervalMs = 1000, timeoutMs = SPLIT_JOB_TIMEOUT_MS) {
+    const deadline = Date.now() + timeoutMs;
+    while (true) {
+        if (Date.now() > deadline) {
+            throw new Error('La división no terminó a tiempo. Sigue en segundo plano: consulta la lista de divisiones más tarde.');
+        }
+        
+        let response;
+        try {
+            response = await fetch(`${API_BASE_URL}/splits/jobs/${jobId}/`);
+        } catch (error) {
+            throw new Error('No se pudo consultar el estado de la división. Verifica tu conexión.');
+        }
+        const data = await response.json().catch(() => ({}));
+        
+        if (!response.ok) {
+            throw new Error(data.message || data.detail || `Error ${response.status}: ${response.statusText}`);
+        }
+        
+        const job = data.job;
+        if (job.status === 'done' || job.status === 'failed') {
+            return job;
+        }
+        
+        const progress = `Dividiendo dataset: ${job.progress}% - ${job.message || 'En cola'}`;
+        showNotification(progress, 'info');
+        setSplitStatus(progress);
+        await new Promise(resolve => setTimeout(resolve, intervalMs));
+    }
+}
+
+// Mostrar un split en la tabla sin recargarla (si aún no está)
+function showSplit(split) {
+    if (!currentSplits.some(existing => existing.id === split.id)) {
+        currentSplits.unshift(split);
     }
+    renderSplitsTable();
+    document.getElementById('splits-section').style.display = 'block';
 }
 
-async function loadSplits() {
+async function loadSplits(append = false) {
     try {
-        const data = await apiCall('/splits/');
-        currentSplits = data.splits || [];
+        const endpoint = append && splitsNextPage
+            ? toApiEndpoint(splitsNextPage)
+            : `/splits/?fields=${SPLIT_LIST_FIELDS}`;
+        const data = await apiCall(endpoint);
+        currentSplits = append ? currentSplits.concat(data.splits || []) : (data.splits || []);
+        splitsNextPage = data.next || null;
+        document.getElementById('splits-more-btn').style.display = splitsNextPage ? 'inline-block' : 'none';
         renderSplitsTable();
         
         document.getElementById('splits-section').style.display = 
@@ -367,7 +547,7 @@ function renderSplitsTable() {
                     <button class="btn btn-secondary btn-small" onclick="downloadSplitFile(${split.id}, 'test')">
                         Test
                     </button>
-                    ${(split.distribution_plot_url || split.comparison_plot_url) ? `
+                    ${(split.stratify_column || split.distribution_plot_url || split.comparison_plot_url) ? `
                     <button class="btn btn-secondary btn-small" onclick="loadPlots(${split.id})">
                         Gráficas
                     </button>
@@ -380,10 +560,11 @@ function renderSplitsTable() {
 
 async function downloadSplitFile(splitId, fileType) {
     try {
-        const downloadUrl = `${API_BASE_URL}/splits/${splitId}/download/${fileType}/`;
+        const format = document.getElementById('download-format').value;
+        const downloadUrl = `${API_BASE_URL}/splits/${splitId}/download/${fileType}/?format=${encodeURIComponent(format)}`;
         const a = document.createElement('a');
         a.href = downloadUrl;
-        a.download = `${fileType}_split.arff`;
+        a.download = `${fileType}_split.${format}`;
         a.target = '_blank';
         document.body.appendChild(a);
         a.click();
@@ -456,7 +637,9 @@ async function loadStratificationColumns(datasetId) {
 
 async function loadPlots(splitId) {
     try {
-        const split = currentSplits.find(s => s.id === splitId);
+        // El listado no incluye los conteos de las gráficas: se piden al abrirlas
+        const data = await apiCall(`/splits/${splitId}/`);
+        const split = data.split;
         if (!split) {
             showNotification('División no encontrada', 'error');
             return;
@@ -465,7 +648,25 @@ async function loadPlots(splitId) {
         const container = document.getElementById('plots-container');
         let plotsHTML = '';
         
-        if (split.distribution_plot_url) {
+        if (split.chart_data) {
+            // Gráficas dibujadas en el navegador a partir de los conteos
+            plotsHTML += `
+                <div class="plot-item">
+                    <h4>Distribución - ${split.stratify_column || 'Dataset'}</h4>
+                    <canvas id="distribution-chart"></canvas>
+                </div>
+                <div class="plot-item">
+                    <h4>Comparación entre Splits (% por conjunto)</h4>
+                    <canvas id="comparison-chart"></canvas>
+                    ${(split.distribution_plot_url || split.comparison_plot_url) ? `
+                    <div class="plot-links">
+                        ${split.distribution_plot_url ? `<a href="${split.distribution_plot_url}" target="_blank">PNG distribución</a>` : ''}
+                        ${split.comparison_plot_url ? `<a href="${split.comparison_plot_url}" target="_blank">PNG comparación</a>` : ''}
+                    </div>
+                    ` : ''}
+                </div>
+            `;
+        } else if (split.distribution_plot_url) {
             plotsHTML += `
                 <div class="plot-item">
                     <h4>Distribución - ${split.stratify_column || 'Dataset'}</h4>
@@ -488,6 +689,20 @@ async function loadPlots(splitId) {
         }
         
         container.innerHTML = plotsHTML;
+        
+        if (split.chart_data) {
+            const data = split.chart_data;
+            drawBarChart(document.getElementById('distribution-chart'), data.labels, [
+                { name: 'Original', values: data.original, color: '#3b6fd8' }
+            ]);
+            drawBarChart(document.getElementById('comparison-chart'), data.labels, [
+                { name: 'Original', values: toPercentages(data.original), color: '#3b6fd8' },
+                { name: 'Train', values: toPercentages(data.train), color: '#2e9e4f' },
+                { name: 'Validation', values: toPercentages(data.validation), color: '#e08a1e' },
+                { name: 'Test', values: toPercentages(data.test), color: '#d64541' }
+            ], { percent: true });
+        }
+        
         document.getElementById('plots-section').style.display = 'block';
         document.getElementById('plots-section').scrollIntoView({ behavior: 'smooth' });
         
@@ -496,6 +711,88 @@ async function loadPlots(splitId) {
     }
 }
 
+// Gráficas en canvas
+function toPercentages(values) {
+    const total = values.reduce((sum, value) => sum + value, 0);
+    return values.map(value => total ? (value * 100) / total : 0);
+}
+
+function drawBarChart(canvas, labels, series, options = {}) {
+    // Ajustar la resolución del canvas a su tamaño en pantalla
+    const ratio = window.devicePixelRatio || 1;
+    const width = canvas.clientWidth;
+    const height = canvas.clientHeight;
+    canvas.width = width * ratio;
+    canvas.height = height * ratio;
+    
+    const ctx = canvas.getContext('2d');
+    ctx.scale(ratio, ratio);
+    ctx.clearRect(0, 0, width, height);
+    ctx.font = '11px sans-serif';
+    
+    const margin = { top: series.length > 1 ? 28 : 12, right: 10, bottom: 60, left: 50 };
+    const plotWidth = width - margin.left - margin.right;
+    const plotHeight = height - margin.top - margin.bottom;
+    const maxValue = Math.max(1, ...series.flatMap(s => s.values));
+    const format = value => options.percent ? `${value.toFixed(1)}%` : Math.round(value).toLocaleString();
+    
+    // Ejes y marcas del eje Y
+    ctx.strokeStyle = '#999';
+    ctx.fillStyle = '#333';
+    ctx.beginPath();
+    ctx.moveTo(margin.left, margin.top);
+    ctx.lineTo(margin.left, margin.top + plotHeight);
+    ctx.lineTo(margin.left + plotWidth, margin.top + plotHeight);
+    ctx.stroke();
+    
+    ctx.textAlign = 'right';
+    ctx.textBaseline = 'middle';
+    for (let i = 0; i <= 4; i++) {
+        const value = (maxValue * i) / 4;
+        const y = margin.top + plotHeight - (plotHeight * i) / 4;
+        ctx.fillText(format(value), margin.left - 4, y);
+    }
+    
+    // Barras agrupadas por etiqueta
+    const groupWidth = plotWidth / Math.max(1, labels.length);
+    const barWidth = (groupWidth * 0.8) / series.length;
+    series.forEach((s, seriesIndex) => {
+        ctx.fillStyle = s.color;
+        s.values.forEach((value, labelIndex) => {
+            const barHeight = (value / maxValue) * plotHeight;
+            const x = margin.left + labelIndex * groupWidth + groupWidth * 0.1 + seriesIndex * barWidth;
+            ctx.fillRect(x, margin.top + plotHeight - barHeight, barWidth, barHeight);
+        });
+    });
+    
+    // Etiquetas del eje X (rotadas como en las gráficas PNG)
+    ctx.fillStyle = '#333';
+    ctx.textAlign = 'right';
+    ctx.textBaseline = 'top';
+    labels.forEach((label, labelIndex) => {
+        const x = margin.left + labelIndex * groupWidth + groupWidth / 2;
+        ctx.save();
+        ctx.translate(x, margin.top + plotHeight + 6);
+        ctx.rotate(-Math.PI / 4);
+        ctx.fillText(label.length > 18 ? `${label.slice(0, 17)}…` : label, 0, 0);
+        ctx.restore();
+    });
+    
+    // Leyenda
+    if (series.length > 1) {
+        ctx.textAlign = 'left';
+        ctx.textBaseline = 'middle';
+        let x = margin.left;
+        series.forEach(s => {
+            ctx.fillStyle = s.color;
+            ctx.fillRect(x, 8, 10, 10);
+            ctx.fillStyle = '#333';
+            ctx.fillText(s.name, x + 14, 13);
+            x += ctx.measureText(s.name).width + 30;
+        });
+    }
+}
+
 // Utilidades de UI
 function showNotification(message, type = 'info') {
     const notification = document.getElementById('notification');
@@ -0,0 +1,16 @@
+# Configuración de gunicorn (se carga automáticamente desde el directorio de trabajo).
+#
+# Por defecto cada worker arranca sin NumPy/pandas/matplotlib: se importan la
+# primera vez que una vista los necesita. Con GUNICORN_PRELOAD=1 la aplicación
+# y la pila científica se importan una sola vez en el proceso maestro (--preload)
+# y los workers la comparten por copy-on-write, a costa de un arranque inicial
+# más lento y de tener que reiniciar el maestro para recargar código.
+import os
+
+preload_app = os.environ.get('GUNICORN_PRELOAD', '0') == '1'
+
+if preload_app:
+    import numpy  # noqa: F401
+    import pandas  # noqa: F401
+    import matplotlib  # noqa: F401
+    from matplotlib.backends import backend_agg  # noqa: F401